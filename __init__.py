@@ -1 +1,21 @@
-from object_recursion.methods import rtype, rsize, rcontainer_tree_str, rsize_overlap
\ No newline at end of file
+from object_recursion.methods import rtype, rsize, rcontainer_tree_str, rcontainer_tree_write, rsize_overlap, \
+    rsize_by_type, rcycles, rduplicates, rexport, rsize_many, rpath, rpaths, rschema, rcompact, rindex, \
+    rcensus, rcontainer_efficiency, rsize_event_loop, rsize_parallel
+from object_recursion.sampling import AdaptiveSampling
+from object_recursion.edge_providers import EdgeProvider, AttributeEdgeProvider, GCEdgeProvider
+from object_recursion.handlers import TypeHandler, HandlerRegistry, default_handlers
+from object_recursion.iteration import IterationPolicy
+from object_recursion.numpy_support import NDArray
+from object_recursion.schema import RecordSchema, Columns
+from object_recursion.overlap_tracker import OverlapTracker
+
+
+def __getattr__(name):
+    # Snapshots and indices are numpy-based, so numpy is only imported when they are used
+    if name == "GraphSnapshot":
+        from object_recursion.snapshot import GraphSnapshot
+        return GraphSnapshot
+    if name == "GraphIndex":
+        from object_recursion.graph_index import GraphIndex
+        return GraphIndex
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
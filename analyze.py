@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from object_recursion.methods import rtype, rsize, rsize_by_type
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Files which can be analysed and how they are loaded
+SerializedFormats = {
+    ".pkl": "pickle",
+    ".pickle": "pickle",
+    ".npy": "numpy",
+    ".npz": "numpy",
+}
+
+# Processes of the pool are replaced after each chunk of files, so the peak RSS of a process is that of its own files
+# (not supported before Python 3.11)
+_fresh_processes = dict(max_tasks_per_child=1) if sys.version_info >= (3, 11) else dict()
+
+# Columns of the CSV-report (followed by one column per type)
+ReportColumns = ["path", "file_size", "rtype", "rsize", "load_seconds", "analysis_seconds", "peak_rss", "error"]
+
+
+def collect_paths(paths):
+    """
+    Expands directories into the serialized files they contain.
+    :param list paths: Files and directories.
+    :return: list
+    """
+    collected = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, file_names in sorted(os.walk(path)):
+                for file_name in sorted(file_names):
+                    if os.path.splitext(file_name)[1].lower() in SerializedFormats:
+                        collected.append(os.path.join(directory, file_name))
+        else:
+            collected.append(path)
+    return collected
+
+
+def load_file(path, allow_pickle=False):
+    """
+    Loads a serialized object from disk.
+    :param str path: Path of pickle- or numpy-file.
+    :param bool allow_pickle: Allow numpy-files to contain pickled object-arrays.
+    :return: object
+    """
+    extension = os.path.splitext(path)[1].lower()
+    file_format = SerializedFormats.get(extension)
+
+    if file_format == "pickle":
+        with open(path, "rb") as file:
+            return pickle.load(file)
+    elif file_format == "numpy":
+        import numpy as np
+
+        if extension == ".npz":
+            with np.load(path, allow_pickle=allow_pickle) as data:
+                return {name: data[name] for name in data.files}
+        return np.load(path, allow_pickle=allow_pickle)
+
+    raise ValueError(f"Unknown file-format: {path}")
+
+
+def _peak_rss():
+    """
+    Peak resident set size of the current process in Bytes.
+    :return: int | None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports Bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def analyze_file(path, allow_pickle=False, container_sampling=None):
+    """
+    Loads a file and runs rtype(), rsize() and rsize_by_type() on its content.
+    Errors are noted in the record instead of being raised, so that a single bad file does not stop a batch.
+    :param str path: Path of serialized file.
+    :param bool allow_pickle: Allow numpy-files to contain pickled object-arrays.
+    :param int container_sampling: Sampling used by rtype().
+    :return: dict
+    """
+    record = dict(path=path, file_size=None, rtype=None, rsize=None, types={},
+                  load_seconds=None, analysis_seconds=None, peak_rss=None, error=None)
+    try:
+        record["file_size"] = os.path.getsize(path)
+
+        # Load
+        start = time.perf_counter()
+        obj = load_file(path, allow_pickle=allow_pickle)
+        record["load_seconds"] = time.perf_counter() - start
+
+        # Analyse
+        start = time.perf_counter()
+        record["rtype"] = rtype(obj, container_sampling=container_sampling)
+        record["rsize"] = rsize(obj)
+        record["types"] = rsize_by_type(obj)
+        record["analysis_seconds"] = time.perf_counter() - start
+
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    # Peak memory of the process having analysed the file (and the other files of its chunk)
+    record["peak_rss"] = _peak_rss()
+
+    return record
+
+
+def _analyze_file_star(arguments):
+    return analyze_file(*arguments)
+
+
+def analyze_paths(paths, workers=None, allow_pickle=False, container_sampling=None, chunk_size=1):
+    """
+    Analyses all serialized files in paths using a pool of processes.
+    :param list paths: Files and directories.
+    :param int workers: Number of processes. Defaults to the number of CPUs. With 1 worker, no pool is used.
+    :param bool allow_pickle: Allow numpy-files to contain pickled object-arrays.
+    :param int container_sampling: Sampling used by rtype().
+    :param int chunk_size: Number of files sent to a process at a time.
+    :return: list
+        One record per file, in the order of the files. Each chunk of files is analysed by a new process, so the
+        peak_rss of a file is the peak resident set size of the files in its chunk (only the file itself by default).
+        With 1 worker, it is the peak of the calling process so far.
+    """
+    file_paths = collect_paths(paths)
+    arguments = [(path, allow_pickle, container_sampling) for path in file_paths]
+
+    if workers == 1:
+        return [_analyze_file_star(val) for val in arguments]
+
+    with ProcessPoolExecutor(max_workers=workers, **_fresh_processes) as executor:
+        return list(executor.map(_analyze_file_star, arguments, chunksize=chunk_size))
+
+
+def merge_records(records):
+    """
+    Merges file-records into a single report with totals.
+    :param list records:
+    :return: dict
+    """
+    type_sizes = dict()
+    for record in records:
+        for name, size in record["types"].items():
+            type_sizes[name] = type_sizes.get(name, 0) + size
+
+    totals = dict(
+        files=len(records),
+        errors=sum(record["error"] is not None for record in records),
+        rsize=sum(record["rsize"] or 0 for record in records),
+        analysis_seconds=sum(record["analysis_seconds"] or 0 for record in records),
+        peak_rss=max([record["peak_rss"] or 0 for record in records], default=0),
+        types=dict(sorted(type_sizes.items(), key=lambda item: (-item[1], item[0]))),
+    )
+
+    return dict(totals=totals, files=records)
+
+
+def write_report(report, file, report_format="json"):
+    """
+    Writes a merged report.
+    :param dict report: Report from merge_records().
+    :param file: File-like object.
+    :param str report_format: "json" or "csv".
+        "csv" writes one row per file, with one column per type holding the Bytes used by that type.
+    """
+    if report_format == "json":
+        json.dump(report, file, indent=2)
+        file.write("\n")
+    elif report_format == "csv":
+        type_names = list(report["totals"]["types"])
+        writer = csv.writer(file)
+        writer.writerow(ReportColumns + type_names)
+        for record in report["files"]:
+            writer.writerow([record[column] for column in ReportColumns] +
+                            [record["types"].get(name, 0) for name in type_names])
+    else:
+        raise ValueError(f"Unknown report-format: {report_format}")
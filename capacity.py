@@ -0,0 +1,118 @@
+import struct
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+# Allocation of a container
+Allocation = namedtuple("Allocation", "length, capacity, size, compact_size, wasted, load_factor")
+
+# Size of a pointer
+_pointer_size = struct.calcsize("P")
+
+
+# Smallest hash tables of dictionaries and sets
+_min_dict_table = 8
+_min_set_table = 8
+
+# Sizes of an empty dictionary and set, without a table of their own
+_empty_dict_size = sys.getsizeof({})
+_empty_set_size = sys.getsizeof(set())
+
+# Entries of dictionaries hold a hash, a key and a value (only a key and a value if all keys are strings)
+_dict_entry_size = 3 * _pointer_size
+_unicode_entry_size = _dict_entry_size - (sys.getsizeof({0: None}) - sys.getsizeof({"": None})) // 5
+
+# Header of the table of a dictionary, derived from a dictionary with the smallest table (with 1 Byte per index and
+# 5 usable entries)
+_dict_keys_size = sys.getsizeof({0: None}) - _empty_dict_size - _min_dict_table - 5 * _dict_entry_size
+
+
+@lru_cache(maxsize=4096)
+def _compact_dict_size(length, unicode):
+    """
+    Size of a dictionary with length entries, which was created with exactly the needed capacity, following the sizing
+    of CPython: The table is the smallest power of two of which two thirds can hold the entries. The table holds an
+    index for each slot (of 1, 2, 4 or 8 Bytes depending on the size of the table) and an entry for each usable slot.
+    Dictionaries with only string-keys have smaller entries.
+    """
+    table = _min_dict_table
+    while table * 2 // 3 < length:
+        table *= 2
+    index_size = 1 if table <= 2 ** 7 else 2 if table <= 2 ** 15 else 4 if table <= 2 ** 31 else 8
+    entry_size = _unicode_entry_size if unicode else _dict_entry_size
+    return _empty_dict_size + _dict_keys_size + table * index_size + table * 2 // 3 * entry_size
+
+
+@lru_cache(maxsize=4096)
+def _compact_set_size(length):
+    """
+    Size of a set with length elements, which was created with exactly the needed capacity, following the sizing of
+    CPython: The smallest table, which is part of the set itself, is used while it is filled to less than three fifths.
+    Otherwise the table is the smallest power of two larger than twice the number of elements, with an entry of a hash
+    and a key for each slot.
+    """
+    if length * 5 < (_min_set_table - 1) * 3:
+        return _empty_set_size
+    table = _min_set_table
+    while table <= 2 * length:
+        table *= 2
+    return _empty_set_size + table * 2 * _pointer_size
+
+
+def _hash_table_capacity(length, size, compact_size, empty_size):
+    """
+    Hash tables do not expose their capacity, so it is estimated as the number of entries which fit in the allocated
+    memory, at the cost per entry of a compact table.
+    """
+    if size <= empty_size:
+        return length, 1.0
+    load_factor = (compact_size - empty_size) / (size - empty_size)
+    capacity = round(length / load_factor) if length else None
+    return capacity, load_factor
+
+
+def allocation(obj):
+    """
+    Allocated capacity of a container, derived from sys.getsizeof(), and the memory wasted on unused capacity (fx. by
+    lists grown by appending, or dictionaries which once held many more entries than now).
+    :param list | dict | set | frozenset | bytearray obj: Container.
+    :return: Allocation | None
+        With the fields:
+            length          :   Number of elements.
+            capacity        :   Number of elements the allocated memory can hold. Estimated for dictionaries and
+                                sets (None for empty tables).
+            size            :   sys.getsizeof() of the container.
+            compact_size    :   sys.getsizeof() of a copy with exactly the needed capacity (computed without copying).
+            wasted          :   Bytes of unused capacity.
+            load_factor     :   Fraction of the capacity in use.
+        None if obj is not one of the supported containers.
+    """
+    size = sys.getsizeof(obj)
+    length = len(obj) if isinstance(obj, (list, dict, set, frozenset, bytearray)) else None
+
+    if isinstance(obj, list):
+        empty_size = sys.getsizeof([])
+        capacity = (size - empty_size) // _pointer_size
+        compact_size = empty_size + length * _pointer_size
+        load_factor = length / capacity if capacity else 1.0
+    elif isinstance(obj, bytearray):
+        empty_size = sys.getsizeof(bytearray())
+        capacity = obj.__alloc__()
+        compact_size = size - capacity + (length + 1 if length else 0)
+        load_factor = length / capacity if capacity else 1.0
+    elif isinstance(obj, dict):
+        empty_size = sys.getsizeof({})
+        unicode = all(type(key) is str for key in obj)
+        compact_size = _compact_dict_size(length, unicode) if length else empty_size
+        capacity, load_factor = _hash_table_capacity(length, size, compact_size, empty_size)
+    elif isinstance(obj, (set, frozenset)):
+        empty_size = sys.getsizeof(set())
+        compact_size = _compact_set_size(length)
+        capacity, load_factor = _hash_table_capacity(length, size, compact_size, empty_size)
+    else:
+        return None
+
+    # Subclasses may have a larger base size than the built-in type
+    compact_size = min(compact_size, size)
+    return Allocation(length=length, capacity=capacity, size=size, compact_size=compact_size,
+                      wasted=size - compact_size, load_factor=load_factor)
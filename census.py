@@ -0,0 +1,203 @@
+import gc
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# Result of a heap census
+Census = namedtuple("Census", "total, n_objects, by_module, by_global, by_thread, unreachable, by_type, complete, "
+                              "elapsed")
+
+# Objects visited between checks of the time budget
+_check_interval = 4096
+
+# Attempts to read the children of an object which is changed by other threads during the census
+_n_attempts = 3
+
+
+def _sorted(sizes):
+    return dict(sorted(sizes.items(), key=lambda item: (-item[1], item[0])))
+
+
+class HeapCensus:
+    """
+    Census of the memory of the whole process. Objects are found from the modules in sys.modules, the frames of the
+    running threads and finally the objects tracked by the garbage collector. Each object is visited once (all
+    searches share one set of visited objects) and is attributed to the first root reaching it:
+        - The global variable of a module (the module itself is attributed its attribute-dictionary).
+        - The local variables of the frames of a thread.
+        - Objects unreachable from modules and threads.
+    The search is iterative, so it handles arbitrarily deep object-graphs, and stops when the time budget is spent.
+    """
+    def __init__(self, recurser, time_budget=None):
+        """
+        :param ObjectRecursion recurser: Determines the children and shallow sizes of objects.
+        :param float time_budget: Maximum number of seconds to spend. None for no limit.
+        """
+        self.recurser = recurser
+        self.time_budget = time_budget
+
+        self._context = None  # type: ObjectRecursion
+        self._handled = None  # type: set
+        self._by_type = None  # type: dict
+        self._atoms = None  # type: dict
+        self._n_objects = 0
+        self._deadline = None  # type: float
+        self._expired = False
+
+    def _claim(self, root):
+        """
+        Visits all objects reachable from root, which have not been visited before.
+        :return: int
+            Sum of shallow sizes of the visited objects.
+        """
+        handled = self._handled
+        root_id = id(root)
+        if root_id in handled or self._expired:
+            return 0
+        handled.add(root_id)
+
+        recurser = self._context
+        by_type = self._by_type
+        atoms = self._atoms
+        size = 0
+        stack = [root]
+        while stack:
+            obj = stack.pop()
+            obj_type = type(obj)
+
+            # Most objects are unhandled and terminal (fx. strings and numbers), which is decided once per type
+            atom = atoms.get(obj_type)
+            if atom is None:
+                atom = atoms[obj_type] = recurser.handler_for(obj) is None and recurser.terminate(obj)
+            obj_size = sys.getsizeof(obj) if atom else recurser.shallow_size(obj)
+            size += obj_size
+            name = "None" if obj is None else obj_type.__name__
+            by_type[name] = by_type.get(name, 0) + obj_size
+
+            # Check time budget
+            self._n_objects += 1
+            if self._deadline is not None and self._n_objects % _check_interval == 0 \
+                    and time.perf_counter() > self._deadline:
+                self._expired = True
+                break
+
+            if atom:
+                continue
+
+            # Other threads keep running, so containers may change size while their children are read
+            children = None
+            for _ in range(_n_attempts):
+                try:
+                    children = list(recurser.children(obj))
+                    break
+                except RuntimeError:
+                    continue
+            if children is None:
+                continue
+
+            for child in children:
+                child_id = id(child)
+                if child_id not in handled:
+                    handled.add(child_id)
+                    stack.append(child)
+
+        return size
+
+    def _count(self, obj, obj_size):
+        """
+        Adds the size of an object which is not visited by _claim() to the sizes by type.
+        :return: int
+            obj_size.
+        """
+        name = type(obj).__name__
+        self._by_type[name] = self._by_type.get(name, 0) + obj_size
+        self._n_objects += 1
+        return obj_size
+
+    def _modules(self, by_module, by_global):
+        modules = [(name, module) for name, module in list(sys.modules.items()) if module is not None]
+
+        # Modules are roots, so they are not counted as the globals of modules importing them
+        namespaces = dict()
+        for _, module in modules:
+            namespace = getattr(module, "__dict__", None)
+            namespaces[id(module)] = namespace if isinstance(namespace, dict) else None
+            self._handled.add(id(module))
+            self._handled.add(id(namespace))
+        self._handled.add(id(sys.modules))
+
+        counted = set()
+        for module_name, module in modules:
+            # Modules may be registered under several names
+            if id(module) in counted:
+                continue
+            counted.add(id(module))
+            module_size = self._count(module, self._context.shallow_size(module))
+            namespace = namespaces[id(module)]
+            if namespace is not None:
+                module_size += self._count(namespace, sys.getsizeof(namespace))
+                for name, value in list(namespace.items()):
+                    size = self._claim(value)
+                    if size:
+                        by_global[f"{module_name}.{name}"] = size
+                        module_size += size
+            if module is sys:
+                module_size += self._count(sys.modules, sys.getsizeof(sys.modules))
+            by_module[module_name] = module_size
+
+    def _threads(self, by_thread):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, str(ident))
+            size = 0
+            while frame is not None:
+                for value in list(frame.f_locals.values()):
+                    size += self._claim(value)
+                frame = frame.f_back
+            by_thread[name] = by_thread.get(name, 0) + size
+
+    def _unreachable(self):
+        objects = gc.get_objects()
+        self._handled.add(id(objects))
+        size = 0
+        for obj in objects:
+            size += self._claim(obj)
+        return size
+
+    def take(self):
+        """
+        :return: Census
+        """
+        start = time.perf_counter()
+        self._deadline = None if self.time_budget is None else start + self.time_budget
+        self._expired = False
+        self._n_objects = 0
+        self._by_type = dict()
+        self._atoms = dict()
+        self._context = self.recurser.context()
+
+        # The census does not count itself
+        self._handled = set()
+        self._handled.update((id(self), id(self.__dict__), id(self._context), id(self._handled), id(self._by_type),
+                              id(self._atoms)))
+
+        by_module = dict()
+        by_global = dict()
+        by_thread = dict()
+        self._handled.update((id(by_module), id(by_global), id(by_thread)))
+
+        self._modules(by_module=by_module, by_global=by_global)
+        self._threads(by_thread=by_thread)
+        unreachable = self._unreachable()
+
+        total = sum(by_module.values()) + sum(by_thread.values()) + unreachable
+        return Census(total=total,
+                      n_objects=self._n_objects,
+                      by_module=_sorted(by_module),
+                      by_global=_sorted(by_global),
+                      by_thread=_sorted(by_thread),
+                      unreachable=unreachable,
+                      by_type=_sorted(self._by_type),
+                      complete=not self._expired,
+                      elapsed=time.perf_counter() - start)
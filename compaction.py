@@ -0,0 +1,88 @@
+import sys
+from array import array
+
+# Type-codes of arrays of numbers
+_array_typecodes = {int: "q", float: "d"}
+
+
+class _CompactCopier:
+    """
+    Copies plain containers (lists, tuples, dictionaries, sets and strings) in compact form. Objects referenced
+    several times are copied once, so sharing and reference-loops are kept. Other objects are not copied.
+    """
+    def __init__(self, convert, min_array_length):
+        self.convert = convert
+        self.min_array_length = min_array_length
+        self._copies = dict()  # type: dict
+        self._strings = dict()  # type: dict
+
+    def _number_array(self, obj):
+        if len(obj) < self.min_array_length:
+            return None
+        element_type = type(obj[0])
+        typecode = _array_typecodes.get(element_type)
+        if typecode is None or any(type(val) is not element_type for val in obj):
+            return None
+        try:
+            return array(typecode, obj)
+        except OverflowError:
+            return None
+
+    def copy(self, obj):
+        obj_type = type(obj)
+        if obj_type is str:
+            return self._strings.setdefault(obj, sys.intern(obj))
+
+        obj_id = id(obj)
+        if obj_id in self._copies:
+            return self._copies[obj_id]
+
+        if obj_type is list:
+            if self.convert:
+                numbers = self._number_array(obj)
+                if numbers is not None:
+                    self._copies[obj_id] = numbers
+                    return numbers
+
+            # Lists are allocated with exactly the needed capacity, and noted before their elements (for loops)
+            copied = [None] * len(obj)
+            self._copies[obj_id] = copied
+            for nr, val in enumerate(obj):
+                copied[nr] = self.copy(val)
+            if self.convert:
+                copied = self._copies[obj_id] = tuple(copied)
+            return copied
+
+        if obj_type is dict:
+            copied = dict()
+            self._copies[obj_id] = copied
+            for key, val in obj.items():
+                copied[self.copy(key)] = self.copy(val)
+
+            # Updating an empty dictionary from a dictionary allocates exactly the needed capacity
+            entries = dict(copied)
+            copied.clear()
+            copied.update(entries)
+            return copied
+
+        if obj_type in (tuple, set, frozenset):
+            copied = obj_type(self.copy(val) for val in obj)
+            if obj_type is set:
+                copied = set(copied)
+            self._copies[obj_id] = copied
+            return copied
+
+        return obj
+
+
+def compact_copy(obj, convert=False, min_array_length=16):
+    """
+    Copy of an object, where plain containers (lists, tuples, dictionaries and sets) have no unused capacity and
+    strings are interned. Other objects are shared with the original.
+    :param obj: Object to copy.
+    :param bool convert: Also convert lists to tuples, and lists of only integers or only floats to arrays
+        (array.array). The copy is then not equal to the original, and lists referenced from loops stay lists.
+    :param int min_array_length: Lists of numbers shorter than this are not converted to arrays.
+    :return: object
+    """
+    return _CompactCopier(convert=convert, min_array_length=min_array_length).copy(obj)
@@ -0,0 +1,182 @@
+import gc
+from types import FunctionType, ModuleType
+
+from object_recursion.iteration import _iterators
+
+# Kinds of references from an object to the objects it references (apart from the children of containers)
+ClassDict = "__dict__"
+ClassSlots = "__slots__"
+
+# Containers iterated by the iteration policy, whose references are exactly their children (dictionary-views reference
+# their dictionary instead)
+_pure_containers = set(_iterators) - {type({}.keys()), type({}.values())}
+
+# Flag of classes defined in Python (Py_TPFLAGS_HEAPTYPE), whose instances may store attributes without a dictionary
+_heap_type = 1 << 9
+
+
+def _container_children(obj, obj_type):
+    """
+    Children of an instance of a subclass of a plain container, read through the plain container so that no
+    __iter__() of the subclass is run.
+    :param obj:
+    :param type obj_type: Type of the object.
+    :return: list
+    """
+    for base in _pure_containers:
+        if issubclass(obj_type, base):
+            children = list(base.__iter__(obj))
+            if base is dict:
+                children.extend(dict.values(obj))
+            return children
+    return []
+
+
+def _is_attribute_dict(obj, candidate, referents, excluded):
+    """
+    Whether a dictionary referenced by an instance of a class defined in Python is its materialized
+    attribute-dictionary. Reading __dict__ creates the dictionary for objects whose attributes the interpreter stores
+    without one, so the dictionary is recognised from its items instead:
+        - The keys of an attribute-dictionary are strings, whose attributes are the values. Attributes are looked up
+          with object.__getattribute__(), except for keys which are descriptors of the class (which may run code):
+          Data-descriptors take precedence over the attribute-dictionary, so their names are not keys of it, while
+          other descriptors are skipped.
+        - An object with a materialized attribute-dictionary does not reference the values directly (it does when its
+          attributes are stored without a dictionary).
+    A dictionary without keys to look up (fx. an empty one) is the attribute-dictionary if the object references
+    nothing else but its class and the children of a container it may subclass.
+    :param obj: Referencing object.
+    :param dict candidate: Dictionary referenced by the object.
+    :param list referents: All objects referenced by the object.
+    :param set excluded: IDs of the children of the container the object subclasses.
+    :return: bool
+    """
+    mro = type(obj).__mro__
+    referent_ids = {id(child) for child in referents}
+    confirmed = False
+    for key, val in dict.items(candidate):
+        if type(key) is not str or id(val) in referent_ids:
+            return False
+        descriptors = [type(klass.__dict__[key]) for klass in mro if key in klass.__dict__]
+        if any(hasattr(descriptor, "__set__") or hasattr(descriptor, "__delete__") for descriptor in descriptors):
+            return False
+        if any(hasattr(descriptor, "__get__") for descriptor in descriptors):
+            continue
+        try:
+            if object.__getattribute__(obj, key) is not val:
+                return False
+        except AttributeError:
+            return False
+        confirmed = True
+    if confirmed:
+        return True
+    return all(child is candidate or id(child) in excluded or isinstance(child, type) for child in referents)
+
+
+class EdgeProvider:
+    """
+    Finds the objects referenced by an object, apart from the children of containers (which are handled by the
+    recursion system itself).
+    """
+    def references(self, obj, interests):
+        """
+        :param obj: Referencing object.
+        :param set interests: Kinds of references which are wanted (ClassDict and/or ClassSlots).
+        :return: (list, list)
+            Referenced objects and the kind of each reference.
+        """
+        raise NotImplementedError
+
+
+class AttributeEdgeProvider(EdgeProvider):
+    """
+    Follows the values of the attribute-dictionary of objects and the slots of their class.
+    """
+    def references(self, obj, interests):
+        references = []
+        reference_types = []
+
+        # Add references in class-dictionary to references
+        if ClassDict in interests and hasattr(obj, '__dict__'):
+            children = list(vars(obj).values())
+            reference_types += [ClassDict] * len(children)
+            references.extend(children)
+
+        # Add references in class-slots to references
+        if ClassSlots in interests and hasattr(obj, '__slots__'):
+            slots = obj.__slots__
+            slots = (slots,) if isinstance(slots, str) else slots or ()
+            children = [getattr(obj, s) for s in slots if hasattr(obj, s)]
+            reference_types += [ClassSlots] * len(children)
+            references.extend(children)
+
+        return references, reference_types
+
+
+class GCEdgeProvider(EdgeProvider):
+    """
+    Follows everything the garbage collector sees an object referencing, using a single call to gc.get_referents().
+    This includes inherited slots, closure cells, targets of bound methods and the internals of C-extensions.
+    The values of a materialized attribute-dictionary of an instance of a class defined in Python are references of
+    kind ClassDict, while all other references (including attribute-values which the interpreter stores without a
+    dictionary, and the attribute-dictionaries of built-in types like functions) are of kind ClassSlots.
+    No code of the referencing object is run, and attribute-dictionaries are never created by reading __dict__.
+    Objects which are not tracked by the garbage collector (fx. most C-extension types) report no references.
+    """
+    def __init__(self, follow_types=False, follow_globals=False):
+        """
+        :param bool follow_types: Follow references to classes and modules. These are shared by all their instances,
+            so by default they are not considered part of an object.
+        :param bool follow_globals: Follow the global namespaces referenced by functions.
+        """
+        self.follow_types = follow_types
+        self.follow_globals = follow_globals
+
+    def references(self, obj, interests):
+        obj_type = type(obj)
+
+        # The references of plain containers are their children, which are already handled
+        if obj_type in _pure_containers:
+            return [], []
+
+        referents = gc.get_referents(obj)
+        if not referents:
+            return [], []
+
+        # References which should not be followed
+        excluded = {id(val) for val in _container_children(obj, obj_type)}
+        if not self.follow_globals and obj_type is FunctionType:
+            excluded.update((id(obj.__globals__), id(obj.__builtins__)))
+        attribute_dict = None
+        want_dict = ClassDict in interests and obj_type.__flags__ & _heap_type and obj_type.__dictoffset__ != 0
+        want_slots = ClassSlots in interests
+
+        references = []
+        reference_types = []
+        for child in referents:
+            if id(child) in excluded:
+                continue
+
+            # A materialized attribute-dictionary is replaced by its values, like for AttributeEdgeProvider
+            if want_dict and attribute_dict is None and type(child) is dict and \
+                    _is_attribute_dict(obj, child, referents, excluded):
+                attribute_dict = child
+                children = list(child.values())
+                references.extend(children)
+                reference_types += [ClassDict] * len(children)
+            elif not want_slots:
+                continue
+            elif not self.follow_types and isinstance(child, (type, ModuleType)):
+                continue
+            else:
+                references.append(child)
+                reference_types.append(ClassSlots)
+
+        return references, reference_types
+
+
+# Edge-providers selectable by name
+EdgeProviders = dict(
+    attributes=AttributeEdgeProvider,
+    gc=GCEdgeProvider,
+)
@@ -0,0 +1,148 @@
+import numpy as np
+
+from object_recursion.snapshot import GraphSnapshot, type_name
+
+
+class GraphIndex:
+    """
+    Queryable index of the object-graph recorded by the recursion system. The index is built once per recursion,
+    with reverse edges (parents of each node), in-degrees and the nodes of each type sorted by size, so repeated
+    diagnostic queries only cost a binary search and a slice. Objects are identified by their id().
+    """
+    def __init__(self, snapshot, objects=None):
+        """
+        :param GraphSnapshot snapshot: Recorded graph.
+        :param list objects: Object of each node, so queries can return objects. None if objects are not kept.
+        """
+        self.snapshot = snapshot
+        self._objects = objects
+        n_nodes = snapshot.n_nodes
+
+        # Lookup of nodes from ids
+        ids = np.asarray(snapshot.ids)
+        self._id_order = np.argsort(ids, kind="stable")
+        self._sorted_ids = ids[self._id_order]
+
+        # Distinct edges
+        sources = np.repeat(np.arange(n_nodes, dtype=np.int64), np.diff(snapshot.indptr))
+        targets = np.asarray(snapshot.indices, dtype=np.int64)
+        edges = np.unique(targets * n_nodes + sources)
+        targets, sources = np.divmod(edges, max(n_nodes, 1))
+
+        # Reverse edges, as CSR-arrays sorted by target
+        self.in_degrees = np.bincount(targets, minlength=n_nodes)
+        self._parent_indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(self.in_degrees, out=self._parent_indptr[1:])
+        self._parents = sources
+
+        # Nodes of each type, sorted by size
+        type_codes = np.asarray(snapshot.type_codes)
+        sizes = np.asarray(snapshot.sizes)
+        self._type_nodes = np.lexsort((sizes, type_codes))
+        self._type_sizes = sizes[self._type_nodes]
+        self._type_indptr = np.zeros(len(snapshot.type_names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(type_codes, minlength=len(snapshot.type_names)), out=self._type_indptr[1:])
+        self._type_codes = {name: code for code, name in enumerate(snapshot.type_names)}
+
+    @classmethod
+    def from_recurser(cls, recurser, *args, keep_objects=True):
+        """
+        :param ObjectRecursion recurser: Recursion system, which has recursed over objects.
+        :param args: IDs of the recursed objects.
+        :param bool keep_objects: Keep references to the objects, so queries can return them.
+        :return: GraphIndex
+        """
+        snapshot = GraphSnapshot.from_recurser(recurser, *args)
+        return cls(snapshot=snapshot, objects=list(recurser.objects.values()) if keep_objects else None)
+
+    def _node(self, obj_id):
+        # Searching for a numpy-integer of the same type avoids converting the ids
+        position = int(np.searchsorted(self._sorted_ids, self._sorted_ids.dtype.type(obj_id)))
+        if position == len(self._sorted_ids) or int(self._sorted_ids[position]) != obj_id:
+            raise KeyError(f"No object with id {obj_id} in the index.")
+        return int(self._id_order[position])
+
+    def _ids(self, nodes):
+        return np.asarray(self.snapshot.ids)[nodes].tolist()
+
+    def __contains__(self, obj_id):
+        try:
+            self._node(obj_id)
+        except KeyError:
+            return False
+        return True
+
+    def parents(self, obj_id):
+        """
+        :param int obj_id: id() of object.
+        :return: [int]
+            IDs of the objects referencing the object.
+        """
+        node = self._node(obj_id)
+        return self._ids(self._parents[self._parent_indptr[node]:self._parent_indptr[node + 1]])
+
+    def children(self, obj_id):
+        """
+        :param int obj_id: id() of object.
+        :return: [int]
+            IDs of the objects referenced by the object (in the order of the references).
+        """
+        return self._ids(self.snapshot.children(self._node(obj_id)))
+
+    def in_degree(self, obj_id):
+        """
+        :param int obj_id: id() of object.
+        :return: int
+            Number of objects referencing the object.
+        """
+        return int(self.in_degrees[self._node(obj_id)])
+
+    def instances(self, obj_type, min_size=0, max_size=None):
+        """
+        Objects of a type, with shallow sizes in a range.
+        :param type | str obj_type: Type or qualified name of type, fx. "mymodule.Session" (built-in types may be given
+            without "builtins.").
+        :param int min_size: Minimum shallow size in Bytes.
+        :param int max_size: Maximum shallow size in Bytes. None for no maximum.
+        :return: [int]
+            IDs of the objects, largest first.
+        """
+        name = obj_type if isinstance(obj_type, str) else type_name(obj_type)
+        code = self._type_codes.get(name)
+        if code is None and isinstance(obj_type, str):
+            code = self._type_codes.get(f"builtins.{name}")
+        if code is None:
+            return []
+        start, end = self._type_indptr[code], self._type_indptr[code + 1]
+        sizes = self._type_sizes[start:end]
+        low = start + np.searchsorted(sizes, min_size, side="left")
+        high = end if max_size is None else start + np.searchsorted(sizes, max_size, side="right")
+        return self._ids(self._type_nodes[low:high][::-1])
+
+    def shared_nodes(self, min_parents=2):
+        """
+        :param int min_parents: Minimum number of objects referencing each object.
+        :return: [int]
+            IDs of the objects referenced by at least min_parents objects, most referenced first.
+        """
+        nodes = np.flatnonzero(self.in_degrees >= min_parents)
+        nodes = nodes[np.argsort(-self.in_degrees[nodes], kind="stable")]
+        return self._ids(nodes)
+
+    def size(self, obj_id):
+        """
+        :param int obj_id: id() of object.
+        :return: int
+            Shallow size of the object in Bytes.
+        """
+        return int(self.snapshot.sizes[self._node(obj_id)])
+
+    def objects(self, obj_ids):
+        """
+        :param list obj_ids: IDs of objects, fx. from a query.
+        :return: list
+            The objects.
+        """
+        if self._objects is None:
+            raise ValueError("Objects are not kept by the index. Build the index with keep_objects=True.")
+        return [self._objects[self._node(obj_id)] for obj_id in obj_ids]
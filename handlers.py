@@ -0,0 +1,349 @@
+import dataclasses
+import gc
+import sys
+import weakref
+from types import FrameType, FunctionType, ModuleType
+
+from object_recursion.numpy_support import NDArray
+
+
+class TypeHandler:
+    """
+    Describes how the objects of a type are sized and recursed, in place of the generic treatment of the recursion
+    system (iterating containers and following attributes).
+    """
+    def shallow_size(self, obj):
+        """
+        :param obj: Object of the handled type.
+        :return: int
+            Size of the object in Bytes, not including the sizes of its children.
+        """
+        return sys.getsizeof(obj)
+
+    def terminate(self, obj):
+        """
+        :param obj: Object of the handled type.
+        :return: bool
+            Whether the object should not be recursed into.
+        """
+        return False
+
+    def children(self, obj):
+        """
+        :param obj: Object of the handled type.
+        :return: list
+            Objects referenced by the object.
+        """
+        return []
+
+
+class HandlerRegistry:
+    """
+    Mapping from types to handlers. Types are registered either by the class itself or by the name
+    "module.qualname" of the class, so that third-party libraries do not need to be imported. Subclasses of a
+    registered class use the handler of the closest registered class. The handler of each type is only looked up
+    once.
+    """
+    def __init__(self):
+        self._handlers = dict()  # type: dict
+        self._predicates = []  # type: list
+
+        # Handler of each looked-up type, which does not keep classes created at runtime alive
+        self._cache = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+    @staticmethod
+    def _name(cls):
+        return f"{cls.__module__}.{cls.__qualname__}"
+
+    def register(self, cls, handler):
+        """
+        :param type | str cls: Class or "module.qualname" of class.
+        :param TypeHandler handler:
+        """
+        self._handlers[cls if isinstance(cls, str) else self._name(cls)] = handler
+        self._cache.clear()
+
+    def register_predicate(self, predicate, handler):
+        """
+        Registers a handler for all classes satisfying a predicate, fx. dataclasses.is_dataclass.
+        Predicates are only checked for classes which are not registered directly.
+        :param callable predicate: Function taking a class and returning a bool.
+        :param TypeHandler handler:
+        """
+        self._predicates.append((predicate, handler))
+        self._cache.clear()
+
+    def _find(self, obj_type):
+        for cls in obj_type.__mro__:
+            handler = self._handlers.get(self._name(cls))
+            if handler is not None:
+                return handler
+        for predicate, handler in self._predicates:
+            if predicate(obj_type):
+                return handler
+        return None
+
+    def lookup(self, obj_type):
+        """
+        :param type obj_type:
+        :return: TypeHandler | None
+        """
+        try:
+            return self._cache[obj_type]
+        except KeyError:
+            handler = self._cache[obj_type] = self._find(obj_type)
+            return handler
+
+    def copy(self):
+        registry = HandlerRegistry()
+        registry._handlers = dict(self._handlers)
+        registry._predicates = list(self._predicates)
+        return registry
+
+
+class NumpyArrayHandler(TypeHandler):
+    """
+    Arrays are sized by sys.getsizeof() (which includes the data of arrays owning their data). Views have the object
+    owning their data (their base) as child, and arrays of Python objects also their elements.
+    """
+    def terminate(self, obj):
+        return obj.dtype != object and obj.base is None
+
+    def children(self, obj):
+        children = [] if obj.base is None else [obj.base]
+        if obj.dtype == object:
+            children.extend(obj.ravel().tolist())
+        return children
+
+
+def _has_python_objects(dtype):
+    return dtype == object or getattr(dtype, "storage", None) == "python"
+
+
+class PandasHandler(TypeHandler):
+    """
+    Pandas-objects are sized by their buffers, using memory_usage(), so columns and rows are never iterated in Python.
+    """
+    def __init__(self, follow_objects=False):
+        """
+        :param bool follow_objects: Recurse into the Python objects of object-columns, instead of sizing them with
+            memory_usage(deep=True). This finds objects shared with other objects and the contents of containers in
+            the cells, but is O(elements).
+        """
+        self.follow_objects = follow_objects
+
+    def _memory_usage(self, obj, deep):
+        raise NotImplementedError
+
+    def _python_objects(self, obj):
+        """
+        Python objects in the values of obj.
+        """
+        raise NotImplementedError
+
+    def shallow_size(self, obj):
+        return sys.getsizeof(object()) + self._memory_usage(obj, deep=not self.follow_objects)
+
+    def children(self, obj):
+        return self._python_objects(obj) if self.follow_objects else []
+
+
+class PandasIndexHandler(PandasHandler):
+    def _memory_usage(self, obj, deep):
+        return int(obj.memory_usage(deep=deep))
+
+    def terminate(self, obj):
+        return not self.follow_objects or obj.nlevels > 1 or not _has_python_objects(obj.dtype)
+
+    def _python_objects(self, obj):
+        return obj.to_numpy().tolist()
+
+
+class PandasSeriesHandler(PandasHandler):
+    def _memory_usage(self, obj, deep):
+        return int(obj.memory_usage(index=False, deep=deep))
+
+    def _python_objects(self, obj):
+        return obj.to_numpy().tolist() if _has_python_objects(obj.dtype) else []
+
+    def children(self, obj):
+        return [obj.index] + super().children(obj)
+
+
+class PandasDataFrameHandler(PandasHandler):
+    def _memory_usage(self, obj, deep):
+        return int(obj.memory_usage(index=False, deep=deep).sum())
+
+    def _python_objects(self, obj):
+        objects = []
+        for column_nr, dtype in enumerate(obj.dtypes):
+            if _has_python_objects(dtype):
+                objects.extend(obj.iloc[:, column_nr].to_numpy().tolist())
+        return objects
+
+    def children(self, obj):
+        return [obj.index, obj.columns] + super().children(obj)
+
+
+class ScipySparseHandler(TypeHandler):
+    """
+    Sparse matrices have their arrays (fx. data, indices and indptr) as children. Rows are never iterated.
+    """
+    def children(self, obj):
+        return [val for val in vars(obj).values() if isinstance(val, NDArray)]
+
+
+class FieldsHandler(TypeHandler):
+    """
+    Objects with declared fields (dataclasses, attrs-classes and named tuples) have the values of their fields as
+    children, along with any other attributes of the object.
+    """
+    def __init__(self):
+        self._fields = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+
+    @staticmethod
+    def _field_names(cls):
+        if dataclasses.is_dataclass(cls):
+            return tuple(field.name for field in dataclasses.fields(cls))
+        if hasattr(cls, "__attrs_attrs__"):
+            return tuple(attribute.name for attribute in cls.__attrs_attrs__)
+        return tuple(cls._fields)
+
+    def children(self, obj):
+        cls = type(obj)
+        try:
+            names = self._fields[cls]
+        except KeyError:
+            names = self._fields[cls] = self._field_names(cls)
+
+        children = [val for val in (getattr(obj, name, _missing) for name in names) if val is not _missing]
+        if hasattr(obj, "__dict__"):
+            children.extend(value for name, value in vars(obj).items() if name not in names)
+        return children
+
+
+def _owned(objects):
+    # Classes and modules are shared by all their instances, so they are not considered part of an object
+    return [val for val in objects if not isinstance(val, (type, ModuleType))]
+
+
+class FunctionHandler(TypeHandler):
+    """
+    Functions have their closure-cells, default values and attributes as children. The code and the global namespace
+    of a function are shared with the module defining it, so they are not followed.
+    """
+    def children(self, obj):
+        children = list(obj.__closure__ or ())
+        if obj.__defaults__ is not None:
+            children.append(obj.__defaults__)
+        if obj.__kwdefaults__ is not None:
+            children.append(obj.__kwdefaults__)
+        children.extend(vars(obj).values())
+        return _owned(children)
+
+
+class CellHandler(TypeHandler):
+    """
+    Closure-cells have their content as child, if it is set.
+    """
+    def children(self, obj):
+        try:
+            return _owned([obj.cell_contents])
+        except ValueError:
+            return []
+
+
+class MethodHandler(TypeHandler):
+    """
+    Bound methods have their instance and their function as children.
+    """
+    def children(self, obj):
+        return _owned([obj.__self__, obj.__func__])
+
+
+class FrameHandler(TypeHandler):
+    """
+    Generators, coroutines and asynchronous generators have the local variables of their suspended frame and the object
+    they are waiting for (fx. an inner coroutine or a future) as children. The size of the frame is included in
+    sys.getsizeof() of the generator. Finished generators have no children.
+    The local variables are found with gc.get_referents(), as reading f_locals builds (and before Python 3.12 writes
+    back) the dictionary of local variables of the frame.
+    """
+    def __init__(self, code, awaited):
+        """
+        :param str code: Attribute holding the code, fx. "gi_code".
+        :param str awaited: Attribute holding the awaited object, fx. "gi_yieldfrom".
+        """
+        self.code = code
+        self.awaited = awaited
+
+    def children(self, obj):
+        # The code and names of the generator and its function are shared by all generators of the function
+        code = getattr(obj, self.code)
+        shared = {id(code), id(obj.__name__), id(obj.__qualname__)}
+        referents = gc.get_referents(obj)
+        for referent in referents:
+            # Before Python 3.11 the frame is a separate object, which also references the namespaces and the caller
+            if isinstance(referent, FrameType) and id(referent) not in shared:
+                shared.update((id(referent), id(referent.f_globals), id(referent.f_builtins), id(referent.f_back)))
+                referents.extend(gc.get_referents(referent))
+        children = [val for val in referents
+                    if id(val) not in shared and not (type(val) is FunctionType and val.__code__ is code)]
+
+        awaited = getattr(obj, self.awaited)
+        if awaited is not None and all(child is not awaited for child in children):
+            children.append(awaited)
+        return _owned(children)
+
+
+class FutureHandler(TypeHandler):
+    """
+    asyncio-futures have their result, exception and done-callbacks as children, and tasks also their coroutine and the
+    future they are waiting for. The event loop is shared by all its futures, so it is not followed. Neither are the
+    callbacks waking up tasks waiting for the future, as the waiting tasks are not part of the future.
+    """
+    def children(self, obj):
+        children = [val for val in (obj._result, obj._exception) if val is not None]
+        for callback, _ in obj._callbacks or ():
+            # Futures are recognized like asyncio.isfuture() does
+            if not hasattr(getattr(callback, "__self__", None), "_asyncio_future_blocking"):
+                children.append(callback)
+        for name in ("_coro", "_fut_waiter"):
+            val = getattr(obj, name, None)
+            if val is not None:
+                children.append(val)
+        return _owned(children)
+
+
+# Marker for fields which are not set
+_missing = object()
+
+
+def _is_named_tuple(cls):
+    return issubclass(cls, tuple) and hasattr(cls, "_fields")
+
+
+def _has_fields(cls):
+    return dataclasses.is_dataclass(cls) or hasattr(cls, "__attrs_attrs__") or _is_named_tuple(cls)
+
+
+# Handlers used by default by the size-methods
+default_handlers = HandlerRegistry()
+default_handlers.register("numpy.ndarray", NumpyArrayHandler())
+for _name in ["pandas.Index", "pandas.core.indexes.base.Index"]:
+    default_handlers.register(_name, PandasIndexHandler())
+for _name in ["pandas.Series", "pandas.core.series.Series"]:
+    default_handlers.register(_name, PandasSeriesHandler())
+for _name in ["pandas.DataFrame", "pandas.core.frame.DataFrame"]:
+    default_handlers.register(_name, PandasDataFrameHandler())
+for _name in ["scipy.sparse._base._spbase", "scipy.sparse.base.spmatrix"]:
+    default_handlers.register(_name, ScipySparseHandler())
+default_handlers.register("builtins.function", FunctionHandler())
+default_handlers.register("builtins.cell", CellHandler())
+default_handlers.register("builtins.method", MethodHandler())
+default_handlers.register("builtins.generator", FrameHandler(code="gi_code", awaited="gi_yieldfrom"))
+default_handlers.register("builtins.coroutine", FrameHandler(code="cr_code", awaited="cr_await"))
+default_handlers.register("builtins.async_generator", FrameHandler(code="ag_code", awaited="ag_await"))
+for _name in ["_asyncio.Future", "asyncio.futures.Future"]:
+    default_handlers.register(_name, FutureHandler())
+default_handlers.register_predicate(_has_fields, FieldsHandler())
@@ -0,0 +1,91 @@
+from collections import deque
+from collections.abc import Iterator
+
+# Iteration of the materialized containers, which never runs code of subclasses
+_iterators = {
+    list: list.__iter__,
+    tuple: tuple.__iter__,
+    set: set.__iter__,
+    frozenset: frozenset.__iter__,
+    deque: deque.__iter__,
+    dict: lambda obj: iter(dict.items(obj)),
+    type({}.keys()): type({}.keys()).__iter__,
+    type({}.values()): type({}.values()).__iter__,
+}
+
+# Elements which can be sorted without running code of user-defined classes
+_sortable = {str, bytes, int, float, bool}
+
+
+def _sorted_iterator(iterate):
+    def iterate_sorted(obj):
+        if all(type(val) in _sortable for val in iterate(obj)):
+            # Sort by type first, as fx. strings and integers can not be compared
+            return iter(sorted(iterate(obj), key=lambda val: (type(val).__name__, val)))
+        return iterate(obj)
+    return iterate_sorted
+
+
+# Iteration of sets in sorted order
+_ordered_iterators = {
+    set: _sorted_iterator(set.__iter__),
+    frozenset: _sorted_iterator(frozenset.__iter__),
+}
+
+
+class IterationPolicy:
+    """
+    Decides which iterable objects are iterated by the recursion system and how many of their children are visited.
+    By default only materialized containers (lists, tuples, sets, dictionaries, deques and dictionary-views) are
+    iterated, using the iteration of the built-in type, so measuring an object never consumes, mutates or runs code of
+    the objects it inspects. Other iterables are treated as plain objects.
+    """
+    def __init__(self, max_elements=None, allow=None, ordered=False):
+        """
+        :param int max_elements: Maximum number of children visited in each container. Containers with more children
+            are noted as sampled by the recursion system.
+        :param list allow: Additional (custom) iterable types, which should be iterated using iter().
+            Iterators (objects which are consumed by iteration) are never iterated.
+        :param bool ordered: Iterate sets of strings, bytes and numbers in sorted order, so the order of traversal
+            does not depend on hash-randomization and is reproducible across runs.
+        """
+        self.max_elements = max_elements
+        self.allow = tuple(allow) if allow is not None else ()
+        self.ordered = ordered
+        self._cache = dict()  # type: dict
+
+    def _find(self, obj_type):
+        for cls in obj_type.__mro__:
+            if self.ordered and cls in _ordered_iterators:
+                return _ordered_iterators[cls]
+            if cls in _iterators:
+                return _iterators[cls]
+        if issubclass(obj_type, self.allow) and not issubclass(obj_type, Iterator):
+            return iter
+        return None
+
+    def _iterator_function(self, obj_type):
+        try:
+            return self._cache[obj_type]
+        except KeyError:
+            function = self._cache[obj_type] = self._find(obj_type)
+            return function
+
+    def iterable(self, obj):
+        """
+        :param obj:
+        :return: bool
+            Whether the children of obj are visited.
+        """
+        return self._iterator_function(type(obj)) is not None
+
+    def iterate(self, obj):
+        """
+        :param obj:
+        :return: Iterator | None
+            Iterator over all children of obj (key-value pairs for dictionaries), or None if obj is not iterated.
+        """
+        function = self._iterator_function(type(obj))
+        if function is None:
+            return None
+        return function(obj)
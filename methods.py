@@ -1,16 +1,72 @@
+from functools import lru_cache
+
+from object_recursion.census import HeapCensus
+from object_recursion.compaction import compact_copy
+from object_recursion.handlers import default_handlers
+from object_recursion.numpy_support import numpy
 from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.paths import shortest_paths
+from object_recursion.schema import RecordSchema
+from object_recursion.tree_writer import ContainerTreeWriter
 from object_recursion.tasks import TypeCheckTask, SizeTask, ContainerTreePrintTask, \
-    SizeComparisonTask
+    SizeComparisonTask, TypeSizeTask, CycleTask, DuplicateTask, SnapshotTask, CompactionTask, CompactionAdvice, \
+    IndexTask, ContainerEfficiencyTask, RootSizeTask
+
+
+def _frozen(arguments):
+    """
+    Hashable form of keyword-arguments, where lists are converted to tuples.
+    """
+    return tuple(sorted((key, tuple(val) if isinstance(val, list) else val) for key, val in arguments.items()))
+
+
+@lru_cache(maxsize=128)
+def _cached_recurser(tasks, recurser_arguments):
+    return ObjectRecursion(tasks=[task_class(**dict(task_arguments)) for task_class, task_arguments in tasks],
+                           **dict(recurser_arguments))
+
+
+def _recurser(task_class=None, task_arguments=None, tasks=None, **recurser_arguments):
+    """
+    Recurser with a single task, several tasks or none. Recursers are reentrant, so the recursers of the methods are
+    configured once and shared between calls (and threads).
+    :param type task_class: Class of the task. None for a recurser without tasks, which is only used for the
+        children and sizes of objects (fx. by searches and traversals).
+    :param dict task_arguments: Arguments of the task.
+    :param list tasks: (class, arguments) of each task, for recursers with several tasks.
+    :param recurser_arguments: Arguments of the recurser.
+    :return: ObjectRecursion
+    """
+    if tasks is None:
+        tasks = [] if task_class is None else [(task_class, dict() if task_arguments is None else task_arguments)]
+    try:
+        return _cached_recurser(tuple((cls, _frozen(arguments)) for cls, arguments in tasks),
+                                _frozen(recurser_arguments))
+    except TypeError:
+        # Unhashable configuration
+        return ObjectRecursion(tasks=[cls(**arguments) for cls, arguments in tasks], **recurser_arguments)
+
+
+def _require_numpy(method):
+    """
+    Raises an ImportError for methods which need numpy, before anything is recursed.
+    :param str method: Name of the method.
+    """
+    if numpy() is None:
+        raise ImportError(f"{method}() requires numpy, which is not installed.")
 
 
 def rtype(obj, container_sampling=None, delimiter="[", or_divider="|", and_divider=",", map_divider=": ",
-                 numpy_notation="np dim"):
+                 numpy_notation="np dim", output="str"):
     """
     Returns a string representation of the type of an object and the objects contained by the object.
     :param obj: Object whose type and internal types are of interest.
-    :param int container_sampling: If this is a number, then each container will be sampled with this many samples
-        for determining the internal types. That way not every element in large lists, matrices etc. must be
-        analysed.
+    :param int | str | AdaptiveSampling container_sampling: If this is a number, then each container will be sampled
+        with this many samples for determining the internal types. That way not every element in large lists,
+        matrices etc. must be analysed.
+        If this is "adaptive" (or an AdaptiveSampling), then the children of each container are sampled in random
+        order until the sampled types have been stable for a while. Numpy-arrays are described by their dtype.
+        Types whose contained types are based on a sample are prefixed with "~", fx. "~list[int]".
     :param str delimiter: Characters which delimits containers.
         "[": Use square brackets.
         "(": Use parentheses.
@@ -25,15 +81,21 @@ def rtype(obj, container_sampling=None, delimiter="[", or_divider="|", and_divid
         "keep_" in numpy_notation   :   Do not remove the "_"-symbols from numpy-primitives.
         "dim" in numpy_notation     :   Show the number of dimensions of the numpy-arrays.
                                         Fx. show 2darray or 4darray instead of all being ndarray.
-    :return: str
+    :param str output: Default is "str"
+        "str"                       :   String representation, fx. "list[int|str]".
+        "signature"                 :   Interned TypeSignature, which can be rendered later.
+        "typing"                    :   typing-objects, fx. list[typing.Union[int, str]].
+        "json"                      :   JSON-serializable dictionaries.
+    :return: str | TypeSignature | type | dict
     """
-    type_checker = TypeCheckTask(delimiter=delimiter, or_divider=or_divider, and_divider=and_divider,
-                                 map_divider=map_divider, numpy_notation=numpy_notation)
-    the_recurser = ObjectRecursion(tasks=[type_checker], container_sampling=container_sampling)
+    the_recurser = _recurser(TypeCheckTask,
+                             dict(delimiter=delimiter, or_divider=or_divider, and_divider=and_divider,
+                                  map_divider=map_divider, numpy_notation=numpy_notation, output=output),
+                             container_sampling=container_sampling)
     return the_recurser.recurse(obj)[0][0]
 
 
-def rsize(obj, terminate_at=None, word_size=8):
+def rsize(obj, terminate_at=None, word_size=8, edge_provider="attributes", handlers=default_handlers):
     """
     Returns an integer size of the object in Bytes.
     The size is computed using sys.getsizeof() and recursively looking through all references, without adding size of
@@ -44,13 +106,322 @@ def rsize(obj, terminate_at=None, word_size=8):
         Defaults to: []
         System will always terminate at types: [str, bool, Number, bytes, range, bytearray, Generator, np.ndarray].
     :param int word_size: Size of a pointer on the used machine.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "attributes": Values of attribute-dictionaries and slots.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and inherited slots.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types (fx. numpy-arrays,
+        pandas-objects and dataclasses) by themselves. None disables handlers.
     :return: int
     """
-    size_checker = SizeTask(terminate_at=terminate_at, word_size=word_size)
-    recurser = ObjectRecursion(tasks=[size_checker])
+    recurser = _recurser(SizeTask, dict(terminate_at=terminate_at, word_size=word_size),
+                         terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
     return recurser.recurse(obj)[0][0]
 
 
+def rsize_by_type(obj, terminate_at=None, word_size=8, edge_provider="attributes", handlers=default_handlers):
+    """
+    Returns the memory-consumption of an object broken down into the types of the referenced objects.
+    Each referenced object is counted once, using sys.getsizeof().
+    :param obj: Object whose size is to be determined.
+    :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+        Defaults to: []
+        System will always terminate at types: [str, bool, Number, bytes, range, bytearray, Generator, np.ndarray].
+    :param int word_size: Size of a pointer on the used machine.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "attributes": Values of attribute-dictionaries and slots.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and inherited slots.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types (fx. numpy-arrays,
+        pandas-objects and dataclasses) by themselves. None disables handlers.
+    :return: dict
+        Mapping from type-name to Bytes, with the largest types first.
+    """
+    recurser = _recurser(TypeSizeTask, dict(terminate_at=terminate_at, word_size=word_size),
+                         terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    return recurser.recurse(obj)[0][0]
+
+
+def rcycles(obj, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Finds the reference-cycles (strongly connected components) among the objects referenced by an object.
+    Objects in reference-cycles are only freed by the cyclic garbage collector.
+    :param obj: Object to analyse.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "attributes": Values of attribute-dictionaries and slots.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and inherited slots.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: [Cycle]
+        Cycles sorted by size, largest first. Each cycle has the fields:
+            size        :   Total size of the objects in the cycle in Bytes (shallow sizes, like rsize()).
+            n_objects   :   Number of objects in the cycle.
+            types       :   Number of objects of each type in the cycle.
+            path        :   Path from obj to the first object reached in the cycle, fx. "[2].a".
+            loop        :   Path from that object around the cycle and back, fx. ".a.a.a".
+            ids         :   IDs of the objects in the cycle.
+    """
+    recurser = _recurser(CycleTask, terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    return recurser.recurse(obj)[0]
+
+
+def rpath(root, target, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Finds the shortest chain of references from root to target, fx. to find out why target is not freed.
+    The search is breadth-first and stops when target is found, so the graph is never recorded as a whole.
+    :param root: Object to search from.
+    :param target: Object to search for (compared by identity).
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "attributes": Values of attribute-dictionaries and slots.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and inherited slots.
+    :param HandlerRegistry handlers: Handlers which recurse objects of specific types by themselves.
+    :return: str | None
+        Path from root to target, fx. ".sessions['abc'][3].buf", or None if target is not referenced by root.
+    """
+    recurser = _recurser(terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    found = shortest_paths(recurser, root, predicate=lambda obj: obj is target, limit=1)
+    return found[0].path if found else None
+
+
+def rpaths(root, predicate, limit=10, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Finds the shortest chains of references from root to the objects satisfying a predicate.
+    The search is breadth-first and stops when limit objects are found.
+    :param root: Object to search from.
+    :param callable predicate: Function taking an object and returning whether it is wanted,
+        fx. lambda obj: isinstance(obj, Session).
+    :param int limit: Maximum number of objects to find. None finds all.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which recurse objects of specific types by themselves.
+    :return: [ReferencePath]
+        Found objects, nearest first, with the fields:
+            path    :   Path from root to the object, fx. ".sessions['abc'][3]".
+            obj     :   The object.
+    """
+    recurser = _recurser(terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    return shortest_paths(recurser, root, predicate=predicate, limit=limit)
+
+
+def rindex(*args, keep_objects=True, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Records the graph of all objects referenced by the objects in *args and builds a queryable index of it, with
+    reverse edges, in-degrees and the objects of each type sorted by size. Queries take and return id()s of objects:
+        index = rindex(cache)
+        index.parents(id(obj))                          # Who references obj?
+        index.instances(Session, min_size=1000000)      # Sessions of at least 1 MB (shallow size)
+        index.shared_nodes(min_parents=2)               # Objects referenced by several objects
+        index.objects(index.parents(id(obj)))           # The objects themselves
+    :param args: Objects to record.
+    :param bool keep_objects: Keep references to the objects, so queries can return them.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: GraphIndex
+    :raises ImportError: If numpy is not installed, which the index requires.
+    """
+    _require_numpy("rindex")
+    recurser = _recurser(IndexTask, dict(keep_objects=keep_objects), terminate_at=terminate_at,
+                         edge_provider=edge_provider, handlers=handlers)
+    return recurser.recurse(*args)[0]
+
+
+def rsize_many(objs, attribution="first", terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Computes the sizes of many objects in one recursion, with a consistent attribution of objects shared between them.
+    Each object is counted once per root, using its shallow size.
+    :param list objs: Objects whose sizes are to be determined.
+    :param str attribution: Attribution of objects reachable from several of the objects.
+        "first"         :   To the first object reaching it.
+        "proportional"  :   Split evenly between all objects reaching it.
+        "all"           :   To all objects reaching it.
+    :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: RootSizes
+        Arrays with an element per object (array.arrays if numpy is not installed):
+            inclusive   :   Size of all objects reachable from the object.
+            exclusive   :   Size of the objects only reachable from the object.
+            attributed  :   Size attributed to the object.
+    """
+    recurser = _recurser(RootSizeTask, dict(attribution=attribution), terminate_at=terminate_at,
+                         edge_provider=edge_provider, handlers=handlers)
+    return recurser.recurse(*objs)[0]
+
+
+def rsize_event_loop(loop=None, attribution="proportional", terminate_at=None, edge_provider="attributes",
+                     handlers=default_handlers):
+    """
+    Attributes memory to each pending task of an asyncio event-loop: its coroutine (with the local variables of the
+    suspended frames of the coroutine and everything it awaits), the future it is waiting for and its done-callbacks.
+    Requires the handlers of functions, coroutines and futures, which are in the default handlers. Works without numpy,
+    like rsize_many().
+    :param asyncio.AbstractEventLoop loop: Event-loop. Defaults to the running event-loop.
+    :param str attribution: Attribution of objects reachable from several tasks (see rsize_many()).
+        Defaults to splitting them evenly, which does not depend on the order of the tasks.
+    :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: dict
+        Size attributed to each pending task, largest first.
+    """
+    # asyncio is slow to import, so it is only imported when needed
+    import asyncio
+
+    tasks = list(asyncio.all_tasks(loop))
+    if not tasks:
+        return dict()
+    sizes = rsize_many(tasks, attribution=attribution, terminate_at=terminate_at, edge_provider=edge_provider,
+                       handlers=handlers).attributed
+    return dict(sorted(zip(tasks, sizes.tolist()), key=lambda item: -item[1]))
+
+
+def rcensus(time_budget=None, terminate_at=None, edge_provider="gc", handlers=default_handlers):
+    """
+    Census of the memory of the whole process, starting from the modules in sys.modules, the frames of the running
+    threads and the objects tracked by the garbage collector. Each object is counted once (using its shallow size)
+    and attributed to the first root reaching it, so the sizes add up to the total.
+    The search is iterative and stops when the time budget is spent, so it can be used on very large heaps.
+    :param float time_budget: Maximum number of seconds to spend. None for no limit.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and frames.
+        "attributes": Values of attribute-dictionaries and slots.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: Census
+        With the fields:
+            total       :   Bytes counted.
+            n_objects   :   Number of objects counted.
+            by_module   :   Bytes of each module, including its global variables.
+            by_global   :   Bytes of each global variable, fx. "mypackage.cache".
+            by_thread   :   Bytes only reachable from the local variables of each thread.
+            unreachable :   Bytes of the objects unreachable from modules and threads.
+            by_type     :   Bytes of each type.
+            complete    :   False if the time budget was spent before all objects were counted.
+            elapsed     :   Seconds spent.
+        All dictionaries are sorted by size.
+    """
+    recurser = _recurser(terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    return HeapCensus(recurser=recurser, time_budget=time_budget).take()
+
+
+def rsize_parallel(obj, n_threads=None, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Computes the size of an object, in total and by type, traversing the object-graph with several threads on
+    free-threaded builds of CPython. Each object is counted once (using its shallow size), so the sizes by type are
+    the sizes of rsize_by_type(). With the global interpreter lock, the traversal runs in the calling thread.
+    :param obj: Object whose size is to be determined.
+    :param int n_threads: Number of threads on free-threaded builds. Defaults to the number of CPUs.
+    :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: Traversal
+        Size, number of objects, Bytes of each type (largest first) and the number of threads used.
+    """
+    # The threading machinery is only imported when needed
+    from object_recursion.parallel import ParallelTraversal
+
+    recurser = _recurser(terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    return ParallelTraversal(recurser, n_threads=n_threads).run(obj)
+
+
+def rduplicates(obj, terminate_at=None, max_index_size=1000000, max_dict_size=16):
+    """
+    Finds values which are equal, but stored as distinct objects (fx. equal strings, tuples and small dictionaries),
+    and the memory which could be saved by interning or deduplicating them.
+    Values are compared by content-hashes computed bottom-up during the recursion.
+    :param obj: Object to analyse.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param int max_index_size: Maximum number of content-hashes held in memory. When exceeded, values seen only once
+        are forgotten, and the result is marked as incomplete.
+    :param int max_dict_size: Dictionaries with more entries are not compared.
+    :return: Duplicates
+        With the fields:
+            savings     :   Total Bytes saved if all duplicates were shared.
+            by_type     :   Bytes saved for each type, with the largest first.
+            groups      :   DuplicateGroups (type, count, size, savings, value) sorted by savings.
+            complete    :   False if values were forgotten due to max_index_size.
+    """
+    recurser = _recurser(DuplicateTask, dict(max_index_size=max_index_size, max_dict_size=max_dict_size),
+                         terminate_at=terminate_at, handlers=default_handlers)
+    return recurser.recurse(obj)[0]
+
+
+def rschema(records, sample=None, max_cardinality=65536, seed=None):
+    """
+    Infers the schema of a collection of records with a fixed shape, fx. a list of dictionaries or of small objects.
+    The schema can convert the records to a compact columnar form (arrays of numbers and categories of repeated
+    values), and measure the memory saved by doing so:
+        schema = rschema(records)
+        compaction = schema.compaction(records)
+        compaction.columns["name"], compaction.size_before, compaction.size_after
+    :param records: Collection of records (dictionaries, named tuples or objects with attributes).
+    :param int sample: Number of randomly selected records to infer the schema from. None uses all records.
+    :param int max_cardinality: Distinct values are counted up to this many. Fields with more have cardinality None.
+    :param int seed: Seed of the sampling.
+    :return: RecordSchema
+        With a FieldSchema for each field, with the fields:
+            name        :   Name of the field.
+            type        :   String representation of the types of the values, fx. "int|None".
+            types       :   Number of values of each type.
+            nullable    :   Whether the field is None or missing in any record.
+            cardinality :   Number of distinct values (None if more than max_cardinality).
+            count       :   Number of values which are not None.
+    """
+    return RecordSchema.infer(records, sample=sample, max_cardinality=max_cardinality, seed=seed)
+
+
+def rcompact(obj, dry_run=True, convert=False, terminate_at=None, min_array_length=16, min_instances=100):
+    """
+    Finds memory-wasteful patterns among the objects referenced by an object, and estimates the Bytes saved by
+    avoiding each. Optionally makes a compact copy of the object.
+    :param obj: Object to analyse.
+    :param bool dry_run: Only analyse. If False, a compact copy of the plain containers (lists, tuples, dictionaries,
+        sets and strings) is also made, with no unused capacity and interned strings.
+    :param bool convert: Let the compact copy also convert lists to tuples and lists of numbers to arrays.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param int min_array_length: Lists of numbers shorter than this are not suggested as arrays.
+    :param int min_instances: Classes with fewer instances are not suggested to have __slots__.
+    :return: CompactionAdvice
+        With the fields:
+            size        :   rsize() of the object.
+            savings     :   Total estimated Bytes saved by all suggestions.
+            suggestions :   Suggestions (kind, type, count, savings, example) sorted by savings. The kinds are
+                            "list to tuple", "list to array", "intern strings", "add __slots__" and
+                            "shrink container".
+            compact     :   The compact copy (None if dry_run).
+    """
+    recurser = _recurser(tasks=[(SizeTask, dict(terminate_at=terminate_at)),
+                                (CompactionTask, dict(min_array_length=min_array_length, min_instances=min_instances))],
+                         terminate_at=terminate_at, handlers=default_handlers)
+    sizes, suggestions = recurser.recurse(obj)
+    compact = None if dry_run else compact_copy(obj, convert=convert, min_array_length=min_array_length)
+    return CompactionAdvice(size=sizes[0], savings=sum(suggestion.savings for suggestion in suggestions),
+                            suggestions=suggestions, compact=compact)
+
+
+def rcontainer_efficiency(obj, max_containers=20, terminate_at=None, edge_provider="attributes",
+                          handlers=default_handlers):
+    """
+    Finds lists, dictionaries, sets and bytearrays with unused capacity, fx. dictionaries which once held many more
+    keys than now, or lists grown by appending. Each container is counted once.
+    :param obj: Object to analyse.
+    :param int max_containers: Number of the most wasteful containers reported individually.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: EfficiencyReport
+        With the fields:
+            size        :   Bytes allocated by the containers.
+            wasted      :   Bytes of unused capacity.
+            by_type     :   EfficiencyGroup of each type of container, most wasteful first.
+            by_path     :   EfficiencyGroup of each path-pattern (fx. ".sessions[*].buffer"), most wasteful first.
+            containers  :   ContainerEfficiency of the most wasteful containers, with their paths and allocations.
+    """
+    recurser = _recurser(ContainerEfficiencyTask, dict(max_containers=max_containers), terminate_at=terminate_at,
+                         edge_provider=edge_provider, handlers=handlers)
+    return recurser.recurse(obj)[0]
+
+
 def rcontainer_tree_str(obj):
     """
     Returns a string representation of an object and the contained objects.
@@ -58,12 +429,32 @@ def rcontainer_tree_str(obj):
     :param obj: Container to be printed.
     :return: str
     """
-    tree_task = ContainerTreePrintTask()
-    the_recurser = ObjectRecursion(tasks=[tree_task])
+    the_recurser = _recurser(ContainerTreePrintTask)
     return the_recurser.recurse(obj)[0][0]
 
 
-def rsize_overlap(*args, terminate_at=None, word_size=8, verbose=False):
+def rcontainer_tree_write(obj, file, max_depth=None, max_children=None, label_length=80):
+    """
+    Writes the recursive tree of an object and the contained objects to a file, one line at a time.
+    Labels are bounded in length and never contain the representation of the whole sub-tree, so this can be used
+    for very large objects.
+    :param obj: Container to be written.
+    :param file: File-like object or path of file.
+    :param int max_depth: Nodes deeper than this are not written. The root has depth 0.
+    :param int max_children: Maximum number of children written for each node.
+    :param int label_length: Maximum length of the label of each node.
+    :return: int
+        Number of lines written.
+    """
+    writer = ContainerTreeWriter(max_depth=max_depth, max_children=max_children, label_length=label_length)
+    if isinstance(file, str):
+        with open(file, "w") as opened_file:
+            return writer.write(obj, opened_file)
+    return writer.write(obj, file)
+
+
+def rsize_overlap(*args, terminate_at=None, word_size=8, verbose=False, edge_provider="attributes",
+                  handlers=default_handlers):
     """
     Computes the sizes of all objects in *args as well as the approximate memory-overlap between the objects.
     :param args: Objects to analyse.
@@ -71,8 +462,34 @@ def rsize_overlap(*args, terminate_at=None, word_size=8, verbose=False):
         Defaults to: []
         System will always terminate at types: [str, bool, Number, bytes, range, bytearray, Generator, np.ndarray].
     :param int word_size: Size of a pointer on the used machine.
-    :return: np.ndarray
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+        "attributes": Values of attribute-dictionaries and slots.
+        "gc": Everything the garbage collector sees, fx. also closures, bound methods and inherited slots.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types (fx. numpy-arrays,
+        pandas-objects and dataclasses) by themselves. None disables handlers.
+    :return: np.ndarray | OverlapMatrix
+        Matrix of sizes, which is an OverlapMatrix if numpy is not installed.
     """
-    comparison_task = SizeComparisonTask(terminate_at=terminate_at, word_size=word_size)
-    recurser = ObjectRecursion(tasks=[comparison_task], terminate_at=terminate_at)
+    recurser = _recurser(SizeComparisonTask, dict(terminate_at=terminate_at, word_size=word_size),
+                         terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
     return recurser.recurse(*args, verbose=verbose)[0]
+
+
+def rexport(*args, path=None, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Records the graph of all objects referenced by the objects in *args and exports it as a compact snapshot, which
+    holds no live objects. The snapshot can be analysed elsewhere after loading it with GraphSnapshot.load().
+    :param args: Objects to record.
+    :param str path: File to write the snapshot to. The snapshot is only returned if this is None.
+    :param list terminate_at: Objects which should not be recursed into.
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: GraphSnapshot
+    :raises ImportError: If numpy is not installed, which snapshots require.
+    """
+    _require_numpy("rexport")
+    recurser = _recurser(SnapshotTask, terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+    snapshot = recurser.recurse(*args)[0]
+    if path is not None:
+        snapshot.save(path)
+    return snapshot
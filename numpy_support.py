@@ -0,0 +1,46 @@
+import sys
+import typing
+
+
+class _NDArrayType(type):
+    def __instancecheck__(cls, obj):
+        numpy = sys.modules.get("numpy")
+        return numpy is not None and isinstance(obj, numpy.ndarray)
+
+    def __subclasscheck__(cls, subclass):
+        numpy = sys.modules.get("numpy")
+        return numpy is not None and issubclass(subclass, numpy.ndarray)
+
+
+class NDArray(metaclass=_NDArrayType):
+    """
+    Marker standing in for numpy.ndarray in isinstance-checks, without importing numpy.
+    Arrays can only exist once numpy has been imported (by whoever created them), so until then no object is an
+    NDArray, and the recursion system works without numpy.
+    """
+
+
+def numpy():
+    """
+    Imports numpy when it is needed.
+    :return: module | None
+        The numpy-module, or None if numpy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def resolve_type(a_type):
+    """
+    Plain class for use in isinstance-checks, which is faster than typing-aliases and NDArray.
+    NDArray is resolved to numpy.ndarray if numpy has been imported.
+    :param type a_type:
+    :return: type
+    """
+    if a_type is NDArray:
+        numpy = sys.modules.get("numpy")
+        return NDArray if numpy is None else numpy.ndarray
+    return typing.get_origin(a_type) or a_type
@@ -1,10 +1,18 @@
+import copy
 import random
+import sys
+from array import array
+from itertools import chain, islice
 from numbers import Number
 from typing import Tuple, Iterable, Dict, Generator
 
-import numpy as np
-
-from object_recursion.task_base import RecursionTask
+from object_recursion import edge_providers
+from object_recursion.edge_providers import EdgeProvider
+from object_recursion.handlers import HandlerRegistry
+from object_recursion.iteration import IterationPolicy
+from object_recursion.numpy_support import NDArray, resolve_type
+from object_recursion.sampling import AdaptiveSampling
+from object_recursion.task_base import RecursionTask, NodeBatch, EnterHook, FinishHook
 
 
 # TODO: Perhaps make a verbosity system
@@ -15,19 +23,41 @@ class ObjectRecursion:
     # Order of container-types matters!
     ContainerTypes = (Tuple,
                       Dict,
-                      np.ndarray,
+                      NDArray,
                       Iterable)
-    ClassDict = "__dict__"
-    ClassSlots = "__slots__"
-    BaseTerminators = [str, bool, Number, bytes, range, bytearray, Generator, np.ndarray, type(None)]
-
-    def __init__(self, tasks, container_sampling=None, terminate_at=None):
+    ClassDict = edge_providers.ClassDict
+    ClassSlots = edge_providers.ClassSlots
+    DictKey = "dict key"
+    DictValue = "dict value"
+    BaseTerminators = [str, bool, Number, bytes, range, bytearray, Generator, NDArray, type(None)]
+
+    def __init__(self, tasks, container_sampling=None, terminate_at=None, edge_provider="attributes",
+                 handlers=None, iteration_policy=None, batch_size=4096):
+        """
+        :param [RecursionTask] tasks: Tasks to perform on the objects.
+        :param int | str | AdaptiveSampling container_sampling: Sampling of the children of containers.
+            None: Visit all children.
+            int: Visit this many randomly selected children.
+            "adaptive" or AdaptiveSampling: Visit randomly selected children until their types have been stable
+                for a while. Containers which were not fully visited are noted in sampled_containers.
+        :param list terminate_at: Additional types, whose objects should not be recursed into.
+        :param str | EdgeProvider edge_provider: Finds the objects referenced by each object (apart from the children
+            of containers).
+            "attributes": Values of the attribute-dictionary and of the slots of the class.
+            "gc": Everything the garbage collector sees (see GCEdgeProvider).
+        :param HandlerRegistry handlers: Handlers of specific types, which determine the shallow sizes, children and
+            termination of their objects instead of the generic container- and reference-recursion.
+        :param IterationPolicy iteration_policy: Decides which iterables are iterated and how many of their children
+            are visited. Defaults to only iterating materialized containers (lists, tuples, sets, dicts etc.).
+        :param int batch_size: Number of objects delivered in each batch to tasks using the batch-protocol (see
+            RecursionTask.hooks).
+        """
         # Check tasks
         if tasks is None:
             raise ValueError("tasks can not be None.")
 
         # Termination markers
-        _terminate_at = ObjectRecursion.BaseTerminators
+        _terminate_at = list(ObjectRecursion.BaseTerminators)
         if terminate_at is not None:
             if isinstance(terminate_at, (list, tuple)):
                 _terminate_at += list(terminate_at)
@@ -35,6 +65,10 @@ class ObjectRecursion:
                 _terminate_at.append(terminate_at)
         self._terminate_at = tuple(set(_terminate_at))
 
+        # Terminators of the user, which take precedence over handlers
+        self._user_terminate_at = tuple(val for val in self._terminate_at
+                                        if val not in ObjectRecursion.BaseTerminators)
+
         # Fields
         self.container_children = None  # type: dict
         self.container_root_path = None  # type: list
@@ -42,10 +76,29 @@ class ObjectRecursion:
         self.reference_root_path = None  # type: list
         self.objects = None  # type: dict
         self.handled = None  # type: set
+        self.sampled_containers = None  # type: set
+        self.types = None  # type: list
+
+        # Batches of objects for tasks using the batch-protocol
+        self._type_codes = None  # type: dict
+        self._entered = None  # type: NodeBatch
+        self._finished = None  # type: NodeBatch
+        self._active = set()  # type: set
+        self._delivering = False
 
         # Store
         self._tasks = tasks  # type: [RecursionTask]
-        self._sampling = container_sampling
+        self.batch_size = batch_size
+        self._split_tasks()
+        self._sampling = AdaptiveSampling() if container_sampling == "adaptive" else container_sampling
+        if isinstance(edge_provider, str):
+            if edge_provider not in edge_providers.EdgeProviders:
+                raise ValueError(f"Unknown edge_provider: {edge_provider}. "
+                                 f"Use one of {sorted(edge_providers.EdgeProviders)} or an EdgeProvider.")
+            edge_provider = edge_providers.EdgeProviders[edge_provider]()
+        self._edge_provider = edge_provider  # type: EdgeProvider
+        self._handlers = handlers  # type: HandlerRegistry
+        self.iteration_policy = IterationPolicy() if iteration_policy is None else iteration_policy
 
         # Note wanted edges, depending on tasks
         _reference_interests = [a_type for a_type in [ObjectRecursion.ClassDict, ObjectRecursion.ClassSlots]
@@ -55,6 +108,14 @@ class ObjectRecursion:
         self._reference_interests = set(_reference_interests)
         self._interests = set(_interests)
 
+        # Adaptive sampling looks into arrays using their dtype
+        if isinstance(self._sampling, AdaptiveSampling) and NDArray in self._interests:
+            self._terminate_at = tuple(val for val in self._terminate_at if val is not NDArray)
+
+        # Checks of the container-types of interest (resolved to plain classes for each recursion)
+        self._container_checks = [(a_type, a_type) for a_type in ObjectRecursion.ContainerTypes
+                                  if a_type in self._interests]
+
     def _initialize(self):
         self.container_children = dict()
         self.container_root_path = []
@@ -62,6 +123,45 @@ class ObjectRecursion:
         self.reference_root_path = []
         self.objects = dict()
         self.handled = set()
+        self.sampled_containers = set()
+        self.types = []
+        self._type_codes = dict()
+        self._entered = NodeBatch(ids=array("Q"), type_codes=array("I"))
+        self._finished = NodeBatch(ids=array("Q"), type_codes=array("I"))
+        self._active = set()
+        self._delivering = False
+
+    def _split_tasks(self):
+        """
+        Splits the tasks by protocol: Tasks called for each object and tasks receiving batches of objects.
+        """
+        self._object_tasks = [task for task in self._tasks if task.hooks is None]
+        self._enter_batch_tasks = [task for task in self._tasks if task.hooks is not None and EnterHook in task.hooks]
+        self._finish_batch_tasks = [task for task in self._tasks
+                                    if task.hooks is not None and FinishHook in task.hooks]
+        self._batching = bool(self._enter_batch_tasks or self._finish_batch_tasks)
+
+    def _deliver_batches(self):
+        """
+        Delivers the collected batches of entered and finished objects to the tasks using the batch-protocol.
+        Objects recursed by tasks while handling a batch are delivered in the following batches.
+        """
+        if self._delivering:
+            return
+        self._delivering = True
+        try:
+            while self._entered.ids or self._finished.ids:
+                entered, finished = self._entered, self._finished
+                self._entered = NodeBatch(ids=array("Q"), type_codes=array("I"))
+                self._finished = NodeBatch(ids=array("Q"), type_codes=array("I"))
+                if entered.ids:
+                    for task in self._enter_batch_tasks:  # type: RecursionTask
+                        task.enter_batch(entered, recurser=self)
+                if finished.ids:
+                    for task in self._finish_batch_tasks:  # type: RecursionTask
+                        task.finish_batch(finished, recurser=self)
+        finally:
+            self._delivering = False
 
     def print_container(self):
         # TODO: This is a debug method. Delete.
@@ -73,10 +173,31 @@ class ObjectRecursion:
                 string += f"\n     {val}, {self.objects[val]}"
         return string
 
+    def context(self):
+        """
+        A copy of the recurser and its tasks, which holds the state of a single recursion.
+        The configuration (terminators, interests, handlers etc.) is shared with the recurser.
+        :return: ObjectRecursion
+        """
+        context = copy.copy(self)
+        context._tasks = [task.copy() for task in self._tasks]
+        context._split_tasks()
+
+        # isinstance() is faster with plain classes than with typing-aliases and the marker of numpy-arrays
+        context._terminate_at = tuple(resolve_type(val) for val in self._terminate_at)
+        context._user_terminate_at = tuple(resolve_type(val) for val in self._user_terminate_at)
+        context._container_checks = [(resolve_type(a_type), a_type) for _, a_type in self._container_checks]
+        return context
+
     def recurse(self, *args, verbose=False):
         """
         Recurse through objects in args and pass on results.
+        Each call works on its own context (see context()), so the recurser is reentrant and can be reused and shared
+        between threads. The tasks passed to the recurser are never modified.
         """
+        return self.context()._recurse_objects(*args, verbose=verbose)
+
+    def _start(self):
         # Initialize
         self._initialize()
 
@@ -84,6 +205,26 @@ class ObjectRecursion:
         for task in self._tasks:
             task.initialize()
 
+    def _recurse_root(self, obj, obj_id, first=True):
+        """
+        Recurses through one of the objects of a recursion. All objects are finished when this returns.
+        :param obj:
+        :param int obj_id:
+        :param bool first: Whether this is the first object of the recursion.
+        """
+        # Intermediate initializations of tasks
+        if not first:
+            for task in self._tasks:  # type: RecursionTask
+                task.intermediate_initialize()
+
+        # Run on object
+        self._recurse(obj, obj_id=obj_id)
+        if self._batching:
+            self._deliver_batches()
+
+    def _recurse_objects(self, *args, verbose=False):
+        self._start()
+
         # IDs of objects in args
         obj_ids = []
 
@@ -96,17 +237,12 @@ class ObjectRecursion:
             if verbose:
                 print(f"\tObject {obj_nr + 1} / {len(args)}")
 
-            # Intermediate initializations of tasks
-            if obj_nr > 0:
-                for task in self._tasks:  # type: RecursionTask
-                    task.intermediate_initialize()
-
             # Ensure id-consistency
             obj_id = id(obj)
             obj_ids.append(obj_id)
 
             # Run on object
-            self._recurse(obj, obj_id=obj_id)
+            self._recurse_root(obj, obj_id=obj_id, first=obj_nr == 0)
 
             # Stop tasks
             # for task_nr, task in enumerate(self._tasks):  # type: RecursionTask
@@ -120,20 +256,47 @@ class ObjectRecursion:
         # Return results
         return results
 
-    @staticmethod
-    def _get_insides(obj):
-        if isinstance(obj, Dict):
-            insides = list(obj.items())
-        elif isinstance(obj, np.ndarray):
-            insides = obj.ravel()
-        elif isinstance(obj, (Tuple, set)):
-            insides = list(obj)
-        elif isinstance(obj, Iterable):
-            insides = obj
+    def _record_children(self, *, obj, obj_id, is_dict):
+        """
+        Streams the children of a container directly into the graph, without intermediate lists.
+        The children of dictionaries are their keys and values, alternately.
+        :return: array
+            IDs of the children.
+        """
+        objects = self.objects
+        limit = None
+
+        if isinstance(self._sampling, AdaptiveSampling):
+            children, complete = self._sampling.sample(obj, self.iteration_policy)
+        elif isinstance(obj, NDArray):
+            children, complete = obj.flat, True
         else:
-            insides = []
+            children, complete = self.iteration_policy.iterate(obj), True
+            limit = self.iteration_policy.max_elements
 
-        return insides
+        # Keys and values of dictionaries
+        if is_dict:
+            children = chain.from_iterable(children)
+            limit = None if limit is None else 2 * limit
+
+        iterator = iter(children)
+        if limit is not None:
+            children = islice(iterator, limit)
+
+        child_ids = array("Q")
+        for child in children:
+            child_id = id(child)
+            child_ids.append(child_id)
+            objects[child_id] = child
+
+        # Check for children beyond the limit
+        if limit is not None and next(iterator, _exhausted) is not _exhausted:
+            complete = False
+
+        self.container_children[obj_id] = child_ids
+        if not complete:
+            self.sampled_containers.add(obj_id)
+        return child_ids
 
     @staticmethod
     def _ensure_on_stack(path, obj_id):
@@ -147,62 +310,47 @@ class ObjectRecursion:
             self.reference_root_path.pop()
 
     def _recurse_container(self, *, obj, obj_id, a_type):
+        is_dict = a_type is Dict
 
         if obj_id in self.container_children:
-            inside_ids = self.container_children[obj_id]
-            insides = [self.objects[val] for val in inside_ids]
+            child_ids = self.container_children[obj_id]
         else:
-            # Get insides
-            insides = self._get_insides(obj)
-            inside_ids = [id(val) for val in insides]
-            for val_id, val in zip(inside_ids, insides):
-                self.objects[val_id] = val
-
-            self.container_children[obj_id] = inside_ids
+            child_ids = self._record_children(obj=obj, obj_id=obj_id, is_dict=is_dict)
 
         # Note container and object being a parent
         self._ensure_on_stack(path=self.container_root_path, obj_id=obj_id)
 
-        # Check sampling
-        if self._sampling is None:
+        # Check sampling (adaptive samples are already taken)
+        if self._sampling is None or isinstance(self._sampling, AdaptiveSampling):
             # Go through all children
-            for child, child_id in zip(insides, inside_ids):
-                # Don't consider handled objects (avoid loops)
-                if child_id not in self.handled:
-                    self._recurse(obj=child, edge=a_type, parent=obj, obj_id=child_id)
+            positions = range(len(child_ids))
         else:
-            # Go through sample of children
-            sample_ids = random.sample(range(len(inside_ids)), self._sampling)
+            # Go through sample of children (entries of dictionaries)
+            n_entries = len(child_ids) // 2 if is_dict else len(child_ids)
+            entries = random.sample(range(n_entries), min(self._sampling, n_entries))
+            positions = [2 * entry + val for entry in entries for val in (0, 1)] if is_dict else entries
 
-            # Go through container samples
-            for sample_id in sample_ids:
-                child = insides[sample_id]
-                child_id = inside_ids[sample_id]
+        unfinished = len(positions) < len(child_ids)
+        for position in positions:
+            child_id = child_ids[position]
 
-                # Don't consider handled objects (avoid loops)
-                if child_id not in self.handled:
-                    self._recurse(obj=child, edge=a_type, parent=obj, obj_id=child_id)
+            # Don't consider handled objects (avoid loops)
+            if child_id not in self.handled:
+                if is_dict:
+                    edge = ObjectRecursion.DictKey if position % 2 == 0 else ObjectRecursion.DictValue
+                else:
+                    edge = a_type
+                self._recurse(obj=self.objects[child_id], edge=edge, parent=obj, obj_id=child_id)
+            elif child_id in self._active:
+                unfinished = True
+        return unfinished
 
     def _recurse_reference(self, *, obj, obj_id):
-        references = []
-        reference_types = []
-        # reference_ids = []
-
-        # Add references in class-dictionary to references
-        if ObjectRecursion.ClassDict in self._reference_interests:
-            if hasattr(obj, '__dict__'):
-                self._ensure_on_stack(path=self.reference_root_path, obj_id=obj_id)
-                children = list(vars(obj).values())
-                reference_types += [ObjectRecursion.ClassDict] * len(children)
-                references.extend(children)
-
-        # Add references in class-slots to references
-        if ObjectRecursion.ClassSlots in self._reference_interests:
-            if hasattr(obj, '__slots__'):
-                self._ensure_on_stack(path=self.reference_root_path, obj_id=obj_id)
-                children = [getattr(obj, s) for s in obj.__slots__]  # if hasattr(obj, s)
-                reference_types += [ObjectRecursion.ClassSlots] * len(children)
-                references.extend(children)
+        references, reference_types = self._edge_provider.references(obj, self._reference_interests)
+
+        # Note object being a parent
+        if references:
+            self._ensure_on_stack(path=self.reference_root_path, obj_id=obj_id)
 
         # Get reference ids
         reference_ids = [id(val) for val in references]
@@ -218,15 +366,92 @@ class ObjectRecursion:
                 self.objects[child_id] = child
 
         # Recurse
+        unfinished = False
         for child, child_id, reference_type in zip(references, reference_ids, reference_types):
 
             # Don't consider handled objects (avoid loops)
             if child_id not in self.handled:
                 self._recurse(obj=child, edge=reference_type, parent=obj, obj_id=child_id)
+            elif child_id in self._active:
+                unfinished = True
+        return unfinished
+
+    def _recurse_handled(self, *, obj, obj_id, handler):
+        # Children of handled objects are noted as references
+        children = handler.children(obj)
+        child_ids = [id(val) for val in children]
+        self.reference_children[obj_id] = child_ids
+        if children:
+            self._ensure_on_stack(path=self.reference_root_path, obj_id=obj_id)
+
+        for child, child_id in zip(children, child_ids):
+            if child_id not in self.objects:
+                self.objects[child_id] = child
+
+        # Recurse
+        unfinished = False
+        for child, child_id in zip(children, child_ids):
+            if child_id not in self.handled:
+                self._recurse(obj=child, edge=ObjectRecursion.ClassSlots, parent=obj, obj_id=child_id)
+            elif child_id in self._active:
+                unfinished = True
+        return unfinished
+
+    def handler_for(self, obj):
+        """
+        :param obj:
+        :return: TypeHandler | None
+            Handler of the type of the object, if any. Objects terminated by the user have no handler, so they are
+            sized by sys.getsizeof() like other terminated objects.
+        """
+        if self._handlers is None:
+            return None
+        if self._user_terminate_at and isinstance(obj, self._user_terminate_at):
+            return None
+        return self._handlers.lookup(type(obj))
+
+    def shallow_size(self, obj):
+        """
+        :param obj:
+        :return: int
+            Size of the object in Bytes, not including referenced objects.
+        """
+        handler = self.handler_for(obj)
+        if handler is None:
+            return sys.getsizeof(obj)
+        return handler.shallow_size(obj)
 
     def terminate(self, obj):
+        handler = self.handler_for(obj)
+        if handler is not None:
+            return handler.terminate(obj)
         return isinstance(obj, self._terminate_at)
 
+    def children(self, obj):
+        """
+        Objects referenced by an object, as the recursion system sees them, without recording anything.
+        Unlike recurse(), this follows all kinds of edges regardless of the interests of the tasks, and does not
+        sample containers.
+        :param obj:
+        :return: Iterator
+        """
+        handler = self.handler_for(obj)
+        if handler is not None:
+            return iter(() if handler.terminate(obj) else handler.children(obj))
+        if self.terminate(obj):
+            return iter(())
+
+        # Children of containers (keys and values of dictionaries)
+        if isinstance(obj, NDArray):
+            contained = obj.flat
+        else:
+            contained = self.iteration_policy.iterate(obj) or ()
+            if isinstance(obj, Dict):
+                contained = chain.from_iterable(contained)
+
+        references, _ = self._edge_provider.references(obj, {ObjectRecursion.ClassDict, ObjectRecursion.ClassSlots})
+        return chain(contained, references)
+
     def _recurse(self, obj, obj_id, edge=None, parent=None):
         self.handled.add(obj_id)
 
@@ -238,19 +463,38 @@ class ObjectRecursion:
             self.objects[obj_id] = obj
 
         # Perform tasks on nodes
-        for task in self._tasks:  # type: RecursionTask
+        for task in self._object_tasks:  # type: RecursionTask
             task.enter_object(obj=obj, edge=edge, parent=parent, recurser=self)
 
-        # Check termination
-        if not self.terminate(obj):
+        # Note object in batches
+        if self._batching:
+            obj_type = type(obj)
+            type_code = self._type_codes.get(obj_type)
+            if type_code is None:
+                type_code = self._type_codes[obj_type] = len(self.types)
+                self.types.append(obj_type)
+            if self._enter_batch_tasks:
+                self._entered.ids.append(obj_id)
+                self._entered.type_codes.append(type_code)
+            self._active.add(obj_id)
+
+        # Check termination (and note children which are not finished before the object)
+        unfinished = False
+        handler = self.handler_for(obj)
+        if handler is not None:
+            if not handler.terminate(obj) and self._reference_interests:
+                unfinished = self._recurse_handled(obj=obj, obj_id=obj_id, handler=handler)
+
+        elif not self.terminate(obj):
 
             # Containers
-            for a_type in ObjectRecursion.ContainerTypes:
+            for check_type, a_type in self._container_checks:
 
-                # Check if object is type and type is of interest
-                if isinstance(obj, a_type) and a_type in self._interests:
-                    # Handle container
-                    self._recurse_container(obj=obj, obj_id=obj_id, a_type=a_type)
+                # Check if object is type (of interest)
+                if isinstance(obj, check_type):
+                    # Handle container (other iterables are only iterated if allowed by the iteration policy)
+                    if a_type is NDArray or self.iteration_policy.iterable(obj):
+                        unfinished = self._recurse_container(obj=obj, obj_id=obj_id, a_type=a_type)
 
                     # Mutually exclusive - don't check other types
                     break
@@ -259,14 +503,28 @@ class ObjectRecursion:
             if self._reference_interests:
                 # warnings.warn("loop-references are not handled yet", UserWarning)
 
-                self._recurse_reference(obj=obj, obj_id=obj_id)
+                unfinished = self._recurse_reference(obj=obj, obj_id=obj_id) or unfinished
 
         # No longer a parent
         self._ensure_parent_stack_removal(obj_id)
 
         # Finish object
-        for task in self._tasks:  # type: RecursionTask
+        for task in self._object_tasks:  # type: RecursionTask
             task._finish_object(obj_id=obj_id,
                                 edge=edge,
                                 parent=parent,
                                 recurser=self)
+        if self._batching:
+            self._active.discard(obj_id)
+            if self._finish_batch_tasks:
+                self._finished.ids.append(obj_id)
+                self._finished.type_codes.append(type_code)
+
+            # Objects with unfinished children (loops and children which were not visited) are delivered right away,
+            # so tasks conclude them on the same part of the graph as if they were called for each object
+            if unfinished or len(self._finished.ids) >= self.batch_size or len(self._entered.ids) >= self.batch_size:
+                self._deliver_batches()
+
+
+# Marker for exhausted iterators
+_exhausted = object()
@@ -0,0 +1,140 @@
+from object_recursion.handlers import default_handlers
+from object_recursion.numpy_support import numpy
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.tasks import SizeComparisonTask, OverlapMatrix
+
+
+class OverlapTracker:
+    """
+    Memory-overlap between a changing set of objects, like rsize_overlap() but updated incrementally:
+        tracker = OverlapTracker()
+        tracker.add(model1)
+        tracker.add(model2)
+        tracker.remove(model1)
+        tracker.matrix()
+    The tracker keeps the recorded object-graph, the size of each recorded object and the descendants of each
+    tracked object between calls. Adding an object only recurses through objects which are not recorded yet and
+    computes the row and column of the object, while removing an object drops its row and column and forgets the
+    objects which are no longer reachable from any tracked object.
+    Adding objects in some order gives the same matrix as rsize_overlap() on the objects in that order, and removing
+    an object leaves the sizes and overlaps of the other objects unchanged.
+    The tracker holds references to all recorded objects until they are forgotten.
+    """
+    def __init__(self, terminate_at=None, word_size=8, edge_provider="attributes", handlers=default_handlers):
+        """
+        :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+        :param int word_size: Size of a pointer on the used machine.
+        :param str | EdgeProvider edge_provider: How references of objects are found.
+        :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+        """
+        recurser = ObjectRecursion(tasks=[SizeComparisonTask(terminate_at=terminate_at, word_size=word_size)],
+                                   terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+
+        # The recursion of all tracked objects
+        self._context = recurser.context()
+        self._context._start()
+        self._task = self._context._tasks[0]  # type: SizeComparisonTask
+        self._size_task = self._task.tasks[0]
+
+        # IDs of tracked objects (in the order of the matrix), their descendants and rows in the matrix
+        self._root_ids = []  # type: list
+        self._descendants = dict()  # type: dict
+        self._rows = []  # type: list
+
+        # Number of tracked objects reaching each recorded object
+        self._n_roots = dict()  # type: dict
+
+    def __len__(self):
+        return len(self._root_ids)
+
+    def __contains__(self, obj):
+        return id(obj) in self._descendants
+
+    @property
+    def roots(self):
+        """
+        Tracked objects, in the order of the rows and columns of the matrix.
+        :return: list
+        """
+        return [self._context.objects[obj_id] for obj_id in self._root_ids]
+
+    def add(self, obj):
+        """
+        Starts tracking an object.
+        :param obj:
+        :return: int
+            Row (and column) of the object in the matrix.
+        """
+        obj_id = id(obj)
+        if obj_id in self._descendants:
+            raise ValueError("Object is already tracked.")
+        context = self._context
+        task = self._task
+
+        # Recurse through the objects which are not recorded yet (objects are counted once per tracked object)
+        context._recurse_root(obj, obj_id=obj_id, first=False)
+        descendants = task._flatten_trees(obj_id, [context.container_children, context.reference_children])
+        for member_id in descendants | {obj_id}:
+            self._n_roots[member_id] = self._n_roots.get(member_id, 0) + 1
+
+        # Overlaps with the tracked objects
+        row = []
+        for other_id, other_row in zip(self._root_ids, self._rows):
+            row.append(task.shared_size(descendants, self._descendants[other_id], recurser=context,
+                                        size_task=self._size_task))
+            other_row.append(task.shared_size(self._descendants[other_id], descendants, recurser=context,
+                                              size_task=self._size_task))
+        row.append(task.get_size(obj_id=obj_id, size_task=self._size_task))
+
+        self._root_ids.append(obj_id)
+        self._descendants[obj_id] = descendants
+        self._rows.append(row)
+        return len(self._rows) - 1
+
+    def remove(self, obj):
+        """
+        Stops tracking an object.
+        :param obj:
+        """
+        obj_id = id(obj)
+        if obj_id not in self._descendants:
+            raise ValueError("Object is not tracked.")
+        nr = self._root_ids.index(obj_id)
+        del self._root_ids[nr]
+        del self._rows[nr]
+        for row in self._rows:
+            del row[nr]
+
+        # Forget objects which are not reachable from any tracked object
+        forgotten = []
+        for member_id in self._descendants.pop(obj_id) | {obj_id}:
+            n_roots = self._n_roots[member_id] - 1
+            if n_roots:
+                self._n_roots[member_id] = n_roots
+            else:
+                del self._n_roots[member_id]
+                forgotten.append(member_id)
+        self._forget(forgotten)
+
+    def _forget(self, obj_ids):
+        context = self._context
+        conclusions = self._size_task._object_conclusion
+        for obj_id in obj_ids:
+            context.objects.pop(obj_id, None)
+            context.container_children.pop(obj_id, None)
+            context.reference_children.pop(obj_id, None)
+            context.handled.discard(obj_id)
+            context.sampled_containers.discard(obj_id)
+            conclusions.pop(obj_id, None)
+
+    def matrix(self):
+        """
+        :return: np.ndarray | OverlapMatrix
+            Matrix of sizes, where the diagonal holds the size of each tracked object and the other elements the
+            memory-overlap of two objects. An OverlapMatrix if numpy is not installed.
+        """
+        np = numpy()
+        if np is None:
+            return OverlapMatrix([list(row) for row in self._rows])
+        n_roots = len(self._rows)
+        return np.array(self._rows, dtype=float).reshape((n_roots, n_roots))
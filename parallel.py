@@ -0,0 +1,290 @@
+"""
+Traversal of object-graphs with several threads, for free-threaded builds of CPython.
+Run "python -m object_recursion.parallel" for a benchmark of the scaling with the number of threads.
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+# Result of a parallel traversal
+Traversal = namedtuple("Traversal", "size, n_objects, by_type, n_threads")
+
+# Number of shards of the visited objects (each with its own lock)
+_n_shards = 64
+
+# Objects per thread in the frontier before it is partitioned between the threads
+_seed_factor = 16
+
+# Seconds an idle thread waits before looking for work again
+_idle_wait = 50e-6
+
+
+def free_threaded():
+    """
+    :return: bool
+        Whether the interpreter runs without the global interpreter lock, so threads can traverse in parallel.
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+class VisitedSet:
+    """
+    IDs of the objects claimed by the threads of a traversal. IDs are split between shards with a lock each, so
+    threads claiming different objects rarely wait for each other.
+    """
+    def __init__(self, n_shards=_n_shards):
+        """
+        :param int n_shards: Number of shards.
+        """
+        self._n_shards = n_shards
+        self._sets = [set() for _ in range(n_shards)]
+        self._locks = [threading.Lock() for _ in range(n_shards)]
+
+    def claim(self, obj_id):
+        """
+        :param int obj_id:
+        :return: bool
+            Whether the object was not claimed before, in which case it is now claimed by the caller.
+        """
+        # Objects are aligned to 16 Bytes, so the lowest bits of IDs are always the same
+        shard = (obj_id >> 4) % self._n_shards
+        visited = self._sets[shard]
+        with self._locks[shard]:
+            if obj_id in visited:
+                return False
+            visited.add(obj_id)
+            return True
+
+    def __len__(self):
+        return sum(len(visited) for visited in self._sets)
+
+
+class _Worker:
+    """
+    Deque of objects to visit and the accumulated sizes of the objects visited by one thread.
+    """
+    def __init__(self):
+        self.objects = deque()
+        self.size = 0
+        self.n_objects = 0
+        self.by_type = dict()  # type: dict
+        self.atoms = dict()  # type: dict
+
+
+class ParallelTraversal:
+    """
+    Sums the shallow sizes of all objects reachable from some roots (each object is counted once), in total and by
+    type, using several threads:
+        - The frontier is expanded until it holds a number of objects per thread, and then partitioned between the
+          threads.
+        - Each thread visits the objects of its own deque (depth-first) and claims the children in a shared
+          VisitedSet before adding them to its deque, so no object is visited twice.
+        - Threads without work steal objects from the other end of the deques of other threads.
+        - The sizes of each thread are accumulated separately and merged at the end.
+    On builds of CPython with the global interpreter lock, threads can not run in parallel, so the traversal
+    transparently runs in the calling thread without locks. The sizes do not depend on the number of threads.
+    """
+    def __init__(self, recurser, n_threads=None):
+        """
+        :param ObjectRecursion recurser: Determines the children and shallow sizes of objects.
+        :param int n_threads: Number of threads on free-threaded builds. Defaults to the number of CPUs.
+        """
+        self.recurser = recurser
+        self.n_threads = n_threads
+
+        self._context = None  # type: ObjectRecursion
+        self._workers = None  # type: list
+        self._claim = None
+        self._lock = threading.Lock()
+        self._n_idle = 0
+        self._done = False
+        self._error = None  # type: BaseException
+
+    def _threads(self):
+        if not free_threaded():
+            return 1
+        return max(1, self.n_threads or os.cpu_count() or 1)
+
+    def _visit(self, worker, obj):
+        """
+        Accumulates the size of an object and claims its children.
+        """
+        recurser = self._context
+        obj_type = type(obj)
+
+        # Most objects are unhandled and terminal (fx. strings and numbers), which is decided once per type
+        atom = worker.atoms.get(obj_type)
+        if atom is None:
+            atom = worker.atoms[obj_type] = recurser.handler_for(obj) is None and recurser.terminate(obj)
+        obj_size = sys.getsizeof(obj) if atom else recurser.shallow_size(obj)
+        worker.size += obj_size
+        worker.n_objects += 1
+        name = "None" if obj is None else obj_type.__name__
+        worker.by_type[name] = worker.by_type.get(name, 0) + obj_size
+
+        if not atom:
+            claim = self._claim
+            objects = worker.objects
+            for child in recurser.children(obj):
+                if claim(id(child)):
+                    objects.append(child)
+
+    def _steal(self, nr):
+        workers = self._workers
+        for offset in range(1, len(workers)):
+            try:
+                return workers[(nr + offset) % len(workers)].objects.popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _work(self, nr):
+        """
+        Visits objects until all threads are out of work. A thread only adds objects to its own deque, so when all
+        threads are idle (their deques are empty and they are not visiting), the traversal is done.
+        """
+        worker = self._workers[nr]
+        objects = worker.objects
+        try:
+            while True:
+                # Own objects, newest first, then objects stolen from other threads, oldest first
+                while objects:
+                    self._visit(worker, objects.pop())
+                obj = self._steal(nr)
+                if obj is not None:
+                    self._visit(worker, obj)
+                    continue
+
+                # Wait until other threads have objects, or everybody is idle
+                with self._lock:
+                    self._n_idle += 1
+                    if self._n_idle == len(self._workers):
+                        self._done = True
+                while True:
+                    if self._done:
+                        return
+                    time.sleep(_idle_wait)
+                    if any(other.objects for other in self._workers):
+                        with self._lock:
+                            if self._done:
+                                return
+                            self._n_idle -= 1
+                        break
+        except BaseException as error:
+            with self._lock:
+                self._error = error
+                self._done = True
+
+    def _seed(self, roots):
+        # Expand the frontier (breadth-first) in the calling thread, and deal it out to the threads
+        first = self._workers[0]
+        for root in roots:
+            if self._claim(id(root)):
+                first.objects.append(root)
+        target = _seed_factor * len(self._workers)
+        while first.objects and len(first.objects) < target:
+            self._visit(first, first.objects.popleft())
+        frontier = list(first.objects)
+        first.objects.clear()
+        for position, obj in enumerate(frontier):
+            self._workers[position % len(self._workers)].objects.append(obj)
+
+    def run(self, *roots):
+        """
+        :param roots: Objects to traverse.
+        :return: Traversal
+        """
+        n_threads = self._threads()
+        self._context = self.recurser.context()
+        self._workers = [_Worker() for _ in range(n_threads)]
+        self._n_idle = 0
+        self._done = False
+        self._error = None
+
+        # A plain set is enough for a single thread
+        if n_threads == 1:
+            visited = set()
+
+            def claim(obj_id):
+                if obj_id in visited:
+                    return False
+                visited.add(obj_id)
+                return True
+            self._claim = claim
+        else:
+            self._claim = VisitedSet().claim
+
+        try:
+            self._seed(roots)
+            threads = [threading.Thread(target=self._work, args=(nr,), name=f"object_recursion-{nr}", daemon=True)
+                       for nr in range(1, n_threads)]
+            for thread in threads:
+                thread.start()
+            self._work(0)
+            for thread in threads:
+                thread.join()
+            if self._error is not None:
+                raise self._error
+
+            # Merge the sizes of the threads
+            by_type = dict()
+            for worker in self._workers:
+                for name, size in worker.by_type.items():
+                    by_type[name] = by_type.get(name, 0) + size
+            return Traversal(size=sum(worker.size for worker in self._workers),
+                             n_objects=sum(worker.n_objects for worker in self._workers),
+                             by_type=dict(sorted(by_type.items(), key=lambda item: (-item[1], item[0]))),
+                             n_threads=n_threads)
+        finally:
+            self._context = None
+            self._workers = None
+            self._claim = None
+
+
+if __name__ == "__main__":
+    from object_recursion.handlers import default_handlers
+    from object_recursion.methods import rsize_by_type
+    from object_recursion.object_recursion import ObjectRecursion
+
+    class Record:
+        def __init__(self, nr):
+            self.name = f"record-{nr}"
+            self.values = [float(nr + val) for val in range(8)]
+            self.tags = {"even" if nr % 2 else "odd", str(nr % 100)}
+
+    n_records = 100000
+    records = {f"key-{nr}": Record(nr) for nr in range(n_records)}
+    the_recurser = ObjectRecursion(tasks=[], handlers=default_handlers)
+
+    print(f"Free-threaded: {free_threaded()}, CPUs: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    expected = sum(rsize_by_type(records).values())
+    print(f"rsize_by_type() of a dictionary of {n_records} objects: {expected} Bytes in "
+          f"{time.perf_counter() - start:.2f}s")
+
+    # Threads only run in parallel without the global interpreter lock
+    if not free_threaded():
+        start = time.perf_counter()
+        traversal = ParallelTraversal(the_recurser).run(records)
+        print(f"Single-thread traversal: {traversal.n_objects} objects, {traversal.size} Bytes in "
+              f"{time.perf_counter() - start:.2f}s")
+        print("The global interpreter lock is enabled, so the scaling with the number of threads can only be measured "
+              "on a free-threaded build of CPython (fx. python3.13t).")
+        sys.exit(0)
+
+    print(f"{'Threads':>8} {'Seconds':>8} {'Speedup':>8} {'Objects':>9} {'Bytes':>11}")
+    baseline = None
+    for requested in [1, 2, 4, 8, 16, 32]:
+        if requested > (os.cpu_count() or 1):
+            break
+        start = time.perf_counter()
+        traversal = ParallelTraversal(the_recurser, n_threads=requested).run(records)
+        seconds = time.perf_counter() - start
+        baseline = seconds if baseline is None else baseline
+        assert traversal.size == expected, "The size depends on the number of threads"
+        print(f"{traversal.n_threads:>8} {seconds:>8.2f} {baseline / seconds:>7.2f}x {traversal.n_objects:>9} "
+              f"{traversal.size:>11}")
@@ -0,0 +1,158 @@
+from collections import namedtuple, deque
+from types import CellType, FunctionType, MethodType
+from typing import Dict
+
+# An object found by a search and the path to it
+ReferencePath = namedtuple("ReferencePath", "path, obj")
+
+# Integers with more bits are not represented in labels
+_max_key_bits = 1024
+
+# Marker for keys which are not in a dictionary
+_missing = object()
+
+
+def _key_repr(key):
+    """
+    Representation of a key or element in a label. The representation of integers with more than 4300 digits is not
+    possible, so long integers are described by their number of bits.
+    """
+    if type(key) is int and key.bit_length() > _max_key_bits:
+        return f"<int of {key.bit_length()} bits>"
+    return repr(key)
+
+
+def edge_label(parent, child, key=None):
+    """
+    Describes how child is referenced from parent, in Python-syntax.
+    Fx. "[3]" for list-elements, "['key']" for dictionary-values and ".name" for attributes. Closure-cells of functions
+    are named by their variable, fx. ".<closure buf>", and the content of a cell adds nothing to the label.
+    Containers are searched through their built-in type, so no code of subclasses (fx. __getitem__() or __missing__())
+    is run.
+    :param parent: Referencing object.
+    :param child: Referenced object.
+    :param key: Index or key of child in parent (for lists, tuples and dictionaries), if known, which avoids searching
+        large parents.
+    :return: str
+    """
+    if key is not None and type(parent) in (dict, list, tuple):
+        try:
+            value = dict.get(parent, key, _missing) if type(parent) is dict else parent[key]
+            if value is child:
+                return f"[{_key_repr(key)}]"
+        except (IndexError, TypeError):
+            pass
+
+    # Dictionaries
+    if isinstance(parent, Dict):
+        for key, value in dict.items(parent):
+            if value is child:
+                return f"[{_key_repr(key)}]"
+        for key in dict.keys(parent):
+            if key is child:
+                return f".keys()[{_key_repr(key)}]"
+
+    # Sequences and sets
+    elif isinstance(parent, (list, tuple)):
+        for index, value in enumerate((list.__iter__ if isinstance(parent, list) else tuple.__iter__)(parent)):
+            if value is child:
+                return f"[{index}]"
+    elif isinstance(parent, (set, frozenset)):
+        if any(value is child for value in (set.__iter__ if isinstance(parent, set) else frozenset.__iter__)(parent)):
+            return f"{{{_key_repr(child)}}}"
+
+    # Functions, closure-cells and methods
+    elif isinstance(parent, FunctionType):
+        for name, cell in zip(parent.__code__.co_freevars, parent.__closure__ or ()):
+            if cell is child:
+                return f".<closure {name}>"
+        for name in ("__defaults__", "__kwdefaults__"):
+            if getattr(parent, name) is child:
+                return f".{name}"
+    elif isinstance(parent, CellType):
+        try:
+            if parent.cell_contents is child:
+                return ""
+        except ValueError:
+            pass
+    elif isinstance(parent, MethodType):
+        for name in ("__self__", "__func__"):
+            if getattr(parent, name) is child:
+                return f".{name}"
+
+    # Attributes
+    if hasattr(parent, "__dict__"):
+        for name, value in vars(parent).items():
+            if value is child:
+                return f".{name}"
+    for cls in type(parent).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if getattr(parent, name, None) is child:
+                return f".{name}"
+
+    return f"->{type(child).__name__}"
+
+
+def render_path(objects, keys=None):
+    """
+    Renders a path of objects, where each object references the next.
+    :param list objects: Objects on the path, starting with the root.
+    :param list keys: Index or key of each object in the object before it (None where not known).
+    :return: str
+    """
+    keys = [None] * (len(objects) - 1) if keys is None else keys
+    return "".join([edge_label(parent, child, key=key) for parent, child, key in zip(objects[:-1], objects[1:], keys)])
+
+
+def shortest_paths(recurser, root, predicate, limit=None):
+    """
+    Breadth-first search for objects referenced (directly or indirectly) by root and satisfying a predicate.
+    Only the parent of each visited object is remembered, and the search stops as soon as limit objects are found.
+    :param ObjectRecursion recurser: Determines the children of objects.
+    :param root: Object to search from.
+    :param callable predicate: Function taking an object and returning whether it is wanted.
+    :param int limit: Maximum number of objects to find. None finds all.
+    :return: [ReferencePath]
+        The objects found, in the order of their distance from root.
+    """
+    found = []
+    if limit is not None and limit <= 0:
+        return found
+
+    # Visited objects and the ID of their parents (no tuples, which would be tracked by the garbage collector)
+    objects = {id(root): root}  # type: dict
+    parents = {id(root): None}  # type: dict
+    queue = deque([root])
+
+    # Objects are checked when discovered, so the search stops as early as possible
+    if predicate(root):
+        found.append(ReferencePath(path="", obj=root))
+    while queue and (limit is None or len(found) < limit):
+        obj = queue.popleft()
+        obj_id = id(obj)
+        for child in recurser.children(obj):
+            child_id = id(child)
+            if child_id in parents:
+                continue
+            objects[child_id] = child
+            parents[child_id] = obj_id
+            queue.append(child)
+
+            if predicate(child):
+                found.append(ReferencePath(path=render_path(_path_objects(objects, parents, child_id)), obj=child))
+                if limit is not None and len(found) >= limit:
+                    break
+
+    return found
+
+
+def _path_objects(objects, parents, obj_id):
+    """
+    Objects from the root of a search to an object, following the parents.
+    """
+    path = []
+    while obj_id is not None:
+        path.append(objects[obj_id])
+        obj_id = parents[obj_id]
+    return path[::-1]
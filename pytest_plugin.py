@@ -0,0 +1,199 @@
+"""
+pytest-plugin failing tests when the memory-consumption of data structures regresses.
+Enable it with "pytest -p object_recursion.pytest_plugin" or in conftest.py:
+    pytest_plugins = ["object_recursion.pytest_plugin"]
+"""
+import json
+import os
+from collections import namedtuple
+
+import pytest
+
+from object_recursion.handlers import default_handlers
+from object_recursion.iteration import IterationPolicy
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.tasks import SizeTask, TypeSizeTask
+
+# Size of an object and the Bytes of each type referenced by it
+Measurement = namedtuple("Measurement", "size, types")
+
+# File of stored budgets, relative to the root directory of the tests
+_default_budget_file = ".rsize-budgets.json"
+
+# Number of types listed in failure-reports
+_max_report_types = 10
+
+
+def measure(obj, terminate_at=None, edge_provider="attributes", handlers=default_handlers):
+    """
+    Measures an object like rsize() and rsize_by_type() in one recursion. Containers are never sampled and sets are
+    traversed in sorted order, so measurements are reproducible across runs.
+    :param obj: Object to measure.
+    :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+    :param str | EdgeProvider edge_provider: How references of objects are found.
+    :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+    :return: Measurement
+    """
+    recurser = ObjectRecursion(tasks=[SizeTask(terminate_at=terminate_at), TypeSizeTask(terminate_at=terminate_at)],
+                               terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers,
+                               iteration_policy=IterationPolicy(ordered=True))
+    sizes, type_sizes = recurser.recurse(obj)
+    return Measurement(size=sizes[0], types=type_sizes[0])
+
+
+class BudgetFile:
+    """
+    Budgets of measurements stored in a JSON-file, as snapshots of the size and the Bytes of each type.
+    """
+    def __init__(self, path):
+        """
+        :param str path: Path of the file.
+        """
+        self.path = path
+        self.changed = False
+        self._budgets = dict()
+        if os.path.exists(path):
+            with open(path) as file:
+                self._budgets = json.load(file)
+
+    def get(self, key):
+        """
+        :param str key: Name of budget.
+        :return: Measurement | None
+        """
+        budget = self._budgets.get(key)
+        if budget is None:
+            return None
+        return Measurement(size=budget["size"], types=budget["types"])
+
+    def set(self, key, measurement):
+        """
+        :param str key: Name of budget.
+        :param Measurement measurement:
+        """
+        self._budgets[key] = dict(size=measurement.size, types=measurement.types)
+        self.changed = True
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump(self._budgets, file, indent=1, sort_keys=True)
+            file.write("\n")
+        self.changed = False
+
+
+def type_deltas(measurement, budget):
+    """
+    :param Measurement measurement:
+    :param Measurement budget:
+    :return: list
+        (type-name, measured Bytes, budgeted Bytes) of the types whose Bytes changed, largest increase first.
+    """
+    names = set(measurement.types) | set(budget.types)
+    deltas = [(name, measurement.types.get(name, 0), budget.types.get(name, 0)) for name in names]
+    deltas = [val for val in deltas if val[1] != val[2]]
+    return sorted(deltas, key=lambda val: (val[2] - val[1], val[0]))
+
+
+def failure_report(key, measurement, limit, budget=None):
+    """
+    :param str key: Name of the measurement.
+    :param Measurement measurement:
+    :param int limit: Exceeded number of Bytes.
+    :param Measurement budget: Stored snapshot, whose types are compared to the measurement.
+    :return: str
+    """
+    excess = measurement.size - limit
+    relative = f" ({excess / limit:.1%})" if limit else ""
+    lines = [f"rsize of {key} is {measurement.size} Bytes, exceeding the budget of {limit} Bytes by {excess} Bytes"
+             f"{relative}."]
+
+    if budget is not None:
+        deltas = type_deltas(measurement, budget)
+        lines.append(f"Changes per type since the stored snapshot ({budget.size} Bytes):")
+        lines.extend(f"    {name:<24} {measured - budgeted:>+12} ({budgeted} -> {measured})"
+                     for name, measured, budgeted in deltas[:_max_report_types])
+        if len(deltas) > _max_report_types:
+            lines.append(f"    ... ({len(deltas) - _max_report_types} more types)")
+    else:
+        lines.append("Bytes per type:")
+        lines.extend(f"    {name:<24} {size:>12}" for name, size in list(measurement.types.items())[:_max_report_types])
+
+    return "\n".join(lines)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("rsize", "memory budgets (object_recursion)")
+    group.addoption("--rsize-budgets", default=None,
+                    help=f"File of stored memory budgets (defaults to {_default_budget_file} in the root directory).")
+    group.addoption("--rsize-update", action="store_true", default=False,
+                    help="Store the measured sizes as memory budgets instead of checking them.")
+    group.addoption("--rsize-tolerance", type=float, default=0.0,
+                    help="Fraction by which measured sizes may exceed the stored budgets.")
+
+
+@pytest.fixture(scope="session")
+def rsize_budgets(request):
+    """
+    Stored memory budgets. Changed budgets are written when the session ends.
+    """
+    config = request.config
+    path = config.getoption("--rsize-budgets") or os.path.join(str(config.rootpath), _default_budget_file)
+    budgets = BudgetFile(path)
+    yield budgets
+    if budgets.changed:
+        budgets.save()
+
+
+@pytest.fixture
+def assert_rsize(request, rsize_budgets):
+    """
+    Asserts the memory-consumption of an object:
+        assert_rsize(obj, max_bytes=1000000)        # Fixed budget
+        assert_rsize(obj)                           # Budget stored in the budget-file (with --rsize-update)
+    Stored budgets are named by the test (and the name given, for several budgets in a test). Failures list the
+    changes per type since the stored snapshot.
+    """
+    config = request.config
+    update = config.getoption("--rsize-update")
+    tolerance = config.getoption("--rsize-tolerance")
+    n_calls = [0]
+
+    def check(obj, max_bytes=None, name=None, terminate_at=None, edge_provider="attributes",
+              handlers=default_handlers):
+        """
+        :param obj: Object to measure.
+        :param int max_bytes: Maximum size in Bytes. None uses the stored budget.
+        :param str name: Name of the budget within the test. Defaults to the number of the call.
+        :param list terminate_at: Objects whose sizes should be directly determined using sys.getsizeof().
+        :param str | EdgeProvider edge_provider: How references of objects are found.
+        :param HandlerRegistry handlers: Handlers which size and recurse objects of specific types by themselves.
+        :return: int
+            Measured size in Bytes.
+        """
+        key = request.node.nodeid
+        if name is not None:
+            key = f"{key}::{name}"
+        elif n_calls[0]:
+            key = f"{key}::{n_calls[0]}"
+        n_calls[0] += 1
+
+        measurement = measure(obj, terminate_at=terminate_at, edge_provider=edge_provider, handlers=handlers)
+        budget = rsize_budgets.get(key)
+
+        if max_bytes is not None:
+            if measurement.size > max_bytes:
+                pytest.fail(failure_report(key=key, measurement=measurement, limit=max_bytes, budget=budget),
+                            pytrace=False)
+        elif update:
+            rsize_budgets.set(key, measurement)
+        elif budget is None:
+            pytest.fail(f"No stored memory budget for {key} in {rsize_budgets.path}. "
+                        f"Run pytest with --rsize-update to store the measured size ({measurement.size} Bytes).",
+                        pytrace=False)
+        elif measurement.size > budget.size * (1 + tolerance):
+            pytest.fail(failure_report(key=key, measurement=measurement, limit=budget.size, budget=budget),
+                        pytrace=False)
+
+        return measurement.size
+
+    return check
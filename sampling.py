@@ -0,0 +1,140 @@
+import random
+from collections.abc import Sized
+from itertools import islice
+from typing import Dict, Tuple
+
+from object_recursion.iteration import IterationPolicy
+from object_recursion.numpy_support import NDArray
+
+
+class AdaptiveSampling:
+    """
+    Container sampling which stops early, once the types of the sampled children have been stable for a while.
+    Children are drawn at random positions and in chunks, through the iteration policy of the recursion system.
+    Containers whose children were not all visited are noted as sampled by the recursion system.
+    """
+    def __init__(self, chunk_size=64, confidence_window=512, max_samples=None, seed=None):
+        """
+        :param int chunk_size: Number of children drawn at a time.
+        :param int confidence_window: Sampling stops when this many consecutive children have not revealed any new
+            types. Containers with no more than this many children are not sampled, but fully visited.
+        :param int max_samples: Optional hard limit on the number of children drawn from a container.
+        :param int seed: Seed for the random order of children, for reproducible results.
+        """
+        self.chunk_size = chunk_size
+        self.confidence_window = confidence_window
+        self.max_samples = max_samples
+        self._random = random.Random(seed)
+
+    def _stable(self, n_samples, since_new_type):
+        if since_new_type >= self.confidence_window:
+            return True
+        return self.max_samples is not None and n_samples >= self.max_samples
+
+    def _sample_positions(self, length, children_at, pairs=False):
+        """
+        Draws random positions of the children of a container in chunks, until the types are stable.
+        :param int length: Number of children.
+        :param callable children_at: Function taking sorted positions and returning the children at the positions.
+        :param bool pairs: Whether the children are key-value pairs.
+        """
+        samples = []
+        drawn = set()
+        types = set()
+        since_new_type = 0
+        remaining = None
+
+        while len(drawn) < length and not self._stable(len(samples), since_new_type):
+            # Random draws mostly hit drawn positions when most have been drawn, so take the rest in order
+            if remaining is None and len(drawn) > length // 2:
+                remaining = iter([position for position in range(length) if position not in drawn])
+            if remaining is not None:
+                positions = list(islice(remaining, self.chunk_size))
+            else:
+                positions = sorted({self._random.randrange(length) for _ in range(self.chunk_size)}.difference(drawn))
+
+            drawn.update(positions)
+            for child in children_at(positions):
+                samples.append(child)
+
+                # Key-value pairs are distinguished by the types of both key and value
+                child_type = (type(child[0]), type(child[1])) if pairs else type(child)
+                if child_type in types:
+                    since_new_type += 1
+                else:
+                    types.add(child_type)
+                    since_new_type = 0
+
+        return samples, len(drawn) == length
+
+    def _sample_indexable(self, obj, length, get_item):
+        """
+        Draws random indices of a sequence in chunks.
+        :param callable get_item: Function taking the sequence and an index and returning the child at the index.
+        """
+        return self._sample_positions(length, lambda positions: [get_item(obj, index) for index in positions])
+
+    def _sample_iterable(self, iterate, length, pairs=False):
+        """
+        Draws random positions of a container without random access (fx. dictionaries and sets) in chunks. Each chunk
+        is taken in a single pass of a new iterator, which skips to the drawn positions without visiting the children
+        in between.
+        :param callable iterate: Function returning a new iterator over the children of the container.
+        """
+        def children_at(positions):
+            children = []
+            iterator = iterate()
+            previous = -1
+            for position in positions:
+                child = next(islice(iterator, position - previous - 1, None), _exhausted)
+                if child is _exhausted:
+                    break
+                children.append(child)
+                previous = position
+            return children
+
+        return self._sample_positions(length, children_at, pairs=pairs)
+
+    def _sample_numpy(self, obj):
+        """
+        All elements of an array with a non-object dtype has the same type, so a single element represents all.
+        Elements are accessed through the flat iterator, so the array is never copied.
+        """
+        if obj.size == 0:
+            return [], True
+        if obj.dtype != object:
+            return [obj.flat[0]], True
+        flat = obj.flat
+        return self._sample_indexable(flat, obj.size, get_item=lambda _, index: flat[index])
+
+    def sample(self, obj, iteration_policy=None):
+        """
+        Samples the children of a container.
+        :param obj: Container.
+        :param IterationPolicy iteration_policy: Iteration of the container. Defaults to only iterating materialized
+            containers, using the iteration of the built-in type.
+        :return: (list, bool)
+            The sampled children (key-value pairs for dictionaries) and whether all children were visited.
+        """
+        if isinstance(obj, NDArray):
+            return self._sample_numpy(obj)
+
+        # Iterables without a length may be consumed or be infinite, so they are not iterated
+        iteration_policy = IterationPolicy() if iteration_policy is None else iteration_policy
+        if not isinstance(obj, Sized) or not iteration_policy.iterable(obj):
+            return [], False
+
+        length = len(obj)
+
+        # The positions of tuples are part of their type, and small containers are cheap to visit
+        if isinstance(obj, Tuple) or length <= self.confidence_window:
+            return list(iteration_policy.iterate(obj)), True
+
+        # Lists are indexed like the built-in type (without running code of subclasses)
+        if isinstance(obj, list):
+            return self._sample_indexable(obj, length, get_item=list.__getitem__)
+        return self._sample_iterable(lambda: iteration_policy.iterate(obj), length, pairs=isinstance(obj, Dict))
+
+
+# Marker for exhausted iterators
+_exhausted = object()
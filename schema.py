@@ -0,0 +1,247 @@
+import random
+from array import array
+from collections import namedtuple
+from collections.abc import Hashable, Sequence
+from itertools import islice
+
+# Inferred schema of a field of records
+FieldSchema = namedtuple("FieldSchema", "name, type, types, nullable, cardinality, count")
+
+# A column of records in compact form
+Column = namedtuple("Column", "kind, values, categories, nulls")
+
+# Result of converting records to columns
+Compaction = namedtuple("Compaction", "columns, size_before, size_after, savings")
+
+# Array type-codes of fields with a single numeric type (booleans are stored as flags, which are 0 or 1)
+_typecodes = {"bool": "b", "int": "q", "float": "d"}
+
+
+def record_fields(record):
+    """
+    Names and values of the fields of a record, which is either a dictionary, a named tuple or an object with
+    attributes (in its attribute-dictionary or slots).
+    :param record:
+    :return: list
+        (name, value)-pairs.
+    """
+    if isinstance(record, dict):
+        return list(record.items())
+    if isinstance(record, tuple) and hasattr(record, "_fields"):
+        return list(zip(record._fields, record))
+
+    fields = list(vars(record).items()) if hasattr(record, "__dict__") else []
+    for cls in type(record).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(record, name):
+                fields.append((name, getattr(record, name)))
+    return fields
+
+
+class _FieldCounter:
+    """
+    Counts the types and distinct values of a field. Distinct values are only tracked up to a limit.
+    """
+    def __init__(self, max_cardinality):
+        self.max_cardinality = max_cardinality
+        self.types = dict()  # type: dict
+        self.count = 0
+        self.nulls = 0
+        self.values = set()  # type: set
+        self.high_cardinality = False
+
+    def add(self, value):
+        if value is None:
+            self.nulls += 1
+            return
+        self.count += 1
+        value_type = type(value)
+        self.types[value_type] = self.types.get(value_type, 0) + 1
+
+        if not self.high_cardinality:
+            if isinstance(value, Hashable):
+                self.values.add((value_type, value))
+                if len(self.values) > self.max_cardinality:
+                    self.high_cardinality = True
+                    self.values = set()
+            else:
+                self.high_cardinality = True
+                self.values = set()
+
+
+class RecordSchema:
+    """
+    Schema of a collection of records with a fixed shape (fx. a list of dictionaries or of small objects), with the
+    types, nullability and cardinality of each field. The schema converts the records to a compact columnar form.
+    """
+    def __init__(self, fields, n_records, n_sampled):
+        """
+        :param dict fields: FieldSchema of each field name.
+        :param int n_records: Number of records.
+        :param int n_sampled: Number of records the schema is inferred from.
+        """
+        self.fields = fields
+        self.n_records = n_records
+        self.n_sampled = n_sampled
+
+    @property
+    def sampled(self):
+        return self.n_sampled < self.n_records
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}: {field.type}" for name, field in self.fields.items())
+        return f"{'~' if self.sampled else ''}{{{fields}}}"
+
+    @classmethod
+    def infer(cls, records, sample=None, max_cardinality=65536, seed=None):
+        """
+        Infers the schema of records in one pass.
+        :param records: Collection of records.
+        :param int sample: Number of randomly selected records to infer the schema from. None uses all records.
+        :param int max_cardinality: Fields with more distinct values have cardinality None.
+        :param int seed: Seed of the sampling.
+        :return: RecordSchema
+        """
+        n_records = len(records)
+        if sample is not None and sample < n_records:
+            if isinstance(records, Sequence):
+                chosen = (records[nr] for nr in sorted(random.Random(seed).sample(range(n_records), sample)))
+            else:
+                chosen = islice(records, sample)
+        else:
+            chosen = records
+
+        # Count field values
+        counters = dict()
+        n_sampled = 0
+        for record in chosen:
+            n_sampled += 1
+            for name, value in record_fields(record):
+                counter = counters.get(name)
+                if counter is None:
+                    counter = counters[name] = _FieldCounter(max_cardinality=max_cardinality)
+                counter.add(value)
+
+        # Fields missing from records are null
+        fields = dict()
+        for name, counter in counters.items():
+            nullable = counter.nulls > 0 or counter.count + counter.nulls < n_sampled
+            types = dict(sorted(((val.__name__, count) for val, count in counter.types.items()),
+                                key=lambda item: (-item[1], item[0])))
+            type_string = "|".join(list(types) + (["None"] if nullable else [])) or "None"
+            fields[name] = FieldSchema(name=name,
+                                       type=type_string,
+                                       types=types,
+                                       nullable=nullable,
+                                       cardinality=None if counter.high_cardinality else len(counter.values),
+                                       count=counter.count)
+
+        return cls(fields=fields, n_records=n_records, n_sampled=n_sampled)
+
+    def _column(self, field, values):
+        """
+        Compact column of the values of a field. Values not matching the (sampled) schema fall back to a list.
+        """
+        # Arrays of numbers, with a mask of nulls
+        if len(field.types) == 1:
+            value_type = next(iter(field.types))
+            typecode = _typecodes.get(value_type)
+            if typecode is not None and all(val is None or type(val).__name__ == value_type for val in values):
+                nulls = array("b", [val is None for val in values]) if field.nullable else None
+                try:
+                    column_values = array(typecode, [0 if val is None else val for val in values])
+                except OverflowError:
+                    # Integers too large for an array may still be categories
+                    pass
+                else:
+                    return Column(kind="flags" if value_type == "bool" else "array", values=column_values,
+                                  categories=None, nulls=nulls)
+
+        # Categories of repeated values
+        if field.cardinality is not None and field.cardinality <= len(values) // 2:
+            try:
+                codes = dict()
+                for val in values:
+                    codes.setdefault((type(val), val), len(codes))
+            except TypeError:
+                return Column(kind="list", values=list(values), categories=None, nulls=None)
+            typecode = "B" if len(codes) <= 2 ** 8 else "H" if len(codes) <= 2 ** 16 else "I"
+            return Column(kind="category",
+                          values=array(typecode, [codes[(type(val), val)] for val in values]),
+                          categories=[val for _, val in codes],
+                          nulls=None)
+
+        return Column(kind="list", values=list(values), categories=None, nulls=None)
+
+    def to_columns(self, records):
+        """
+        Converts records to columns.
+        :param records: Collection of records.
+        :return: Columns
+        """
+        records = list(records)
+        values = {name: [None] * len(records) for name in self.fields}
+        for record_nr, record in enumerate(records):
+            for name, value in record_fields(record):
+                if name not in values:
+                    raise ValueError(f"Record {record_nr} has field {name!r}, which is not in the schema. "
+                                     f"Infer the schema from all records, or from a larger sample.")
+                values[name][record_nr] = value
+
+        return Columns(columns={name: self._column(field=field, values=values[name])
+                                for name, field in self.fields.items()},
+                       length=len(records))
+
+    def compaction(self, records):
+        """
+        Converts records to columns and measures the memory-consumption of both, using rsize().
+        :param records: Collection of records.
+        :return: Compaction
+        """
+        from object_recursion.methods import rsize
+
+        columns = self.to_columns(records)
+        size_before = rsize(records)
+        size_after = rsize(columns)
+        return Compaction(columns=columns, size_before=size_before, size_after=size_after,
+                          savings=size_before - size_after)
+
+
+class Columns:
+    """
+    Records stored as a column per field.
+    """
+    def __init__(self, columns, length):
+        """
+        :param dict columns: Column of each field.
+        :param int length: Number of records.
+        """
+        self.columns = columns
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        """
+        :param str name: Name of field.
+        :return: list
+            Values of the field.
+        """
+        column = self.columns[name]
+        if column.kind == "category":
+            categories = column.categories
+            return [categories[code] for code in column.values]
+        values = [bool(val) for val in column.values] if column.kind == "flags" else column.values
+        if column.nulls is not None:
+            return [None if null else val for val, null in zip(values, column.nulls)]
+        return list(values)
+
+    def to_records(self):
+        """
+        :return: [dict]
+            The records as dictionaries (fields which were missing from a record are None).
+        """
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in zip(*[self[name] for name in names])]
@@ -0,0 +1,479 @@
+import json
+import struct
+from array import array
+
+import numpy as np
+
+from object_recursion.tasks.root_size_task import RootSizes
+
+# File-format
+_magic = b"ORSNAP1\n"
+_alignment = 64
+
+# Searches reaching more nodes than this are vectorised
+_vectorise_from = 256
+
+# Elements of the blocks of root-masks multiplied at a time by overlap()
+_overlap_block = 2 ** 24
+
+
+def type_name(obj_type):
+    """
+    :param type obj_type:
+    :return: str
+        Qualified name of a type, fx. "builtins.dict" or "mymodule.Outer.Inner", which tells types of the same name
+        in different modules apart.
+    """
+    return f"{obj_type.__module__}.{obj_type.__qualname__}"
+
+
+class GraphSnapshot:
+    """
+    Compact, columnar snapshot of the object-graph recorded by the recursion system, which holds no live objects.
+    Nodes are stored in a node-table (ids, type-codes, shallow sizes and root-membership) and edges in compressed
+    sparse row (CSR) arrays. Snapshots can be saved to a single file and memory-mapped when loaded, so they can be
+    analysed elsewhere.
+    """
+    def __init__(self, ids, type_codes, sizes, root, indptr, indices, type_names):
+        """
+        :param np.ndarray ids: id() of the object of each node.
+        :param np.ndarray type_codes: Index into type_names of each node.
+        :param np.ndarray sizes: Shallow size of each node in Bytes.
+        :param np.ndarray root: Number of the root of each node, or -1 for nodes which are not roots.
+        :param np.ndarray indptr: Edges of node i are indices[indptr[i]:indptr[i + 1]].
+        :param np.ndarray indices: Children of the nodes.
+        :param list type_names: Qualified names of types (see type_name()).
+        """
+        self.ids = ids
+        self.type_codes = type_codes
+        self.sizes = sizes
+        self.root = root
+        self.indptr = indptr
+        self.indices = indices
+        self.type_names = list(type_names)
+
+        # Node-indices of roots
+        root_nodes = np.flatnonzero(np.asarray(root) >= 0)
+        self.roots = root_nodes[np.argsort(np.asarray(root)[root_nodes], kind="stable")]
+
+    @property
+    def n_nodes(self):
+        return len(self.sizes)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    @classmethod
+    def from_recurser(cls, recurser, *args):
+        """
+        :param ObjectRecursion recurser: Recursion system, which has recursed over objects.
+        :param args: IDs of the recursed objects.
+        :return: GraphSnapshot
+        """
+        node_ids = list(recurser.objects)
+        node_index = {obj_id: index for index, obj_id in enumerate(node_ids)}
+
+        # Node table
+        type_index = dict()
+        type_codes = np.empty(len(node_ids), dtype=np.int32)
+        sizes = np.empty(len(node_ids), dtype=np.int64)
+        names = dict()
+        for index, obj in enumerate(recurser.objects.values()):
+            obj_type = type(obj)
+            name = names.get(obj_type)
+            if name is None:
+                name = names[obj_type] = type_name(obj_type)
+            type_codes[index] = type_index.setdefault(name, len(type_index))
+            sizes[index] = recurser.shallow_size(obj)
+
+        root = np.full(len(node_ids), -1, dtype=np.int32)
+        for root_nr, obj_id in reversed(list(enumerate(args))):
+            root[node_index[obj_id]] = root_nr
+
+        # Edges
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        indices = []
+        for index, obj_id in enumerate(node_ids):
+            indices.extend([node_index[val] for val in recurser.container_children.get(obj_id, ())])
+            indices.extend([node_index[val] for val in recurser.reference_children.get(obj_id, ())])
+            indptr[index + 1] = len(indices)
+        index_dtype = np.int32 if len(node_ids) < 2 ** 31 else np.int64
+
+        return cls(ids=np.array(node_ids, dtype=np.uint64),
+                   type_codes=type_codes,
+                   sizes=sizes,
+                   root=root,
+                   indptr=indptr,
+                   indices=np.array(indices, dtype=index_dtype),
+                   type_names=list(type_index))
+
+    _columns = ("ids", "type_codes", "sizes", "root", "indptr", "indices")
+
+    def save(self, path):
+        """
+        Writes the snapshot to a single file: a JSON-header followed by the aligned arrays.
+        :param str path:
+        """
+        arrays = [np.ascontiguousarray(getattr(self, name)) for name in self._columns]
+
+        # Lay out arrays after header (header-size is fixed before offsets are known)
+        header = dict(type_names=self.type_names, arrays=dict())
+        offset = 0
+        for name, array in zip(self._columns, arrays):
+            header["arrays"][name] = dict(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+            offset += -(-array.nbytes // _alignment) * _alignment
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = -(-(len(_magic) + 8 + len(header_bytes)) // _alignment) * _alignment
+
+        with open(path, "wb") as file:
+            file.write(_magic)
+            file.write(struct.pack("<Q", data_start))
+            file.write(header_bytes)
+            for name, array in zip(self._columns, arrays):
+                file.seek(data_start + header["arrays"][name]["offset"])
+                file.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        :param str path: File written by save().
+        :param bool mmap: Memory-map the arrays instead of reading them.
+        :return: GraphSnapshot
+        """
+        with open(path, "rb") as file:
+            if file.read(len(_magic)) != _magic:
+                raise ValueError(f"{path} is not a graph-snapshot.")
+            data_start, = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(data_start - len(_magic) - 8).rstrip(b"\0").decode("utf-8"))
+
+        arrays = dict()
+        for name in cls._columns:
+            info = header["arrays"][name]
+            shape = tuple(info["shape"])
+            dtype = np.dtype(info["dtype"])
+            if shape[0] == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + info["offset"], shape=shape)
+            else:
+                arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)),
+                                           offset=data_start + info["offset"]).reshape(shape)
+
+        return cls(type_names=header["type_names"], **arrays)
+
+    def node_indices(self, ids):
+        """
+        :param list ids: id() of recorded objects.
+        :return: np.ndarray
+            Node-index of each of the objects.
+        """
+        all_ids = np.asarray(self.ids)
+        order = np.argsort(all_ids, kind="stable")
+        ids = np.asarray(ids, dtype=np.uint64)
+        positions = np.searchsorted(all_ids[order], ids)
+        if len(ids) and (positions.max() >= len(order) or np.any(all_ids[order[positions]] != ids)):
+            raise KeyError("Some ids are not recorded in the snapshot.")
+        return order[positions]
+
+    def children(self, node):
+        """
+        :param int node: Node-index.
+        :return: np.ndarray
+            Node-indices of the children of the node.
+        """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def _neighbours(self, frontier):
+        """
+        Children of all nodes in the frontier, vectorised.
+        """
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return self.indices[offsets]
+
+    def _reachable_nodes(self, node, stamp, mark):
+        """
+        Breadth-first search from a node. Visited nodes are stamped with mark, so the same stamp array can be reused
+        for many searches without being reset. Small searches are done one node at a time, while large searches
+        continue one level at a time with vectorised operations.
+        :param int node: Node-index.
+        :param np.ndarray stamp: Stamp of each node.
+        :param int mark: Stamp of this search.
+        :return: np.ndarray
+            Node-indices of the nodes reachable from the node (including itself).
+        """
+        # One node at a time (reading the children of each node from the arrays, which may be memory-mapped)
+        indptr, indices = self.indptr, self.indices
+        stamp[node] = mark
+        reached = [node]
+        position = 0
+        while position < len(reached) and len(reached) < _vectorise_from:
+            current = reached[position]
+            position += 1
+            for child in indices[indptr[current]:indptr[current + 1]].tolist():
+                if stamp[child] != mark:
+                    stamp[child] = mark
+                    reached.append(child)
+        if position == len(reached):
+            return np.array(reached, dtype=np.int64)
+
+        # One level at a time
+        frontier = np.array(reached[position:], dtype=np.int64)
+        levels = [np.array(reached, dtype=np.int64)]
+        while len(frontier):
+            neighbours = self._neighbours(frontier)
+            frontier = np.unique(neighbours[stamp[neighbours] != mark])
+            stamp[frontier] = mark
+            levels.append(frontier)
+        return np.concatenate(levels)
+
+    def reachable(self, node):
+        """
+        :param int node: Node-index.
+        :return: np.ndarray
+            Boolean mask of the nodes reachable from the node (including itself).
+        """
+        mask = np.zeros(self.n_nodes, dtype=bool)
+        self._reachable_nodes(node, stamp=mask, mark=True)
+        return mask
+
+    def total_sizes(self):
+        """
+        Sizes of the roots, where each reachable object is counted once.
+        :return: np.ndarray
+        """
+        return np.array([int(self.sizes[self.reachable(node)].sum()) for node in self.roots], dtype=np.int64)
+
+    def overlap(self):
+        """
+        Memory-overlap of the roots.
+        Objects reachable from a single root only add to the diagonal. Which roots reach each shared object is kept
+        as packed bits (n_roots x n_shared / 8 Bytes), and the masks are multiplied in blocks of objects.
+        :return: np.ndarray
+            Matrix, where the diagonal elements are the sizes of each root and the non-diagonal elements are the sizes
+            of the objects reachable from both roots of the row and the column.
+        """
+        roots = self.roots
+        n_roots = len(roots)
+        sizes = np.asarray(self.sizes, dtype=np.int64)
+        stamp = np.full(self.n_nodes, -1, dtype=np.int64)
+
+        # Number of roots reaching each node, and the sizes of the roots
+        n_owners = np.zeros(self.n_nodes, dtype=np.int32)
+        matrix = np.zeros((n_roots, n_roots), dtype=np.int64)
+        for root_nr, node in enumerate(roots):
+            reached = self._reachable_nodes(int(node), stamp=stamp, mark=root_nr)
+            n_owners[reached] += 1
+            matrix[root_nr, root_nr] = sizes[reached].sum()
+
+        # Roots reaching each shared node
+        shared = np.flatnonzero(n_owners > 1)
+        if n_roots < 2 or len(shared) == 0:
+            return matrix
+        del n_owners
+        shared_position = np.full(self.n_nodes, -1, dtype=np.int64)
+        shared_position[shared] = np.arange(len(shared))
+        bits = np.zeros((n_roots, -(-len(shared) // 8)), dtype=np.uint8)
+        stamp.fill(-1)
+        for root_nr, node in enumerate(roots):
+            positions = shared_position[self._reachable_nodes(int(node), stamp=stamp, mark=root_nr)]
+            positions = positions[positions >= 0]
+            np.bitwise_or.at(bits[root_nr], positions >> 3, (128 >> (positions & 7)).astype(np.uint8))
+        del stamp, shared_position
+
+        # Weighted products of the masks, a block of shared nodes at a time
+        shared_sizes = sizes[shared]
+        block = max(8, _overlap_block // n_roots // 8 * 8)
+        overlap = np.zeros((n_roots, n_roots), dtype=np.float64)
+        for start in range(0, len(shared), block):
+            masks = np.unpackbits(bits[:, start // 8:(start + block) // 8], axis=1, count=min(block, len(shared) - start))
+            masks = masks.astype(np.float64)
+            overlap += (masks * shared_sizes[start:start + block]) @ masks.T
+        off_diagonal = ~np.eye(n_roots, dtype=bool)
+        matrix[off_diagonal] = np.rint(overlap[off_diagonal]).astype(np.int64)
+        return matrix
+
+    def root_sizes(self, nodes=None, attribution="first"):
+        """
+        Sizes of many roots, where objects reachable from several roots (owners) are attributed according to a policy.
+        Each root is searched once, reusing a single stamp-array.
+        :param list nodes: Node-indices of the roots. Defaults to the roots of the snapshot.
+        :param str attribution: Attribution of shared objects.
+            "first"         :   To the first root reaching the object.
+            "proportional"  :   Split evenly between all roots reaching the object.
+            "all"           :   To all roots reaching the object.
+        :return: RootSizes
+            Inclusive sizes (all reachable objects), exclusive sizes (objects reachable only from the root) and
+            attributed sizes of each root.
+        """
+        if attribution not in ("first", "proportional", "all"):
+            raise ValueError(f"Unknown attribution: {attribution}")
+        nodes = self.roots if nodes is None else np.asarray(nodes, dtype=np.int64)
+        sizes = np.asarray(self.sizes, dtype=np.int64)
+        stamp = np.full(self.n_nodes, -1, dtype=np.int64)
+
+        # Owners of each node
+        n_owners = np.zeros(self.n_nodes, dtype=np.int64)
+        first_owner = np.full(self.n_nodes, -1, dtype=np.int64)
+        inclusive = np.zeros(len(nodes), dtype=np.int64)
+        for root_nr, node in enumerate(nodes):
+            reached = self._reachable_nodes(int(node), stamp=stamp, mark=root_nr)
+            n_owners[reached] += 1
+            unowned = reached[first_owner[reached] == -1]
+            first_owner[unowned] = root_nr
+            inclusive[root_nr] = sizes[reached].sum()
+
+        # Objects with a single owner
+        single = n_owners == 1
+        exclusive = np.bincount(first_owner[single], weights=sizes[single], minlength=len(nodes)).astype(np.int64)
+
+        if attribution == "first":
+            owned = first_owner >= 0
+            attributed = np.bincount(first_owner[owned], weights=sizes[owned], minlength=len(nodes)).astype(np.int64)
+        elif attribution == "proportional":
+            shares = sizes / np.maximum(n_owners, 1)
+            stamp.fill(-1)
+            attributed = np.array([shares[self._reachable_nodes(int(node), stamp=stamp, mark=root_nr)].sum()
+                                   for root_nr, node in enumerate(nodes)], dtype=np.float64)
+        else:
+            attributed = inclusive.copy()
+
+        return RootSizes(inclusive=inclusive, exclusive=exclusive, attributed=attributed)
+
+    def _predecessors(self):
+        """
+        Reverse CSR arrays.
+        """
+        indices = np.asarray(self.indices)
+        sources = np.repeat(np.arange(self.n_nodes), np.diff(self.indptr))
+        order = np.argsort(indices, kind="stable")
+        reverse_indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.n_nodes), out=reverse_indptr[1:])
+        return reverse_indptr, sources[order]
+
+    def _dominator_tree(self):
+        """
+        Immediate dominators using the algorithm of Cooper, Harvey and Kennedy, with a virtual node referencing all
+        roots. The edges are read from the arrays (which may be memory-mapped) one node at a time, and the state of
+        each node is held in compact arrays.
+        :return: (array, array)
+            Immediate dominator of each node (the virtual node has index n_nodes) and the reverse post-order.
+        """
+        n_nodes = self.n_nodes
+        virtual = n_nodes
+        indptr, indices = self.indptr, self.indices
+        roots = [int(val) for val in self.roots]
+
+        # Reverse post-order from virtual node (iterative depth-first search)
+        postorder = array("q")
+        visited = bytearray(n_nodes + 1)
+        visited[virtual] = True
+        stack = [(virtual, iter(roots))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = True
+                    stack.append((child, iter(indices[indptr[child]:indptr[child + 1]].tolist())))
+                    break
+            else:
+                stack.pop()
+                postorder.append(node)
+        del visited
+        reverse_postorder = postorder[::-1]
+        del postorder
+        order_number = array("q", [-1]) * (n_nodes + 1)
+        for number, node in enumerate(reverse_postorder):
+            order_number[node] = number
+
+        # Predecessors
+        reverse_indptr, sources = self._predecessors()
+        root_set = set(roots)
+
+        def predecessors_of(node):
+            predecessors = sources[reverse_indptr[node]:reverse_indptr[node + 1]].tolist()
+            if node in root_set:
+                predecessors.append(virtual)
+            return predecessors
+
+        # Iterate until stable
+        idom = array("q", [-1]) * (n_nodes + 1)
+        idom[virtual] = virtual
+        changed = True
+        while changed:
+            changed = False
+            for node in reverse_postorder[1:]:
+                new_idom = -1
+                for predecessor in predecessors_of(node):
+                    if idom[predecessor] == -1:
+                        continue
+                    if new_idom == -1:
+                        new_idom = predecessor
+                        continue
+
+                    # Intersect
+                    finger1, finger2 = predecessor, new_idom
+                    while finger1 != finger2:
+                        while order_number[finger1] > order_number[finger2]:
+                            finger1 = idom[finger1]
+                        while order_number[finger2] > order_number[finger1]:
+                            finger2 = idom[finger2]
+                    new_idom = finger1
+
+                if idom[node] != new_idom:
+                    idom[node] = new_idom
+                    changed = True
+
+        return idom, reverse_postorder
+
+    def dominators(self):
+        """
+        Immediate dominators of the nodes.
+        :return: np.ndarray
+            Node-index of the immediate dominator of each node. -1 for nodes only dominated by the virtual node
+            referencing all roots (fx. the roots and objects shared between roots) and for nodes not reachable from any
+            root.
+        """
+        idom, _ = self._dominator_tree()
+        idom = np.frombuffer(idom, dtype=np.int64)[:self.n_nodes].copy()
+        idom[idom == self.n_nodes] = -1
+        return idom
+
+    def retained_sizes(self):
+        """
+        Retained size of each node: the memory which would be freed if the node was freed, which is the total size of
+        the nodes it dominates (including itself).
+        :return: np.ndarray
+        """
+        idom, reverse_postorder = self._dominator_tree()
+        retained = array("q", np.asarray(self.sizes, dtype=np.int64).tobytes())
+        retained.append(0)
+
+        # Nodes come after their dominators in reverse post-order
+        for node in reversed(reverse_postorder[1:]):
+            retained[idom[node]] += retained[node]
+        return np.frombuffer(retained, dtype=np.int64)[:self.n_nodes].copy()
+
+    def to_dataframe(self, retained=False):
+        """
+        Node-table as a pandas DataFrame, for ad hoc queries.
+        :param bool retained: Include the retained size of each node (computes dominators).
+        :return: pd.DataFrame
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame(dict(
+            id=np.asarray(self.ids),
+            type=pd.Categorical.from_codes(np.asarray(self.type_codes), categories=self.type_names),
+            size=np.asarray(self.sizes),
+            root=np.asarray(self.root),
+            out_degree=np.diff(self.indptr),
+        ))
+        if retained:
+            frame["retained"] = self.retained_sizes()
+        return frame
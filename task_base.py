@@ -1,4 +1,23 @@
+import copy
+from collections import namedtuple
+
+# Hooks of the batch-protocol (see RecursionTask.hooks)
+EnterHook = "enter"
+FinishHook = "finish"
+
+# Objects entered or finished by the recursion system, delivered to a task in one call.
+# ids: Array of the IDs of the objects. type_codes: Array of the type-code of each object (see ObjectRecursion.types).
+NodeBatch = namedtuple("NodeBatch", "ids, type_codes")
+
+
 class RecursionTask:
+    # Protocol of the task.
+    # None: enter_object() and _finish_object() are called for each object.
+    # Otherwise the hooks needed by the task (EnterHook and/or FinishHook), whose objects are delivered in batches to
+    # enter_batch() and finish_batch(). Tasks which only work on the recorded graph in wrap_up() need no hooks (()),
+    # so the recursion system makes no calls to them for each object.
+    hooks = None
+
     def __init__(self):
         self._object_conclusion = None
 
@@ -6,6 +25,14 @@ class RecursionTask:
     def interests(self):
         raise NotImplementedError
 
+    def copy(self):
+        """
+        Copy of the task for a single recursion, sharing the configuration of the task.
+        Tasks must (re)create all their state in initialize(), so that copies do not share state.
+        :return: RecursionTask
+        """
+        return copy.copy(self)
+
     def initialize(self):
         """
         Initializes the task before running any recursions.
@@ -31,6 +58,24 @@ class RecursionTask:
         """
         raise NotImplementedError
 
+    def enter_batch(self, batch, recurser):
+        """
+        Objects which have been entered, in the order they were entered (batch-protocol).
+        :param NodeBatch batch:
+        :param ObjectRecursion recurser:
+        """
+        raise NotImplementedError
+
+    def finish_batch(self, batch, recurser):
+        """
+        Objects which have been finished, in the order they were finished, so children come before their parents
+        (batch-protocol). All objects of a recursed object are delivered before intermediate_initialize() and
+        wrap_up() are called.
+        :param NodeBatch batch:
+        :param ObjectRecursion recurser:
+        """
+        raise NotImplementedError
+
     def result(self, obj_id, recurser):
         """
         Get result of task on object.
@@ -161,6 +206,16 @@ class TreeRecursionTask(RecursionTask):
 
 
 class WrapUpTask(RecursionTask):
+    @property
+    def hooks(self):
+        # Batches are forwarded, if all the tasks use the batch-protocol
+        hooks = set()
+        for task in self.tasks:  # type: RecursionTask
+            if task.hooks is None:
+                return None
+            hooks.update(task.hooks)
+        return tuple(hooks)
+
     @property
     def interests(self):
         interests = set()
@@ -172,6 +227,11 @@ class WrapUpTask(RecursionTask):
         super().__init__()
         self.tasks = tasks  # type: [RecursionTask]
 
+    def copy(self):
+        task = copy.copy(self)
+        task.tasks = [val.copy() for val in self.tasks]
+        return task
+
     def intermediate_initialize(self):
         for task in self.tasks:  # type: RecursionTask
             task.intermediate_initialize()
@@ -184,6 +244,16 @@ class WrapUpTask(RecursionTask):
         for task in self.tasks:  # type: RecursionTask
             task._finish_object(obj_id=obj_id, edge=edge, parent=parent, recurser=recurser)
 
+    def enter_batch(self, batch, recurser):
+        for task in self.tasks:  # type: RecursionTask
+            if EnterHook in task.hooks:
+                task.enter_batch(batch, recurser=recurser)
+
+    def finish_batch(self, batch, recurser):
+        for task in self.tasks:  # type: RecursionTask
+            if FinishHook in task.hooks:
+                task.finish_batch(batch, recurser=recurser)
+
     def initialize(self):
         for task in self.tasks:  # type: RecursionTask
             task.initialize()
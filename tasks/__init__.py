@@ -1,4 +1,13 @@
 from object_recursion.tasks.size_task import SizeTask
 from object_recursion.tasks.container_tree_task import ContainerTreePrintTask
-from object_recursion.tasks.memory_overlap_task import SizeComparisonTask
+from object_recursion.tasks.memory_overlap_task import SizeComparisonTask, OverlapMatrix
 from object_recursion.tasks.type_check_task import TypeCheckTask
+from object_recursion.tasks.type_size_task import TypeSizeTask
+from object_recursion.tasks.cycle_task import CycleTask, Cycle
+from object_recursion.tasks.duplicate_task import DuplicateTask, DuplicateGroup, Duplicates
+from object_recursion.tasks.snapshot_task import SnapshotTask
+from object_recursion.tasks.root_size_task import RootSizeTask, RootSizes
+from object_recursion.tasks.index_task import IndexTask
+from object_recursion.tasks.compaction_task import CompactionTask, CompactionAdvice, Suggestion
+from object_recursion.tasks.container_efficiency_task import ContainerEfficiencyTask, EfficiencyReport, \
+    EfficiencyGroup, ContainerEfficiency
@@ -0,0 +1,189 @@
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+from types import FunctionType, ModuleType
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.capacity import allocation
+from object_recursion.handlers import FieldsHandler
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.task_base import RecursionTask
+
+# A memory-wasteful pattern and the Bytes saved by avoiding it
+Suggestion = namedtuple("Suggestion", "kind, type, count, savings, example")
+
+# Result of compaction-analysis
+CompactionAdvice = namedtuple("CompactionAdvice", "size, savings, suggestions, compact")
+
+# Kinds of suggestions
+ListToTuple = "list to tuple"
+ListToArray = "list to array"
+InternStrings = "intern strings"
+AddSlots = "add __slots__"
+ShrinkContainer = "shrink container"
+
+# Type-codes of arrays of numbers
+_array_typecodes = {int: "q", float: "d"}
+
+# Small integers are shared by the interpreter
+_cached_ints = range(-5, 257)
+
+# Sizes of tuples
+_tuple_base_size = sys.getsizeof(())
+_pointer_size = struct.calcsize("P")
+
+
+@lru_cache(maxsize=None)
+def _attribute_costs(n_attributes):
+    """
+    Size of an instance with n attributes (including its attribute-dictionary) and of an instance with the same
+    attributes in slots, measured on probe-classes.
+    """
+    names = [f"a{nr}" for nr in range(n_attributes)]
+    plain = type("Plain", (), {})()
+    for name in names:
+        setattr(plain, name, None)
+    slotted = type("Slotted", (), {"__slots__": tuple(names)})()
+    return sys.getsizeof(plain) + sys.getsizeof(vars(plain)), sys.getsizeof(slotted)
+
+
+def _has_slots(cls):
+    return any("__slots__" in vars(base) for base in cls.__mro__[:-1])
+
+
+class CompactionTask(RecursionTask):
+    """
+    Finds memory-wasteful patterns among the recursed objects (each object is considered once), and estimates the
+    Bytes saved by avoiding each:
+        - Lists which could be tuples.
+        - Lists of only integers or only floats, which could be arrays (array.array).
+        - Equal strings stored as distinct objects, which could be interned.
+        - Classes with many instances and no __slots__.
+        - Lists, dictionaries and sets with unused capacity.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def __init__(self, min_array_length=16, min_instances=100):
+        """
+        :param int min_array_length: Lists of numbers shorter than this are not suggested as arrays.
+        :param int min_instances: Classes with fewer instances are not suggested to have __slots__.
+        """
+        super().__init__()
+        self.min_array_length = min_array_length
+        self.min_instances = min_instances
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    def _array_savings(self, obj, compact_size):
+        """
+        Bytes saved by storing a list of numbers as an array (compared to a list without unused capacity), assuming
+        the numbers are not referenced elsewhere.
+        :return: int | None
+        """
+        if len(obj) < self.min_array_length:
+            return None
+        element_type = type(obj[0])
+        typecode = _array_typecodes.get(element_type)
+        if typecode is None or any(type(val) is not element_type for val in obj):
+            return None
+        try:
+            compact = array(typecode, obj)
+        except OverflowError:
+            return None
+
+        distinct = {id(val): val for val in obj if not (element_type is int and val in _cached_ints)}
+        elements_size = sum(sys.getsizeof(val) for val in distinct.values())
+        return compact_size + elements_size - sys.getsizeof(compact)
+
+    def _suggest_list(self, obj, compact_size, note):
+        savings = self._array_savings(obj, compact_size)
+        if savings is not None and savings > 0:
+            note(ListToArray, obj, savings)
+        else:
+            note(ListToTuple, obj, compact_size - (_tuple_base_size + len(obj) * _pointer_size))
+
+    @staticmethod
+    def _slots_candidate(obj, recurser):
+        if not hasattr(obj, "__dict__") or isinstance(obj, (type, ModuleType, FunctionType)):
+            return False
+        if _has_slots(type(obj)):
+            return False
+        handler = recurser.handler_for(obj)
+        return handler is None or isinstance(handler, FieldsHandler)
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: [Suggestion]
+            Suggestions sorted by savings.
+        """
+        suggestions = dict()
+
+        def note(kind, obj, savings, count=1):
+            key = (kind, type(obj).__name__)
+            entry = suggestions.get(key)
+            if entry is None:
+                suggestions[key] = [count, savings, obj]
+            else:
+                entry[0] += count
+                entry[1] += savings
+
+        strings = dict()
+        instances = dict()
+        for obj_id in recurser.handled:
+            obj = recurser.objects[obj_id]
+            obj_type = type(obj)
+
+            # Unused capacity
+            if obj_type in (list, dict, set, frozenset, bytearray):
+                obj_allocation = allocation(obj)
+                if obj_allocation.wasted > 0:
+                    note(ShrinkContainer, obj, obj_allocation.wasted)
+                if obj_type is list:
+                    self._suggest_list(obj, obj_allocation.compact_size, note)
+
+            elif obj_type is str:
+                entry = strings.get(obj)
+                if entry is None:
+                    entry = strings[obj] = [0, obj]
+                entry[0] += 1
+            elif self._slots_candidate(obj, recurser):
+                entry = instances.get(obj_type)
+                if entry is None:
+                    entry = instances[obj_type] = [0, obj]
+                entry[0] += 1
+
+        # Duplicate strings
+        for count, obj in strings.values():
+            if count > 1:
+                note(InternStrings, obj, (count - 1) * sys.getsizeof(obj), count=count)
+
+        # Classes without slots
+        for count, obj in instances.values():
+            if count >= self.min_instances:
+                plain_size, slotted_size = _attribute_costs(len(vars(obj)))
+                note(AddSlots, obj, count * (plain_size - slotted_size), count=count)
+
+        result = [Suggestion(kind=kind, type=name, count=count, savings=savings, example=example)
+                  for (kind, name), (count, savings, example) in suggestions.items() if savings > 0]
+        return sorted(result, key=lambda suggestion: -suggestion.savings)
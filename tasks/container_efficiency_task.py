@@ -0,0 +1,210 @@
+from collections import namedtuple, deque
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.capacity import allocation
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.paths import render_path
+from object_recursion.task_base import RecursionTask
+
+# Allocation of a single container and the path to it
+ContainerEfficiency = namedtuple("ContainerEfficiency", "path, type, allocation")
+
+# Allocations of a group of containers
+EfficiencyGroup = namedtuple("EfficiencyGroup", "count, length, capacity, size, wasted, load_factor")
+
+# Result of container-efficiency analysis
+EfficiencyReport = namedtuple("EfficiencyReport", "size, wasted, by_type, by_path, containers")
+
+# Containers whose allocated capacity is known
+_containers = (list, dict, set, frozenset, bytearray)
+
+# Dictionaries with at most this many string-keys keep their keys in path-patterns
+_max_named_keys = 16
+
+
+def _attribute_labels(obj):
+    """
+    Labels of the attributes of an object, by the id of their values.
+    """
+    labels = dict()
+    for cls in type(obj).__mro__:
+        slots = getattr(cls, "__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if hasattr(obj, name):
+                labels.setdefault(id(getattr(obj, name)), f".{name}")
+    if hasattr(obj, "__dict__"):
+        for name, value in vars(obj).items():
+            labels[id(value)] = f".{name}"
+    return labels
+
+
+class _Group:
+    def __init__(self):
+        self.count = 0
+        self.length = 0
+        self.capacity = 0
+        self.known_length = 0
+        self.size = 0
+        self.wasted = 0
+
+    def add(self, obj_allocation):
+        self.count += 1
+        self.length += obj_allocation.length
+        self.size += obj_allocation.size
+        self.wasted += obj_allocation.wasted
+        if obj_allocation.capacity is not None:
+            self.capacity += obj_allocation.capacity
+            self.known_length += obj_allocation.length
+
+    def result(self):
+        return EfficiencyGroup(count=self.count,
+                               length=self.length,
+                               capacity=self.capacity,
+                               size=self.size,
+                               wasted=self.wasted,
+                               load_factor=self.known_length / self.capacity if self.capacity else 1.0)
+
+
+def _by_waste(groups):
+    return {key: group.result() for key, group in sorted(groups.items(), key=lambda item: (-item[1].wasted, item[0]))}
+
+
+class ContainerEfficiencyTask(RecursionTask):
+    """
+    Computes the length, allocated capacity, wasted Bytes and load factor of each list, dictionary, set and bytearray
+    among the recursed objects (see capacity.allocation()), and aggregates them by type and by path.
+    Paths are patterns where subscripts are replaced by "[*]" (fx. "['sessions'][*].buffer"), so the containers held
+    in the same place of many objects are aggregated. String-keys of small dictionaries are kept, as these are usually
+    records. Each container is attributed to its shortest path.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def __init__(self, max_containers=20):
+        """
+        :param int max_containers: Number of the most wasteful containers reported individually.
+        """
+        super().__init__()
+        self.max_containers = max_containers
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    @staticmethod
+    def _path_patterns(recurser, root_ids):
+        """
+        Breadth-first search of the recorded graph, finding the path-pattern and parent of each node.
+        :return: (dict, list, dict)
+            Pattern-number of each node, the patterns and the parent of each node.
+        """
+        patterns = [""]
+        pattern_numbers = dict()
+        node_patterns = {obj_id: 0 for obj_id in root_ids}
+        parents = dict()
+
+        def note(child_id, parent_id, pattern, label):
+            if child_id in node_patterns:
+                return
+            key = (pattern, label)
+            number = pattern_numbers.get(key)
+            if number is None:
+                number = pattern_numbers[key] = len(patterns)
+                patterns.append(patterns[pattern] + label)
+            node_patterns[child_id] = number
+            parents[child_id] = parent_id
+            queue.append(child_id)
+
+        queue = deque(node_patterns)
+        while queue:
+            obj_id = queue.popleft()
+            pattern = node_patterns[obj_id]
+
+            container_children = recurser.container_children.get(obj_id)
+            if container_children:
+                obj = recurser.objects[obj_id]
+                if isinstance(obj, Dict):
+                    # Small dictionaries with string-keys are records, whose keys are kept
+                    named = len(obj) <= _max_named_keys
+                    for key_id, value_id in zip(container_children[0::2], container_children[1::2]):
+                        key = recurser.objects[key_id]
+                        note(key_id, obj_id, pattern, ".keys()[*]")
+                        note(value_id, obj_id, pattern, f"[{key!r}]" if named and type(key) is str else "[*]")
+                else:
+                    for child_id in container_children:
+                        note(child_id, obj_id, pattern, "[*]")
+
+            reference_children = recurser.reference_children.get(obj_id)
+            if reference_children:
+                labels = _attribute_labels(recurser.objects[obj_id])
+                for child_id in reference_children:
+                    label = labels.get(child_id)
+                    if label is None:
+                        label = f"->{type(recurser.objects[child_id]).__name__}"
+                    note(child_id, obj_id, pattern, label)
+
+        return node_patterns, patterns, parents
+
+    @staticmethod
+    def _path(recurser, parents, obj_id):
+        path = [obj_id]
+        while path[-1] in parents:
+            path.append(parents[path[-1]])
+        return render_path([recurser.objects[val] for val in reversed(path)])
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: EfficiencyReport
+        """
+        node_patterns, patterns, parents = self._path_patterns(recurser=recurser, root_ids=args)
+
+        by_type = dict()
+        by_path = dict()
+        allocations = []
+        for obj_id in recurser.handled:
+            obj = recurser.objects[obj_id]
+            if not isinstance(obj, _containers):
+                continue
+            obj_allocation = allocation(obj)
+            allocations.append((obj_allocation.wasted, obj_id, obj_allocation))
+
+            name = type(obj).__name__
+            group = by_type.get(name)
+            if group is None:
+                group = by_type[name] = _Group()
+            group.add(obj_allocation)
+
+            pattern = patterns[node_patterns[obj_id]]
+            group = by_path.get(pattern)
+            if group is None:
+                group = by_path[pattern] = _Group()
+            group.add(obj_allocation)
+
+        # Most wasteful containers, with their exact paths
+        allocations.sort(key=lambda item: -item[0])
+        containers = [ContainerEfficiency(path=self._path(recurser=recurser, parents=parents, obj_id=obj_id),
+                                          type=type(recurser.objects[obj_id]).__name__,
+                                          allocation=obj_allocation)
+                      for wasted, obj_id, obj_allocation in allocations[:self.max_containers] if wasted > 0]
+
+        return EfficiencyReport(size=sum(val.size for _, _, val in allocations),
+                                wasted=sum(val.wasted for _, _, val in allocations),
+                                by_type=_by_waste(by_type),
+                                by_path=_by_waste(by_path),
+                                containers=containers)
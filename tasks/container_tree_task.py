@@ -1,8 +1,7 @@
 import re
 from typing import Tuple, Dict, Iterable
 
-import numpy as np
-
+from object_recursion.numpy_support import NDArray
 from object_recursion.object_recursion import ObjectRecursion
 from object_recursion.task_base import TreeRecursionTask
 
@@ -13,7 +12,7 @@ class ContainerTreePrintTask(TreeRecursionTask):
     def interests(self):
         return (Tuple,
                 Dict,
-                np.ndarray,
+                NDArray,
                 Iterable
                 )
 
@@ -0,0 +1,256 @@
+from collections import namedtuple, Counter, deque
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.paths import render_path
+from object_recursion.task_base import RecursionTask
+
+# A reference-cycle (strongly connected component with at least one loop)
+Cycle = namedtuple("Cycle", "size, n_objects, types, path, loop, ids")
+
+
+class CycleTask(RecursionTask):
+    """
+    Finds the reference-cycles among the recursed objects, using Tarjan's algorithm for strongly connected components
+    on the graph recorded by the recursion system.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    @staticmethod
+    def _graph(recurser):
+        """
+        Adjacency lists of the recorded graph.
+        :param ObjectRecursion recurser:
+        :return: (list, list)
+            IDs of nodes and list of children-indices of each node.
+        """
+        node_ids = list(recurser.objects)
+        node_index = {obj_id: index for index, obj_id in enumerate(node_ids)}
+
+        adjacency = []
+        for obj_id in node_ids:
+            children = [node_index[val] for val in recurser.container_children.get(obj_id, ())]
+            children.extend(node_index[val] for val in recurser.reference_children.get(obj_id, ()))
+            adjacency.append(children)
+
+        return node_ids, adjacency
+
+    @staticmethod
+    def strongly_connected_components(adjacency):
+        """
+        Iterative version of Tarjan's algorithm.
+        :param list adjacency: List of children-indices of each node.
+        :return: list
+            Lists of node-indices of each component.
+        """
+        n_nodes = len(adjacency)
+        index = [-1] * n_nodes
+        low = [0] * n_nodes
+        on_stack = [False] * n_nodes
+        stack = []
+        components = []
+        counter = 0
+
+        for start in range(n_nodes):
+            if index[start] != -1:
+                continue
+
+            # Work-stack of (node, position of next child)
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack[start] = True
+            work = [(start, 0)]
+
+            while work:
+                node, position = work[-1]
+                children = adjacency[node]
+
+                # Visit next unvisited child
+                if position < len(children):
+                    work[-1] = (node, position + 1)
+                    child = children[position]
+                    if index[child] == -1:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, 0))
+                    elif on_stack[child]:
+                        low[node] = min(low[node], index[child])
+                    continue
+
+                # All children visited
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+                # Root of component
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        return components
+
+    @staticmethod
+    def _shortest_path(adjacency, sources, targets, allowed=None):
+        """
+        Breadth-first search from sources to the closest node in targets.
+        :param list adjacency: List of children-indices of each node.
+        :param list sources: Start nodes.
+        :param set targets: End nodes.
+        :param set allowed: Nodes which the path may go through. Defaults to all nodes.
+        :return: list | None
+            Node-indices of the path.
+        """
+        parents = dict()
+        queue = deque()
+        for source in sources:
+            if source not in parents:
+                parents[source] = None
+                queue.append(source)
+
+        while queue:
+            node = queue.popleft()
+            if node in targets:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+
+            for child in adjacency[node]:
+                if child not in parents and (allowed is None or child in allowed):
+                    parents[child] = node
+                    queue.append(child)
+
+        return None
+
+    @staticmethod
+    def _breadth_first(adjacency, sources):
+        """
+        Breadth-first search from sources through the whole graph.
+        :param list adjacency: List of children-indices of each node.
+        :param list sources: Start nodes.
+        :return: (list, list, list)
+            Parent of each node (None for sources and unreached nodes), the position of each node among the children
+            of its parent and the position of each node in the order of the search (-1 for unreached nodes).
+        """
+        parents = [None] * len(adjacency)
+        positions = [None] * len(adjacency)
+        order = [-1] * len(adjacency)
+        queue = []
+        for source in sources:
+            if order[source] == -1:
+                order[source] = len(queue)
+                queue.append(source)
+
+        position = 0
+        while position < len(queue):
+            node = queue[position]
+            position += 1
+            for child_position, child in enumerate(adjacency[node]):
+                if order[child] == -1:
+                    order[child] = len(queue)
+                    parents[child] = node
+                    positions[child] = child_position
+                    queue.append(child)
+
+        return parents, positions, order
+
+    @staticmethod
+    def _key(recurser, parent_id, position):
+        """
+        Index or key of a child in a list, tuple or dictionary, from the position of the child among the recorded
+        children of the parent (keys and values of dictionaries alternate).
+        :return: int | object | None
+        """
+        children = recurser.container_children.get(parent_id)
+        if children is None or position >= len(children) or parent_id in recurser.sampled_containers:
+            return None
+        parent = recurser.objects[parent_id]
+        if isinstance(parent, (list, tuple)):
+            return position
+        if isinstance(parent, Dict) and position % 2 == 1:
+            return recurser.objects[children[position - 1]]
+        return None
+
+    def _describe(self, component, node_ids, adjacency, search, recurser):
+        members = set(component)
+        objects = [recurser.objects[node_ids[val]] for val in component]
+
+        # Path from a root into the cycle (the member reached first by the search from the roots is the closest)
+        parents, positions, order = search
+        reached = [val for val in component if order[val] != -1]
+        entry = min(reached, key=order.__getitem__) if reached else component[0]
+        path = [entry]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        path.reverse()
+        keys = [self._key(recurser, node_ids[parent], positions[child]) for parent, child in zip(path[:-1], path[1:])]
+
+        # Loop from the entry back to itself, within the cycle
+        if entry in adjacency[entry]:
+            loop = [entry, entry]
+        else:
+            return_path = self._shortest_path(adjacency, sources=[val for val in adjacency[entry] if val in members],
+                                              targets={entry}, allowed=members)
+            loop = [entry] + return_path
+
+        def objects_of(indices):
+            return [recurser.objects[node_ids[val]] for val in indices]
+
+        types = Counter(["None" if obj is None else type(obj).__name__ for obj in objects])
+        return Cycle(size=sum(recurser.shallow_size(obj) for obj in objects),
+                     n_objects=len(component),
+                     types=dict(types.most_common()),
+                     path=render_path(objects_of(path), keys=keys),
+                     loop=render_path(objects_of(loop)),
+                     ids=[node_ids[val] for val in component])
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: [Cycle]
+            Cycles sorted by size, largest first.
+        """
+        node_ids, adjacency = self._graph(recurser)
+        node_index = {obj_id: index for index, obj_id in enumerate(node_ids)}
+        root_indices = [node_index[obj_id] for obj_id in args]
+
+        # A single search from the roots gives the paths into all cycles
+        search = self._breadth_first(adjacency, root_indices)
+
+        # Non-trivial components (more than one object, or an object referencing itself)
+        cycles = []
+        for component in self.strongly_connected_components(adjacency):
+            if len(component) > 1 or component[0] in adjacency[component[0]]:
+                cycles.append(self._describe(component, node_ids, adjacency, search, recurser))
+
+        return sorted(cycles, key=lambda cycle: -cycle.size)
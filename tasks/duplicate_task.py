@@ -0,0 +1,180 @@
+from collections import namedtuple
+from hashlib import blake2b
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.task_base import TreeRecursionTask
+
+# Equal values with distinct ids
+DuplicateGroup = namedtuple("DuplicateGroup", "type, count, size, savings, value")
+
+# Result of duplicate-detection
+Duplicates = namedtuple("Duplicates", "savings, by_type, groups, complete")
+
+# Leaf-types whose contents are hashed directly (integers by their bytes, as their repr() is limited in length)
+_integers = {int, bool}
+_numbers = {float, complex}
+
+
+class DuplicateTask(TreeRecursionTask):
+    """
+    Finds equal-but-not-identical values by computing structural content-hashes (Merkle-hashes) bottom-up.
+    Strings, bytes, numbers and None are hashed by their contents, while tuples, frozensets and small dictionaries are
+    hashed by the hashes of their children. Objects containing anything else (or loops) are not hashed.
+    The index of hashes is bounded: when it is full, values which have only been seen once are evicted.
+    """
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def __init__(self, max_index_size=1000000, max_dict_size=16):
+        """
+        :param int max_index_size: Maximum number of hashes held in the index.
+        :param int max_dict_size: Dictionaries with more entries are not hashed.
+        """
+        super().__init__()
+        self.max_index_size = max_index_size
+        self.max_dict_size = max_dict_size
+
+        # Index from hash to [id of first object, number of objects, size of each object]
+        self._index = None  # type: dict
+        self._evicted = False
+        self._saturated = False
+
+    def initialize(self):
+        self._object_conclusion = dict()
+        self._current_path = []
+        self._index = dict()
+        self._evicted = False
+        self._saturated = False
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    @staticmethod
+    def _digest(tag, data):
+        return blake2b(tag + b"\0" + data, digest_size=16).digest()
+
+    def _leaf_digest(self, obj):
+        obj_type = type(obj)
+        if obj_type is str:
+            return self._digest(b"str", obj.encode("utf-8", "surrogatepass"))
+        if obj_type is bytes:
+            return self._digest(b"bytes", obj)
+        if obj_type in _integers:
+            return self._digest(obj_type.__name__.encode(),
+                                obj.to_bytes((obj.bit_length() + 8) // 8, "little", signed=True))
+        if obj_type in _numbers:
+            return self._digest(obj_type.__name__.encode(), repr(obj).encode())
+        if obj is None:
+            return self._digest(b"None", b"")
+        return None
+
+    def _children_digests(self, obj_id, recurser):
+        """
+        :return: list | None
+            Hashes of the children of a container, or None if any child has no hash.
+        """
+        if obj_id not in recurser.container_children or obj_id in recurser.sampled_containers:
+            return None
+
+        digests = []
+        for child in recurser.container_children[obj_id]:
+            digest = self._finish_object(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
+            if digest is None:
+                return None
+            digests.append(digest)
+        return digests
+
+    def _container_digest(self, obj_id, obj, recurser):
+        obj_type = type(obj)
+        if obj_type is dict and len(obj) > self.max_dict_size:
+            return None
+        if obj_type not in (tuple, frozenset, dict):
+            return None
+
+        digests = self._children_digests(obj_id=obj_id, recurser=recurser)
+        if digests is None:
+            return None
+
+        # Order of sets and dictionaries does not matter
+        if obj_type is frozenset:
+            digests.sort()
+        elif obj_type is dict:
+            digests = sorted([key + value for key, value in zip(digests[0::2], digests[1::2])])
+
+        return self._digest(obj_type.__name__.encode(), b"".join(digests))
+
+    def _note(self, obj_id, obj, digest, recurser):
+        """
+        Notes an object with a hash in the index.
+        """
+        entry = self._index.get(digest)
+        if entry is not None:
+            entry[1] += 1
+            return
+        if self._saturated:
+            return
+
+        self._index[digest] = [obj_id, 1, recurser.shallow_size(obj)]
+
+        # Evict values seen once
+        if len(self._index) > self.max_index_size:
+            self._index = {key: val for key, val in self._index.items() if val[1] > 1}
+            self._evicted = True
+            self._saturated = len(self._index) > self.max_index_size // 2
+
+    def _termination_conclusion(self, *, obj_id, obj, edge, parent, recurser):
+        if recurser.terminate(obj):
+            digest = self._leaf_digest(obj)
+            if digest is not None:
+                self._note(obj_id=obj_id, obj=obj, digest=digest, recurser=recurser)
+            return True, digest
+        return False, None
+
+    def _stop_recursion_conclusion(self, *, obj_id, obj, edge, parent, recurser):
+        return None
+
+    def _non_termination_conclusion(self, *, obj_id, obj, edge, parent, recurser):
+        # Finish children of any kind of object, so that they are noted
+        for child in recurser.reference_children.get(obj_id, ()):
+            self._finish_object(obj_id=child, edge=ObjectRecursion.ClassDict, parent=obj_id, recurser=recurser)
+
+        digest = self._container_digest(obj_id=obj_id, obj=obj, recurser=recurser)
+        if digest is None:
+            for child in recurser.container_children.get(obj_id, ()):
+                self._finish_object(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
+        else:
+            self._note(obj_id=obj_id, obj=obj, digest=digest, recurser=recurser)
+        return digest
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: Duplicates
+        """
+        for obj_id in args:
+            self.result(obj_id, recurser=recurser)
+
+        groups = []
+        by_type = dict()
+        for obj_id, count, size in self._index.values():
+            if count < 2:
+                continue
+            obj = recurser.objects[obj_id]
+            name = "None" if obj is None else type(obj).__name__
+            savings = (count - 1) * size
+            groups.append(DuplicateGroup(type=name, count=count, size=size, savings=savings, value=obj))
+            by_type[name] = by_type.get(name, 0) + savings
+
+        return Duplicates(savings=sum(by_type.values()),
+                          by_type=dict(sorted(by_type.items(), key=lambda item: (-item[1], item[0]))),
+                          groups=sorted(groups, key=lambda group: -group.savings),
+                          complete=not self._evicted)
@@ -0,0 +1,47 @@
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.task_base import RecursionTask
+
+
+class IndexTask(RecursionTask):
+    """
+    Builds a queryable index (GraphIndex) of the graph recorded by the recursion system.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def __init__(self, keep_objects=True):
+        """
+        :param bool keep_objects: Keep references to the objects, so queries can return them.
+        """
+        super().__init__()
+        self.keep_objects = keep_objects
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: GraphIndex
+        """
+        # Indices are numpy-based, so numpy is only imported when needed
+        from object_recursion.graph_index import GraphIndex
+        return GraphIndex.from_recurser(recurser, *args, keep_objects=self.keep_objects)
@@ -1,12 +1,57 @@
 from itertools import product
 
-import numpy as np
 from object_recursion.tasks import SizeTask
 
+from object_recursion.numpy_support import numpy
 from object_recursion.object_recursion import ObjectRecursion
 from object_recursion.task_base import WrapUpTask
 
 
+class OverlapMatrix:
+    """
+    Square matrix of sizes, which is the result of SizeComparisonTask when numpy is not installed.
+    Elements are accessed like in numpy, fx. matrix[0, 1].
+    """
+    def __init__(self, rows):
+        """
+        :param [list] rows: Elements of each row.
+        """
+        self._rows = rows
+
+    @classmethod
+    def empty(cls, n_rows):
+        return cls([[float("nan")] * n_rows for _ in range(n_rows)])
+
+    @property
+    def shape(self):
+        return len(self._rows), len(self._rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, tuple):
+            row, column = item
+            return self._rows[row][column]
+        return list(self._rows[item])
+
+    def __setitem__(self, item, value):
+        row, column = item
+        self._rows[row][column] = value
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return (list(row) for row in self._rows)
+
+    def __repr__(self):
+        return f"OverlapMatrix({self._rows!r})"
+
+    def diagonal(self):
+        return [row[nr] for nr, row in enumerate(self._rows)]
+
+    def tolist(self):
+        return [list(row) for row in self._rows]
+
+
 class SizeComparisonTask(WrapUpTask):
     def __init__(self, terminate_at=None, word_size=8):
         super().__init__([SizeTask(terminate_at=terminate_at, word_size=word_size)])
@@ -37,13 +82,43 @@ class SizeComparisonTask(WrapUpTask):
         return visited
 
     def get_size(self, obj_id, size_task):
-        size = size_task.get_size(obj_id)
+        return size_task.get_size(obj_id)
 
-        # Check if size is a size-tuple (fx key-value-pair sizes)
-        if isinstance(size, tuple):
-            size = sum(size)
+    def shared_size(self, descendants1, descendants2, recurser, size_task):
+        """
+        Size of the objects shared by two objects, where shared objects contained in other shared objects are only
+        counted once.
+        :param set descendants1: IDs of the descendants of the first object.
+        :param set descendants2: IDs of the descendants of the second object.
+        :param ObjectRecursion recurser:
+        :param SizeTask size_task:
+        :return: int
+        """
+        # Shared descendants
+        shared = descendants1.intersection(descendants2)  # type: set
+
+        # Remove objects contained in other objects (to avoid counting objects twice). Objects remove all their shared
+        # descendants, and the largest objects go first, so of objects in a loop the one entered by the recursion is kept
+        kept = set()
+        contained = set()
+        for obj_id in sorted(shared, key=lambda shared_id: self.get_size(obj_id=shared_id, size_task=size_task),
+                             reverse=True):
+            if obj_id in contained:
+                continue
+            descendants = shared.intersection(self._flatten_trees(obj_id, [recurser.container_children,
+                                                                            recurser.reference_children]))
+            descendants.discard(obj_id)
+            contained.update(descendants)
+            kept.difference_update(descendants)
+            kept.add(obj_id)
+        shared = kept
+
+        # Shared size
+        shared_size = 0
+        for obj_id in shared:
+            shared_size += self.get_size(obj_id=obj_id, size_task=size_task)
 
-        return size
+        return shared_size
 
     def wrap_up(self, recurser, *args):
         """
@@ -62,7 +137,8 @@ class SizeComparisonTask(WrapUpTask):
         obj_ids = args
 
         # Matrix with size comparison
-        m_sizes = np.ones((n_objects, n_objects)) * np.nan
+        np = numpy()
+        m_sizes = OverlapMatrix.empty(n_objects) if np is None else np.ones((n_objects, n_objects)) * np.nan
 
         # Get reference trees
         trees = [recurser.container_children, recurser.reference_children]
@@ -87,46 +163,9 @@ class SizeComparisonTask(WrapUpTask):
                 m_sizes[obj1_nr, obj2_nr] = actual_sizes[obj1_nr]
                 continue
 
-            # Shared descendants
-            shared = descendants[obj1_id].intersection(descendants[obj2_id])  # type: set
-
-            # Remove objects contained in other objects (to avoid counting objects twice)
-            pruning = True
-            while pruning:
-                pruning = False
-
-                # Get all children of each object and remove from shared
-                for obj_id in shared:
-
-                    # Get children
-                    children = set()
-                    if obj_id in recurser.container_children:
-                        children.update(set(recurser.container_children[obj_id]))
-                    if obj_id in recurser.reference_children:
-                        children.update(set(recurser.reference_children[obj_id]))
-
-                    # Avoid removing self
-                    children.difference_update([obj_id])
-
-                    # Get objects to remove
-                    for_removal = shared.intersection(children)
-
-                    # Check if any objects are to be removed
-                    if for_removal:
-                        # Get only children in shared
-                        shared.difference_update(for_removal)
-
-                        # Still pruning
-                        pruning = True
-                        break
-
             # Shared size
-            shared_size = 0
-            for obj_id in shared:
-                shared_size += self.get_size(obj_id=obj_id, size_task=size_task)
-
-            # Store in matrix
-            m_sizes[obj1_nr, obj2_nr] = shared_size
+            m_sizes[obj1_nr, obj2_nr] = self.shared_size(descendants[obj1_id], descendants[obj2_id],
+                                                         recurser=recurser, size_task=size_task)
 
         return m_sizes
 
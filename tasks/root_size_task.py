@@ -0,0 +1,115 @@
+from array import array
+from collections import namedtuple
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.numpy_support import numpy
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.task_base import RecursionTask
+
+# Sizes of many roots
+RootSizes = namedtuple("RootSizes", "inclusive, exclusive, attributed")
+
+
+class RootSizeTask(RecursionTask):
+    """
+    Sizes of the recursed objects, where objects reachable from several of them are attributed according to a policy
+    (see GraphSnapshot.root_sizes()). With numpy the sizes are computed on a snapshot of the recorded graph, and
+    otherwise directly on the recorded graph, with array.arrays instead of numpy-arrays.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def __init__(self, attribution="first"):
+        """
+        :param str attribution: Attribution of objects reachable from several of the recursed objects.
+            "first"         :   To the first object reaching it.
+            "proportional"  :   Split evenly between all objects reaching it.
+            "all"           :   To all objects reaching it.
+        """
+        super().__init__()
+        if attribution not in ("first", "proportional", "all"):
+            raise ValueError(f"Unknown attribution: {attribution}")
+        self.attribution = attribution
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    @staticmethod
+    def _reachable(root_id, recurser):
+        """
+        IDs of the objects reachable from a root (including the root), breadth-first.
+        """
+        reached = [root_id]
+        seen = {root_id}
+        container_children = recurser.container_children
+        reference_children = recurser.reference_children
+        for obj_id in reached:
+            for children in (container_children.get(obj_id, ()), reference_children.get(obj_id, ())):
+                for child_id in children:
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        reached.append(child_id)
+        return reached
+
+    def _python_root_sizes(self, recurser, root_ids):
+        sizes = dict()
+        n_owners = dict()
+        first_owner = dict()
+        reached_by_root = []
+        inclusive = array("q")
+        for root_nr, root_id in enumerate(root_ids):
+            reached = self._reachable(root_id, recurser)
+            for obj_id in reached:
+                if obj_id not in sizes:
+                    sizes[obj_id] = recurser.shallow_size(recurser.objects[obj_id])
+                    first_owner[obj_id] = root_nr
+                n_owners[obj_id] = n_owners.get(obj_id, 0) + 1
+            inclusive.append(sum(sizes[obj_id] for obj_id in reached))
+            reached_by_root.append(reached)
+
+        # Objects with a single owner
+        exclusive = array("q", [0] * len(root_ids))
+        for obj_id, n_obj_owners in n_owners.items():
+            if n_obj_owners == 1:
+                exclusive[first_owner[obj_id]] += sizes[obj_id]
+
+        if self.attribution == "first":
+            attributed = array("q", [0] * len(root_ids))
+            for obj_id, root_nr in first_owner.items():
+                attributed[root_nr] += sizes[obj_id]
+        elif self.attribution == "proportional":
+            attributed = array("d", [sum(sizes[obj_id] / n_owners[obj_id] for obj_id in reached)
+                                     for reached in reached_by_root])
+        else:
+            attributed = array("q", inclusive)
+
+        return RootSizes(inclusive=inclusive, exclusive=exclusive, attributed=attributed)
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: RootSizes
+        """
+        if numpy() is None:
+            return self._python_root_sizes(recurser, args)
+
+        # Snapshots are numpy-based, so they are only imported when numpy is installed
+        from object_recursion.snapshot import GraphSnapshot
+        snapshot = GraphSnapshot.from_recurser(recurser, *args)
+        return snapshot.root_sizes(nodes=snapshot.node_indices(list(args)), attribution=self.attribution)
@@ -1,10 +1,10 @@
 import sys
 from collections import namedtuple
+from itertools import chain
 from typing import Tuple, Iterable, Dict
-import numpy as np
 
 from object_recursion.object_recursion import ObjectRecursion
-from object_recursion.task_base import TreeRecursionTask
+from object_recursion.task_base import TreeRecursionTask, FinishHook
 
 
 def _dprint_indent(string, verbose):
@@ -12,7 +12,22 @@ def _dprint_indent(string, verbose):
         print("  " * verbose + string)
 
 
+# Kinds of objects in batches
+_Leaf = 0
+_Plain = 1
+_Container = 2
+_Handled = 3
+
+
 class SizeTask(TreeRecursionTask):
+    """
+    Computes the memory-consumption of objects, counting each object once per recursed object.
+    Finished objects are received in batches. Objects without handlers, whose children are all concluded, are
+    concluded directly, while handled objects are concluded by _finish_object(). Objects with children which are not
+    concluded (in loops) are concluded by _finish_object() on the recursed object, once it is finished, so loops are
+    always entered the same way as the recursion system entered them.
+    """
+    hooks = (FinishHook,)
 
     # Order of container-types matters!
     @property
@@ -40,8 +55,14 @@ class SizeTask(TreeRecursionTask):
         self._already_counted = None  # type: set
         self._current_path = None  # type: list
 
+        # Kind of the objects of each type-code of a recursion
+        self._kinds = None  # type: dict
+
+        # Objects of the current recursed object, which are concluded when it is finished
+        self._deferred = None  # type: list
+
         # Termination markers
-        _terminate_at = ObjectRecursion.BaseTerminators
+        _terminate_at = list(ObjectRecursion.BaseTerminators)
         if terminate_at is not None:
             if isinstance(terminate_at, (list, tuple)):
                 _terminate_at += list(terminate_at)
@@ -49,6 +70,10 @@ class SizeTask(TreeRecursionTask):
                 _terminate_at.append(terminate_at)
         self._terminate_at = tuple(set(_terminate_at))
 
+        # Terminators of the user, which take precedence over handlers
+        self._user_terminate_at = tuple(val for val in self._terminate_at
+                                        if val not in ObjectRecursion.BaseTerminators)
+
     def enter_object(self, *, obj, edge, parent, recurser):
         pass
 
@@ -61,10 +86,87 @@ class SizeTask(TreeRecursionTask):
         self._object_conclusion = dict()
         self._current_path = []
         self._already_counted = set()
+        self._kinds = dict()
+        self._deferred = []
+
+    def _handler_for(self, obj, recurser):
+        if self._user_terminate_at and isinstance(obj, self._user_terminate_at):
+            return None
+        return recurser.handler_for(obj)
 
-    def _note_object_finished(self, *, obj_id, obj, edge, parent, recurser):
-        # Note that this size has been returned
+    def _kind(self, obj, recurser):
+        if self._handler_for(obj, recurser) is not None:
+            return _Handled
+        if self.terminate(obj):
+            return _Leaf
+        if isinstance(obj, (Dict, Iterable)) and recurser.iteration_policy.iterable(obj):
+            return _Container
+        return _Plain
+
+    def finish_batch(self, batch, recurser):
+        conclusions = self._object_conclusion
+        counted = self._already_counted
+        kinds = self._kinds
+        objects = recurser.objects
+        container_children = recurser.container_children
+        reference_children = recurser.reference_children
+
+        for obj_id, type_code in zip(batch.ids, batch.type_codes):
+            if obj_id in conclusions:
+                continue
+            obj = objects[obj_id]
+            kind = kinds.get(type_code)
+            if kind is None:
+                kind = kinds[type_code] = self._kind(obj, recurser)
+
+            if kind == _Leaf:
+                conclusions[obj_id] = sys.getsizeof(obj)
+                continue
+
+            # Unprocessed containers are recursed by _finish_object()
+            if kind == _Container and obj_id not in container_children:
+                self._finish_object(obj_id=obj_id, edge=None, parent=None, recurser=recurser)
+                continue
+
+            # Sum of children, if they are all concluded (children already counted add nothing)
+            size = sys.getsizeof(obj)
+            added = []
+            for child in chain(container_children.get(obj_id, ()), reference_children.get(obj_id, ())):
+                if child in counted:
+                    continue
+                child_size = conclusions.get(child)
+                if child_size is None:
+                    counted.difference_update(added)
+                    self._deferred.append(obj_id)
+                    break
+                size += child_size
+                counted.add(child)
+                added.append(child)
+            else:
+                if kind == _Handled:
+                    counted.difference_update(added)
+                    self._finish_object(obj_id=obj_id, edge=None, parent=None, recurser=recurser)
+                else:
+                    conclusions[obj_id] = size
+
+        # The recursed object is the last object finished, and it is an ancestor of all deferred objects
+        if self._deferred and not recurser._active:
+            self._finish_object(obj_id=self._deferred[-1], edge=None, parent=None, recurser=recurser)
+            self._deferred = []
+
+    def _child_size(self, *, obj_id, edge, parent, recurser):
+        """
+        Size added to a parent by a child. The size of each object is added to a single parent per recursed object,
+        and objects on the current path (loops) are added by their own parents.
+        :param int obj_id: ID of the child.
+        :param ObjectRecursion recurser: Recursive search system.
+        :return: int
+        """
+        if obj_id in self._already_counted or obj_id in self._current_path:
+            return 0
+        size = self._finish_object(obj_id=obj_id, edge=edge, parent=parent, recurser=recurser)
         self._already_counted.add(obj_id)
+        return size
 
     def get_conclusion(self, obj_id, recurser=None, include_pointer=False):
         # If object has already been observed
@@ -77,7 +179,7 @@ class SizeTask(TreeRecursionTask):
 
         # Otherwise estimate size
         else:
-            size = sys.getsizeof(recurser.objects[obj_id])
+            size = recurser.shallow_size(recurser.objects[obj_id])
 
         # Add pointer
         if include_pointer:
@@ -88,37 +190,18 @@ class SizeTask(TreeRecursionTask):
     def get_size(self, obj_id):
         return self._object_conclusion[obj_id]
 
-    def _finish_key_val_pair(self, obj_id, recurser):
-        """
-        :param int obj_id: ID of object
-        :param ObjectRecursion recurser: Recursive search system.
-        """
-        # Get info
-        obj = recurser.objects[obj_id]
-
-        # Key and value keys
-        key_id, value_id = recurser.container_children[obj_id]
-
-        # Get objects
-        key = recurser.objects[key_id]
-        value = recurser.objects[value_id]
-
-        # Sizes (check if used before)
-        key_size = value_size = 0
-        if key_id not in self._already_counted:
-            key_size = self._finish_object(obj_id=key_id, edge=Dict, parent=obj_id, recurser=recurser)
-        if value_id not in self._already_counted:
-            value_size = self._finish_object(obj_id=value_id, edge=Dict, parent=obj_id, recurser=recurser)
-
-        # Note object-representation
-        self._object_conclusion[obj_id] = (key_size, value_size)
-        return key_size, value_size
-
     def terminate(self, obj):
         return isinstance(obj, self._terminate_at)
 
     def _termination_conclusion(self, *, obj_id, obj, edge, parent, recurser):
-        if self.terminate(obj):
+        # Handlers of types decide termination themselves (unless the user terminates the object)
+        handler = self._handler_for(obj, recurser)
+        if handler is not None:
+            terminate = handler.terminate(obj)
+        else:
+            terminate = self.terminate(obj)
+
+        if terminate:
             return True, self.get_conclusion(obj_id=obj_id, recurser=recurser)  # sys.getsizeof(obj)
         else:
             return False, None
@@ -143,7 +226,8 @@ class SizeTask(TreeRecursionTask):
         return False
 
     def _ensure_processed(self, obj_id, obj, recurser, edge, parent):
-        if (isinstance(obj, Dict) or isinstance(obj, Iterable)) and obj_id not in recurser.container_children:
+        if (isinstance(obj, Dict) or isinstance(obj, Iterable)) and obj_id not in recurser.container_children \
+                and recurser.iteration_policy.iterable(obj):
             recurser._recurse(obj, obj_id, edge=edge, parent=parent)
 
     def _non_termination_conclusion(self, *, obj_id, obj, edge, parent, recurser):
@@ -152,32 +236,23 @@ class SizeTask(TreeRecursionTask):
         # Return conclusion
         size = self.get_conclusion(obj_id=obj_id, recurser=recurser, include_pointer=include_pointer)
 
+        # Children of handled objects are noted as references, so they are not treated as containers
+        container = recurser.handler_for(obj) is None
+
         # TODO: This is not an elegant solution, but it seems to fix a bug
-        self._ensure_processed(obj_id=obj_id, obj=obj, recurser=recurser, edge=edge, parent=parent)
-
-        # Dictionaries - add size of keys and values
-        if isinstance(obj, Dict):
-            try:
-                if len(recurser.container_children[obj_id]) > 0:
-                    inside_objects = recurser.container_children[obj_id]
-
-                    # Split keys and values
-                    inside_objects = list(zip(*[self._finish_key_val_pair(obj_id=val, recurser=recurser)
-                                                for val in inside_objects]))
-                    key_sizes, value_sizes = inside_objects
-
-                    # Add
-                    size += int(sum(key_sizes) + sum(value_sizes))
-            except KeyError as e:
-                raise e
-
-        # If object is iterable - go through contained objects
-        elif isinstance(obj, Iterable):
+        if container:
+            self._ensure_processed(obj_id=obj_id, obj=obj, recurser=recurser, edge=edge, parent=parent)
+
+        # Iterables which are not iterated (fx. iterators) have no children
+        container = container and obj_id in recurser.container_children
+
+        # If object is iterable - go through contained objects (keys and values for dictionaries)
+        if container and isinstance(obj, Iterable):
             if len(recurser.container_children[obj_id]) > 0:
                 inside_objects = recurser.container_children[obj_id]
 
                 # Finish insides and compute size
-                size += int(sum([self._finish_object(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
+                size += int(sum([self._child_size(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
                                  for child in inside_objects]))
 
         # Custom objects
@@ -187,7 +262,7 @@ class SizeTask(TreeRecursionTask):
                 referenced_objects = recurser.reference_children[obj_id]
                 the_edge = ObjectRecursion.ClassDict
 
-                size += int(sum([self._finish_object(obj_id=child, edge=the_edge, parent=obj_id, recurser=recurser)
+                size += int(sum([self._child_size(obj_id=child, edge=the_edge, parent=obj_id, recurser=recurser)
                                  for child in referenced_objects]))
 
         return size
@@ -196,6 +271,8 @@ class SizeTask(TreeRecursionTask):
 if __name__ == "__main__":
     import re
 
+    import numpy as np
+
     try:
         from pympler.asizeof import asizeof
     except ImportError:
@@ -0,0 +1,40 @@
+from typing import Tuple, Dict, Iterable
+
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.task_base import RecursionTask
+
+
+class SnapshotTask(RecursionTask):
+    """
+    Takes a compact snapshot of the graph recorded by the recursion system, which holds no live objects.
+    """
+    # Only works on the graph recorded by the recursion system, in wrap_up()
+    hooks = ()
+
+    @property
+    def interests(self):
+        return (Tuple,
+                Dict,
+                Iterable,
+                ObjectRecursion.ClassDict,
+                ObjectRecursion.ClassSlots
+                )
+
+    def initialize(self):
+        pass
+
+    def enter_object(self, *, obj, edge, parent, recurser):
+        pass
+
+    def _finish_object(self, *, obj_id, edge, parent, recurser):
+        pass
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args: IDs of recursed objects.
+        :return: GraphSnapshot
+        """
+        # Snapshots are numpy-based, so numpy is only imported when needed
+        from object_recursion.snapshot import GraphSnapshot
+        return GraphSnapshot.from_recurser(recurser, *args)
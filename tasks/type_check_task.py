@@ -2,32 +2,51 @@ from collections import namedtuple
 from numbers import Number
 from typing import Tuple, Dict, Iterable, Callable
 
-import numpy as np
-
+from object_recursion.numpy_support import NDArray
 from object_recursion.object_recursion import ObjectRecursion
-from object_recursion.task_base import TreeRecursionTask
-
+from object_recursion.task_base import TreeRecursionTask, FinishHook
+from object_recursion.type_signature import TypeSignature
 
-# TODO: Do time-comparison between rtype and ContainerTreePrintTask/ObjectRecurser
+# Kinds of objects in batches
+_Leaf = 0
+_Sequence = 1
+_Mapping = 2
+_Container = 3
+_Other = 4
 
 
 class TypeCheckTask(TreeRecursionTask):
+    """
+    Computes the type-signatures of objects. Finished objects are received in batches, where leaves and containers
+    whose children are all concluded are concluded directly (the kind of object is determined once per type), while
+    all other objects are concluded by _finish_object().
+    """
+    hooks = (FinishHook,)
+
     @property
     def interests(self):
         return (Tuple,
                 Dict,
-                np.ndarray,
+                NDArray,
                 Iterable
                 )
 
     def __init__(self, delimiter="[", or_divider="|", and_divider=",", map_divider=": ",
-                 numpy_notation="np dim"):
+                 numpy_notation="np dim", output="str"):
+        """
+        :param str output: Output of the task.
+            "str": String representation, fx. "list[int|str]".
+            "signature": The TypeSignature itself.
+            "typing": typing-objects, fx. list[typing.Union[int, str]].
+            "json": JSON-serializable dictionaries.
+        """
         super().__init__()
         self.delimiter = delimiter
         self.or_divider = or_divider
         self.and_divider = and_divider
         self.map_divider = map_divider
         self.numpy_notation = numpy_notation
+        self.output = output
 
         # Conversions
         self.l, self.r = self._delimiter_types(delimiter=delimiter)
@@ -35,12 +54,71 @@ class TypeCheckTask(TreeRecursionTask):
         # Results on objects
         self._object_conclusion = None
 
+        # Kind of the objects of each type-code of a recursion, and the signature of leaves
+        self._kinds = None  # type: dict
+
     def enter_object(self, *, obj, edge, parent, recurser):
         pass
 
     def initialize(self):
         self._object_conclusion = dict()
         self._current_path = []
+        self._kinds = dict()
+
+    def _kind(self, obj, recurser):
+        """
+        Kind of an object (in the order of _non_termination_conclusion()), and its signature if it is a leaf.
+        """
+        terminate, leaf = self._termination_conclusion(obj_id=id(obj), obj=obj, edge=None, parent=None,
+                                                       recurser=recurser)
+        if terminate:
+            return _Leaf, leaf
+        if isinstance(obj, Callable):
+            return _Other, None
+        if isinstance(obj, Tuple):
+            return _Sequence, None
+        if isinstance(obj, Dict):
+            return _Mapping, None
+        if isinstance(obj, Iterable) and not isinstance(obj, NDArray):
+            return _Container, None
+        return _Other, None
+
+    def finish_batch(self, batch, recurser):
+        conclusions = self._object_conclusion
+        kinds = self._kinds
+        objects = recurser.objects
+        container_children = recurser.container_children
+        for obj_id, type_code in zip(batch.ids, batch.type_codes):
+            if obj_id in conclusions:
+                continue
+            kind = kinds.get(type_code)
+            if kind is None:
+                kind = kinds[type_code] = self._kind(objects[obj_id], recurser)
+            kind, leaf = kind
+
+            if kind == _Leaf:
+                conclusions[obj_id] = leaf
+                continue
+
+            # Containers whose children are all concluded
+            children = container_children.get(obj_id) if kind != _Other else None
+            if children is not None:
+                insides = [conclusions.get(child) for child in children]
+                if None not in insides:
+                    obj_type = type(objects[obj_id])
+                    if kind == _Sequence:
+                        conclusion = TypeSignature.sequence(obj_type.__name__, obj_type, insides)
+                    elif kind == _Mapping:
+                        conclusion = TypeSignature.mapping(obj_type.__name__, obj_type, set(insides[0::2]),
+                                                           set(insides[1::2]))
+                    else:
+                        conclusion = TypeSignature.container(obj_type.__name__, obj_type, set(insides))
+                    if obj_id in recurser.sampled_containers:
+                        conclusion = TypeSignature.sampled(conclusion)
+                    conclusions[obj_id] = conclusion
+                    continue
+
+            self._finish_object(obj_id=obj_id, edge=None, parent=None, recurser=recurser)
 
     @staticmethod
     def _delimiter_types(delimiter="["):
@@ -58,87 +136,50 @@ class TypeCheckTask(TreeRecursionTask):
         :param int obj_id:
         :param str obj_name:
         :param ObjectRecursion recurser:
-        :return:
-        """
-        # Collect insides
-        inside = ""
-        if len(recurser.container_children[obj_id]) > 0:
-            inside_objects = recurser.container_children[obj_id]
-
-            # Split keys and values
-            inside_objects = list(zip(*[self._finish_key_val_pair(val, recurser=recurser) for val in inside_objects]))
-            keys, values = inside_objects
-            keys = set(keys)
-            values = set(values)
-
-            # Make insides string
-            inside = self.l + self.or_divider.join(keys) + self.map_divider + self.or_divider.join(values) + self.r
-
-        # Final string
-        return obj_name + inside
-
-    def _finish_key_val_pair(self, obj_id, recurser):
-        """
-        :param int obj_id:
-        :param ObjectRecursion recurser:
-        :return:
+        :return: TypeSignature
         """
+        # Keys and values alternate
+        children = recurser.container_children[obj_id]
+        keys = set([self._finish_object(obj_id=child, edge=ObjectRecursion.DictKey, parent=obj_id, recurser=recurser)
+                    for child in children[0::2]])
+        values = set([self._finish_object(obj_id=child, edge=ObjectRecursion.DictValue, parent=obj_id,
+                                          recurser=recurser)
+                      for child in children[1::2]])
 
-        # Get info
-        obj = recurser.objects[obj_id]
-
-        # Split pair
-        key, value = obj
-
-        # Representation
-        key_representation = self._finish_object(obj_id=id(key), edge=Dict, parent=obj_id, recurser=recurser)
-        value_representation = self._finish_object(obj_id=id(value), edge=Dict, parent=obj_id, recurser=recurser)
-
-        # Note object-representation
-        self._object_conclusion[obj_id] = (key_representation, value_representation)
-        return key_representation, value_representation
+        return TypeSignature.mapping(obj_name, type(recurser.objects[obj_id]), keys, values)
 
     def _finish_iterable(self, obj_id, obj_name, recurser):
         """
         :param int obj_id:
         :param str obj_name:
         :param ObjectRecursion recurser:
-        :return:
+        :return: TypeSignature
         """
-        return obj_name + self._finish_iterable_insides(obj_id=obj_id, recurser=recurser)
+        return TypeSignature.container(obj_name, type(recurser.objects[obj_id]),
+                                       self._finish_iterable_insides(obj_id=obj_id, recurser=recurser))
 
     def _finish_iterable_insides(self, obj_id, recurser):
         """
         :param int obj_id:
         :param ObjectRecursion recurser:
-        :return:
+        :return: set
         """
-        # Collect insides
-        inside = ""
-        if len(recurser.container_children[obj_id]) > 0:
-            inside_objects = recurser.container_children[obj_id]
-
-            # Finish insides
-            inside_objects = set([self._finish_object(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
-                                  for child in inside_objects])
-
-            inside = self.l + self.or_divider.join(inside_objects) + self.r
-
-        # Final string
-        return inside
+        # Signatures are interned, so the set compares by identity
+        return set([self._finish_object(obj_id=child, edge=Iterable, parent=obj_id, recurser=recurser)
+                    for child in recurser.container_children[obj_id]])
 
     def _finish_numpy(self, obj_id, obj_name, recurser):
         """
         :param int obj_id:
         :param str obj_name:
         :param ObjectRecursion recurser:
-        :return:
+        :return: TypeSignature
         """
         insides = self._finish_iterable_insides(obj_id=obj_id, recurser=recurser)
 
         # Remove underscores in numpy
         if "keep_" not in self.numpy_notation:
-            insides = insides.replace("_", "")
+            insides = [val.renamed(lambda name: name.replace("_", "")) for val in insides]
 
         # Insert numpy-marker
         if "np" in self.numpy_notation:
@@ -148,35 +189,22 @@ class TypeCheckTask(TreeRecursionTask):
         if "dim" in self.numpy_notation:
             obj_name = obj_name.replace("ndarray", "{}darray".format(len(recurser.objects[obj_id].shape)))
 
-        # Final string
-        return obj_name + insides
+        return TypeSignature.container(obj_name, type(recurser.objects[obj_id]), insides)
 
     def _finish_tuple(self, obj_id, obj_name, recurser):
         """
         :param int obj_id:
         :param str obj_name:
         :param ObjectRecursion recurser:
-        :return:
+        :return: TypeSignature
         """
-        # Collect insides
-        inside = ""
-        if len(recurser.container_children[obj_id]) > 0:
-            inside_objects = recurser.container_children[obj_id]
-
-            # Finish insides
-            inside_objects = [self._finish_object(obj_id=child, edge=Tuple, parent=obj_id, recurser=recurser)
-                              for child in inside_objects]
+        inside_objects = [self._finish_object(obj_id=child, edge=Tuple, parent=obj_id, recurser=recurser)
+                          for child in recurser.container_children[obj_id]]
 
-            inside = self.l + self.and_divider.join(inside_objects) + self.r
-
-        # Final string
-        return obj_name + inside
+        return TypeSignature.sequence(obj_name, type(recurser.objects[obj_id]), inside_objects)
 
     def _stop_recursion_conclusion(self, *, obj_id, obj, edge, parent, recurser):
-        # Extract name
-        obj_name = self._extract_name(obj)
-
-        return obj_name + self.l + ".." + self.r
+        return TypeSignature.loop(self._extract_name(obj), type(obj))
 
     @staticmethod
     def _extract_name(obj):
@@ -184,7 +212,7 @@ class TypeCheckTask(TreeRecursionTask):
 
     def _termination_conclusion(self, *, obj_id, obj, edge, parent, recurser):
         if isinstance(obj, (str, bool, Number, int, float, complex)):
-            return True, self._extract_name(obj=obj)
+            return True, TypeSignature.leaf(self._extract_name(obj=obj), type(obj))
         else:
             return False, None
 
@@ -194,31 +222,58 @@ class TypeCheckTask(TreeRecursionTask):
 
         # Objects with direct representation
         if isinstance(obj, Callable):
-            conclusion = "{}()".format(obj.__name__)
+            conclusion = TypeSignature.leaf("{}()".format(obj.__name__), type(obj))
 
         # Unknown container
         elif obj_id not in recurser.container_children:
-            conclusion = obj_name
+            conclusion = TypeSignature.leaf(obj_name, type(obj))
 
         # Containers
         elif isinstance(obj, Tuple):
             conclusion = self._finish_tuple(obj_id=obj_id, obj_name=obj_name, recurser=recurser)
         elif isinstance(obj, Dict):
             conclusion = self._finish_dict(obj_id=obj_id, obj_name=obj_name, recurser=recurser)
-        elif isinstance(obj, np.ndarray):
+        elif isinstance(obj, NDArray):
             conclusion = self._finish_numpy(obj_id=obj_id, obj_name=obj_name, recurser=recurser)
         elif isinstance(obj, Iterable):
             conclusion = self._finish_iterable(obj_id=obj_id, obj_name=obj_name, recurser=recurser)
 
         # Everything else
         else:
-            conclusion = obj_name
+            conclusion = TypeSignature.leaf(obj_name, type(obj))
+
+        # Containers whose children were not all visited
+        if obj_id in recurser.sampled_containers:
+            conclusion = TypeSignature.sampled(conclusion)
 
         return conclusion
 
+    def render(self, signature):
+        """
+        Renders a type-signature according to the output-setting of the task.
+        :param TypeSignature signature:
+        :return: str | TypeSignature | type | dict
+        """
+        if self.output == "str":
+            return signature.to_string(l=self.l, r=self.r, or_divider=self.or_divider,
+                                       and_divider=self.and_divider, map_divider=self.map_divider)
+        elif self.output == "signature":
+            return signature
+        elif self.output == "typing":
+            return signature.to_typing()
+        elif self.output == "json":
+            return signature.to_json()
+        raise ValueError(f"Unknown output: {self.output}")
+
+    def wrap_up(self, recurser, *args):
+        return [self.render(signature) for signature in super().wrap_up(recurser, *args)]
+
 
 if __name__ == "__main__":
     import re
+    import time
+
+    import numpy as np
 
     # For making prints one-liners
     whitespace = re.compile("[\s\n]+")
@@ -276,3 +331,15 @@ if __name__ == "__main__":
     for obj in items:
         print(formatter.format(whitespace.sub(" ", repr(obj)),
                                the_recurser.recurse(obj)[0][0]))
+
+    # Time of the batch-protocol, compared to finishing each object by itself
+    class PerObjectTypeCheckTask(TypeCheckTask):
+        hooks = None
+
+    records = [{"id": nr, "name": f"record-{nr}", "score": nr / 7, "tags": ["a", "b"]} for nr in range(100000)]
+    print()
+    for task_class in [PerObjectTypeCheckTask, TypeCheckTask]:
+        start = time.perf_counter()
+        signature = ObjectRecursion(tasks=[task_class()]).recurse(records)[0][0]
+        print(f"{task_class.__name__ + ':':<25} {time.perf_counter() - start:.2f}s for {len(records)} records of type "
+              f"{signature}")
@@ -0,0 +1,49 @@
+from object_recursion.object_recursion import ObjectRecursion
+from object_recursion.tasks.size_task import SizeTask
+
+
+class TypeSizeTask(SizeTask):
+    """
+    SizeTask which additionally breaks the memory-consumption of each object down into the types of the objects
+    referenced. Each object is counted once per recursed object.
+    """
+    def __init__(self, terminate_at=None, word_size=8):
+        super().__init__(terminate_at=terminate_at, word_size=word_size)
+
+        # Objects counted for each of the recursed objects
+        self._counted_per_object = None  # type: list
+
+    def initialize(self):
+        super().initialize()
+        self._counted_per_object = []
+
+    def intermediate_initialize(self):
+        self._counted_per_object.append(self._already_counted)
+        super().intermediate_initialize()
+
+    def _type_sizes(self, counted, recurser):
+        """
+        :param set counted: IDs of objects counted for a single recursed object.
+        :param ObjectRecursion recurser:
+        :return: dict
+        """
+        # Sum sizes of each type
+        type_sizes = dict()
+        for obj_id in counted:
+            obj = recurser.objects[obj_id]
+            name = "None" if obj is None else type(obj).__name__
+            type_sizes[name] = type_sizes.get(name, 0) + recurser.shallow_size(obj)
+
+        # Largest types first
+        return dict(sorted(type_sizes.items(), key=lambda item: (-item[1], item[0])))
+
+    def wrap_up(self, recurser, *args):
+        """
+        :param ObjectRecursion recurser:
+        :param args:
+        :return: [dict]
+        """
+        # Counted objects are the objects added to their parents, so the recursed objects themselves are added
+        counted_per_object = self._counted_per_object + [self._already_counted]
+        return [self._type_sizes(counted=counted | {obj_id}, recurser=recurser)
+                for counted, obj_id in zip(counted_per_object, args)]
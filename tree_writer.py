@@ -0,0 +1,184 @@
+import re
+import reprlib
+from array import array
+from collections import deque
+from collections.abc import Sized
+from itertools import islice
+
+from object_recursion.iteration import IterationPolicy
+from object_recursion.object_recursion import ObjectRecursion
+
+
+class ContainerTreeWriter:
+    """
+    Writes the recursive tree of a container-object to a file, one line per node.
+    Unlike ContainerTreePrintTask, the full tree is never held in memory and the label of a node never contains the
+    representation of its whole sub-tree, so trees of very large objects can be written.
+    """
+    def __init__(self, max_depth=None, max_children=None, label_length=80, indent="  ", iteration_policy=None):
+        """
+        :param int max_depth: Nodes deeper than this are not written. The root has depth 0.
+        :param int max_children: Maximum number of children written for each node.
+        :param int label_length: Maximum length of the label of a node.
+        :param str indent: Indentation of each level in the tree.
+        :param IterationPolicy iteration_policy: Decides which iterables are iterated. Defaults to only iterating
+            materialized containers (lists, tuples, sets, dicts etc.).
+        """
+        self.max_depth = max_depth
+        self.max_children = max_children
+        self.label_length = label_length
+        self.indent = indent
+        self.iteration_policy = IterationPolicy() if iteration_policy is None else iteration_policy
+        self.whitespace = re.compile(r"[\s\n]+")
+
+        # Bounded representations, which only show the first level of containers
+        self._repr = _BoundedRepr()
+        self._repr.maxlevel = 2
+        self._repr.maxstring = label_length
+        self._repr.maxother = label_length
+
+        self._terminate_at = tuple(ObjectRecursion.BaseTerminators)
+
+    def _label(self, obj):
+        if type(obj) is int:
+            label = _int_label(obj, self.label_length)
+        elif type(obj) in _plain_types:
+            label = repr(obj)
+        elif type(obj) in (str, bytes):
+            label = repr(obj[:self.label_length])
+        elif type(obj) in _builtin_containers:
+            label = self.whitespace.sub(" ", self._repr.repr(obj))
+        else:
+            label = _short_label(obj)
+        if len(label) > self.label_length:
+            label = label[:self.label_length - 3] + "..."
+        return label
+
+    def _children(self, obj):
+        """
+        Iterator over the children of a node, or None if the node is not a container.
+        """
+        if type(obj) in _plain_types or isinstance(obj, self._terminate_at):
+            return None
+        return self.iteration_policy.iterate(obj)
+
+    def write(self, obj, file):
+        """
+        Writes the tree of obj.
+        :param obj: Container to be written.
+        :param file: File-like object with a write()-method.
+        :return: int
+            Number of lines written.
+        """
+        n_lines = 0
+
+        # Stack of (children-iterator, parent) and ids of the parents (loop-avoidance)
+        stack = []
+        path = set()
+
+        node = obj
+        while True:
+            depth = len(stack)
+
+            # Write node
+            on_path = id(node) in path
+            file.write(self.indent * depth + self._label(node) + (" .." if on_path else "") + "\n")
+            n_lines += 1
+
+            # Go into children
+            children = None if on_path else self._children(node)
+            if children is not None and (self.max_depth is None or depth < self.max_depth):
+                if self.max_children is not None:
+                    children = islice(children, self.max_children)
+                stack.append((children, node))
+                path.add(id(node))
+
+            # Find next node
+            while stack:
+                children, parent = stack[-1]
+                node = next(children, _exhausted)
+                if node is not _exhausted:
+                    break
+
+                # Note left-out children
+                if self.max_children is not None and isinstance(parent, Sized) and len(parent) > self.max_children:
+                    file.write(self.indent * len(stack) + f"... ({len(parent) - self.max_children} more)\n")
+                    n_lines += 1
+
+                stack.pop()
+                path.discard(id(parent))
+
+            if not stack:
+                return n_lines
+
+
+def _short_label(obj):
+    """
+    Label of an object which is not a built-in type, which never calls the representation of the object (which may
+    represent its whole sub-tree).
+    """
+    if isinstance(obj, Sized):
+        try:
+            return f"<{type(obj).__qualname__} of length {len(obj)}>"
+        except Exception:
+            pass
+    return f"<{type(obj).__qualname__} at 0x{id(obj):x}>"
+
+
+def _int_label(obj, max_length):
+    """
+    Label of an integer. The representation of integers with more digits than fit in the label is never computed (and
+    is not possible above 4300 digits), so their label is the number of bits.
+    """
+    # Each digit holds more than 3 bits
+    if obj.bit_length() <= 3 * max_length:
+        return repr(obj)
+    return f"<int of {obj.bit_length()} bits>"
+
+
+class _BoundedRepr(reprlib.Repr):
+    """
+    Representation of built-in containers, where contained objects of other types get short labels. reprlib picks
+    methods by the name of the type, so the exact type is checked before using them.
+    Sets and dictionaries show their first elements in the order of iteration, instead of sorting the whole container.
+    """
+    def repr1(self, x, level):
+        if type(x) in _plain_types or type(x) in (str, bytes) or type(x) in _builtin_containers:
+            return super().repr1(x, level)
+        return _short_label(x)
+
+    def repr_int(self, x, level):
+        if x.bit_length() <= 3 * self.maxlong:
+            return super().repr_int(x, level)
+        return _int_label(x, self.maxlong)
+
+    def repr_set(self, x, level):
+        if not x:
+            return "set()"
+        return self._repr_iterable(x, level, "{", "}", self.maxset)
+
+    def repr_frozenset(self, x, level):
+        if not x:
+            return "frozenset()"
+        return self._repr_iterable(x, level, "frozenset({", "})", self.maxfrozenset)
+
+    def repr_dict(self, x, level):
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+        pieces = [f"{self.repr1(key, level - 1)}: {self.repr1(val, level - 1)}"
+                  for key, val in islice(dict.items(x), self.maxdict)]
+        if len(x) > self.maxdict:
+            pieces.append("...")
+        return "{" + ", ".join(pieces) + "}"
+
+
+# Marker for exhausted iterators
+_exhausted = object()
+
+# Types whose representation is short
+_plain_types = {int, float, bool, complex, type(None)}
+
+# Containers which are represented by reprlib
+_builtin_containers = {tuple, list, array, set, frozenset, deque, dict}
@@ -0,0 +1,258 @@
+import threading
+import typing
+import weakref
+
+
+class TypeSignature:
+    """
+    Immutable representation of the type of an object and the types of its contained objects.
+    Signatures are interned (hash-consed): creating a signature identical to an existing one returns the existing
+    signature. Identical sub-signatures are therefore shared, and signatures can be compared by identity.
+    Signatures are only rendered (to strings, typing-objects or JSON) when needed.
+    """
+    # Kinds of signatures
+    Leaf = "leaf"  # int
+    Loop = "loop"  # list[..]
+    Container = "container"  # list[int|str]
+    Sequence = "sequence"  # tuple[int,str]
+    Mapping = "mapping"  # dict[int: str]
+    Union = "union"  # int|str
+    Sampled = "sampled"  # ~list[int] (the contained types were sampled)
+
+    __slots__ = ("kind", "name", "python_type", "children", "__weakref__")
+
+    # Existing signatures (signatures are created from several threads, so they are interned under a lock)
+    _interned = weakref.WeakValueDictionary()
+    _interning = threading.Lock()
+
+    # Leaves are looked up often, so they are also found by their name and type (without keeping their types alive)
+    _leaves = weakref.WeakValueDictionary()
+
+    def __new__(cls, kind, name=None, python_type=None, children=()):
+        """
+        :param str kind: Kind of signature.
+        :param str name: Name of the type.
+        :param type python_type: The actual type.
+        :param tuple | frozenset children: Signatures of contained types.
+        """
+        key = (kind, name, python_type, children)
+        signature = cls._interned.get(key)
+        if signature is None:
+            signature = super().__new__(cls)
+            object.__setattr__(signature, "kind", kind)
+            object.__setattr__(signature, "name", name)
+            object.__setattr__(signature, "python_type", python_type)
+            object.__setattr__(signature, "children", children)
+
+            # Another thread may have interned an identical signature in the meantime
+            with cls._interning:
+                signature = cls._interned.setdefault(key, signature)
+        return signature
+
+    def __setattr__(self, key, value):
+        raise AttributeError("TypeSignature is immutable.")
+
+    def __repr__(self):
+        return f"TypeSignature({self.to_string()})"
+
+    def __str__(self):
+        return self.to_string()
+
+    # #########################################################################
+    # Construction
+
+    @classmethod
+    def leaf(cls, name, python_type=None):
+        signature = cls._leaves.get((name, python_type))
+        if signature is None:
+            signature = cls(cls.Leaf, name, python_type)
+            cls._leaves[(name, python_type)] = signature
+        return signature
+
+    @classmethod
+    def loop(cls, name, python_type=None):
+        return cls(cls.Loop, name, python_type)
+
+    @classmethod
+    def union(cls, members):
+        """
+        :param members: Signatures. Unions are flattened.
+        :return: TypeSignature | None
+            None if there are no members. The member itself if there is only one.
+        """
+        flattened = set()
+        for member in members:
+            if member.kind == cls.Union:
+                flattened.update(member.children)
+            else:
+                flattened.add(member)
+
+        if not flattened:
+            return None
+        if len(flattened) == 1:
+            return next(iter(flattened))
+        return cls(cls.Union, children=frozenset(flattened))
+
+    @classmethod
+    def container(cls, name, python_type, members):
+        """
+        Container with interchangeable types (fx. lists).
+        """
+        member = cls.union(members)
+        if member is None:
+            return cls.leaf(name, python_type)
+        return cls(cls.Container, name, python_type, (member,))
+
+    @classmethod
+    def sequence(cls, name, python_type, items):
+        """
+        Container with ordered types (fx. tuples).
+        """
+        items = tuple(items)
+        if not items:
+            return cls.leaf(name, python_type)
+        return cls(cls.Sequence, name, python_type, items)
+
+    @classmethod
+    def mapping(cls, name, python_type, keys, values):
+        """
+        Container mapping from one type to another (fx. dictionaries).
+        """
+        keys = cls.union(keys)
+        values = cls.union(values)
+        if keys is None or values is None:
+            return cls.leaf(name, python_type)
+        return cls(cls.Mapping, name, python_type, (keys, values))
+
+    @classmethod
+    def sampled(cls, signature):
+        """
+        Marks a signature as being based on a sample of the contained objects.
+        """
+        if signature.kind == cls.Sampled:
+            return signature
+        return cls(cls.Sampled, children=(signature,))
+
+    def renamed(self, rename, _memo=None):
+        """
+        Signature with all names passed through rename.
+        :param Callable rename: str -> str
+        :return: TypeSignature
+        """
+        _memo = dict() if _memo is None else _memo
+        if self in _memo:
+            return _memo[self]
+
+        children = [child.renamed(rename, _memo) for child in self.children]
+        if self.kind == TypeSignature.Union:
+            signature = TypeSignature.union(children)
+        elif self.kind == TypeSignature.Sampled:
+            signature = TypeSignature.sampled(children[0])
+        else:
+            name = None if self.name is None else rename(self.name)
+            signature = TypeSignature(self.kind, name, self.python_type, tuple(children))
+
+        _memo[self] = signature
+        return signature
+
+    # #########################################################################
+    # Rendering
+
+    def to_string(self, l="[", r="]", or_divider="|", and_divider=",", map_divider=": ", sampled_marker="~",
+                  _memo=None):
+        """
+        Renders the signature. Shared sub-signatures are only rendered once.
+        Alternative types are sorted, so the string is deterministic.
+        :param str l: Left delimiter of contained types.
+        :param str r: Right delimiter of contained types.
+        :param str or_divider: Divider of alternative types (lists)
+        :param str and_divider: Divider of sequential types (tuples)
+        :param str map_divider: Separates keys from values in dicts etc.
+        :param str sampled_marker: Prefix of types whose contained types are based on a sample.
+        :return: str
+        """
+        _memo = dict() if _memo is None else _memo
+        if self in _memo:
+            return _memo[self]
+
+        def render(child):
+            return child.to_string(l, r, or_divider, and_divider, map_divider, sampled_marker, _memo)
+
+        if self.kind == TypeSignature.Leaf:
+            string = self.name
+        elif self.kind == TypeSignature.Loop:
+            string = self.name + l + ".." + r
+        elif self.kind == TypeSignature.Union:
+            string = or_divider.join(sorted(render(child) for child in self.children))
+        elif self.kind == TypeSignature.Container:
+            string = self.name + l + render(self.children[0]) + r
+        elif self.kind == TypeSignature.Sequence:
+            string = self.name + l + and_divider.join([render(child) for child in self.children]) + r
+        elif self.kind == TypeSignature.Mapping:
+            string = self.name + l + render(self.children[0]) + map_divider + render(self.children[1]) + r
+        elif self.kind == TypeSignature.Sampled:
+            string = sampled_marker + render(self.children[0])
+        else:
+            raise ValueError(f"Unknown kind of signature: {self.kind}")
+
+        _memo[self] = string
+        return string
+
+    def to_typing(self, _memo=None):
+        """
+        Renders the signature as typing-objects, fx. list[typing.Union[int, str]].
+        Types which can not be parameterized are returned without parameters.
+        :return: type
+        """
+        _memo = dict() if _memo is None else _memo
+        if self in _memo:
+            return _memo[self]
+
+        if self.kind == TypeSignature.Union:
+            members = sorted(self.children, key=lambda child: child.to_string())
+            result = typing.Union[tuple(child.to_typing(_memo) for child in members)]
+        elif self.kind == TypeSignature.Sampled:
+            result = self.children[0].to_typing(_memo)
+        elif self.kind == TypeSignature.Leaf and self.name.endswith("()"):
+            result = typing.Callable
+        elif self.kind in (TypeSignature.Leaf, TypeSignature.Loop) or self.python_type is None:
+            result = self.python_type
+        else:
+            parameters = tuple(child.to_typing(_memo) for child in self.children)
+            try:
+                result = self.python_type[parameters]
+            except TypeError:
+                result = self.python_type
+
+        _memo[self] = result
+        return result
+
+    def to_json(self, _memo=None):
+        """
+        Renders the signature as JSON-serializable dictionaries.
+        Shared sub-signatures are rendered as the same dictionary.
+        :return: dict
+        """
+        _memo = dict() if _memo is None else _memo
+        if self in _memo:
+            return _memo[self]
+
+        if self.kind == TypeSignature.Union:
+            members = sorted(self.children, key=lambda child: child.to_string())
+            result = dict(union=[child.to_json(_memo) for child in members])
+        elif self.kind == TypeSignature.Sampled:
+            result = dict(self.children[0].to_json(_memo), sampled=True)
+        else:
+            result = dict(type=self.name)
+            if self.kind == TypeSignature.Loop:
+                result["loop"] = True
+            elif self.kind == TypeSignature.Container:
+                result["items"] = self.children[0].to_json(_memo)
+            elif self.kind == TypeSignature.Sequence:
+                result["items"] = [child.to_json(_memo) for child in self.children]
+            elif self.kind == TypeSignature.Mapping:
+                result["keys"] = self.children[0].to_json(_memo)
+                result["values"] = self.children[1].to_json(_memo)
+
+        _memo[self] = result
+        return result